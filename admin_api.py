@@ -62,22 +62,20 @@ async def get_admin_stats():
     """Get comprehensive admin statistics"""
     try:
         import glob
-        import json
         
         # Count products
         products = len(glob.glob('/home/Thalegendgamer/dropship/campaigns/*.json'))
         
         # Count orders and calculate totals
-        orders = glob.glob('/home/Thalegendgamer/dropship/orders/*.json')
+        from order_store import order_store
+        orders = order_store.list()
         total_revenue = 0
         total_profit = 0
         total_orders = len(orders)
         
-        for order_file in orders:
-            with open(order_file, 'r') as f:
-                order = json.load(f)
-                total_revenue += order.get('amount_paid', 0)
-                total_profit += order.get('profit', 0)
+        for order in orders:
+            total_revenue += order.get('amount_paid', 0)
+            total_profit += order.get('profit', 0)
         
         return {
             "products": products,
@@ -12,6 +12,7 @@ import random
 import requests
 from datetime import datetime
 from verified_amazon_products import VERIFIED_AMAZON_PRODUCTS
+from catalog_store import catalog_store
 
 class AIInventoryManager:
     def __init__(self):
@@ -92,10 +93,8 @@ class AIInventoryManager:
                 timestamp = int(datetime.now().timestamp())
                 safe_name = product['name'].lower().replace(' ', '_')[:40]
                 safe_name = ''.join(c for c in safe_name if c.isalnum() or c == '_')
-                filename = f"{self.campaigns_dir}/{safe_name}_{timestamp}.json"
-                
-                with open(filename, 'w') as f:
-                    json.dump(campaign, f, indent=2)
+                filename = f"{safe_name}_{timestamp}.json"
+                catalog_store.save(filename, campaign)
                 
                 print(f"✅ Added to store!")
                 print(f"   Cost: ${cost} → Sell: ${sell_price}")
@@ -117,24 +116,15 @@ class AIInventoryManager:
     def clean_old_products(self, max_products=20):
         """Remove old products to keep inventory fresh"""
         try:
-            campaigns = []
-            for filename in os.listdir(self.campaigns_dir):
-                if filename.endswith('.json'):
-                    filepath = f"{self.campaigns_dir}/{filename}"
-                    with open(filepath, 'r') as f:
-                        campaign = json.load(f)
-                        campaign['_filename'] = filepath
-                        campaigns.append(campaign)
-            
-            # Sort by date
-            campaigns.sort(key=lambda x: x.get('created_at', ''), reverse=True)
+            # Catalog index is already sorted by created_at (newest first)
+            filenames = catalog_store.filenames_by_created(newest_first=True)
             
             # Remove oldest if too many
-            if len(campaigns) > max_products:
-                to_remove = campaigns[max_products:]
-                for campaign in to_remove:
-                    os.remove(campaign['_filename'])
-                    print(f"🗑️ Removed old product: {campaign['product_name']}")
+            if len(filenames) > max_products:
+                for filename in filenames[max_products:]:
+                    campaign = catalog_store.get(filename) or {}
+                    catalog_store.delete(filename)
+                    print(f"🗑️ Removed old product: {campaign.get('product_name', filename)}")
                 
         except Exception as e:
             print(f"⚠️ Cleanup error: {str(e)}")
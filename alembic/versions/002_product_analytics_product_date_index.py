@@ -0,0 +1,44 @@
+"""composite (product_id, date) index on product_analytics
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # product_analytics was only ever created by Base.metadata.create_all;
+    # create it here for databases built purely from migrations
+    if not sa.inspect(op.get_bind()).has_table('product_analytics'):
+        op.create_table(
+            'product_analytics',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('product_id', sa.Integer(), nullable=True),
+            sa.Column('date', sa.DateTime(), nullable=True),
+            sa.Column('views', sa.Integer(), nullable=True),
+            sa.Column('clicks', sa.Integer(), nullable=True),
+            sa.Column('sales', sa.Integer(), nullable=True),
+            sa.Column('revenue', sa.Float(), nullable=True),
+            sa.Column('ad_spend', sa.Float(), nullable=True),
+            sa.Column('roi', sa.Float(), nullable=True),
+            sa.Column('conversion_rate', sa.Float(), nullable=True),
+            sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_product_analytics_id'), 'product_analytics', ['id'], unique=False)
+
+    # Serves every per-product date-range aggregate (ROI, funnel, leaderboard)
+    op.create_index('ix_product_analytics_product_id_date', 'product_analytics', ['product_id', 'date'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_product_analytics_product_id_date', table_name='product_analytics')
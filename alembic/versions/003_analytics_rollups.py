@@ -0,0 +1,66 @@
+"""daily/hourly rollup tables for product_analytics
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+
+def _metric_columns():
+    return [
+        sa.Column('views', sa.Integer(), nullable=True),
+        sa.Column('clicks', sa.Integer(), nullable=True),
+        sa.Column('sales', sa.Integer(), nullable=True),
+        sa.Column('revenue', sa.Float(), nullable=True),
+        sa.Column('ad_spend', sa.Float(), nullable=True),
+    ]
+
+
+def upgrade():
+    op.create_table(
+        'product_analytics_daily',
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        *_metric_columns(),
+        sa.Column('rows', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+        sa.PrimaryKeyConstraint('product_id', 'day')
+    )
+    op.create_index(op.f('ix_product_analytics_daily_day'), 'product_analytics_daily', ['day'], unique=False)
+
+    op.create_table(
+        'product_analytics_hourly',
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('hour', sa.DateTime(), nullable=False),
+        *_metric_columns(),
+        sa.Column('rows', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+        sa.PrimaryKeyConstraint('product_id', 'hour')
+    )
+    op.create_index(op.f('ix_product_analytics_hourly_hour'), 'product_analytics_hourly', ['hour'], unique=False)
+
+    op.create_table(
+        'analytics_daily',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('products', sa.Integer(), nullable=True),
+        *_metric_columns(),
+        sa.PrimaryKeyConstraint('day')
+    )
+    # Existing rows are folded in with: python -m backend.services.analytics.rollups backfill
+
+
+def downgrade():
+    op.drop_table('analytics_daily')
+    op.drop_index(op.f('ix_product_analytics_hourly_hour'), table_name='product_analytics_hourly')
+    op.drop_table('product_analytics_hourly')
+    op.drop_index(op.f('ix_product_analytics_daily_day'), table_name='product_analytics_daily')
+    op.drop_table('product_analytics_daily')
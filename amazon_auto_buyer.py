@@ -17,6 +17,7 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from dotenv import load_dotenv
+from order_store import order_store
 
 load_dotenv()
 
@@ -427,16 +428,20 @@ class AmazonAutoBuyer:
                 print("🔒 Browser closed")
 
 
-def process_order_from_file(order_file, verify_only=False):
-    """Process an order from a JSON file"""
+# Orders the bot may pick up - 'purchasing' means another bot already claimed it
+PURCHASABLE_STATUSES = ('paid', 'pending_fulfillment', 'failed')
+
+
+def process_order(order_id, verify_only=False):
+    """Purchase an order from the order log"""
     print(f"\n{'='*70}")
-    print(f"📦 Processing order: {order_file}")
+    print(f"📦 Processing order: {order_id}")
     print(f"{'='*70}\n")
     
     try:
-        # Load order
-        with open(order_file, 'r') as f:
-            order = json.load(f)
+        order = order_store.get(order_id)
+        if order is None:
+            raise KeyError(f"Order {order_id} not found")
         
         print(f"Product: {order.get('product_name')}")
         print(f"ASIN: {order.get('asin')}")
@@ -445,6 +450,10 @@ def process_order_from_file(order_file, verify_only=False):
         print(f"Your Cost: ${order.get('buy_price')}")
         print(f"Your Profit: ${order.get('profit')}\n")
         
+        # Claim the order so a second bot can't buy it twice
+        if not verify_only:
+            order = order_store.transition(order_id, 'purchasing', expect=PURCHASABLE_STATUSES)
+        
         # Prepare shipping address
         shipping = order.get('shipping_address', {})
         shipping_address = {
@@ -456,21 +465,26 @@ def process_order_from_file(order_file, verify_only=False):
         }
         
         # Create bot and purchase
-        bot = AmazonAutoBuyer(headless=False)  # Set to True for background mode
-        result = bot.purchase_product(
-            asin=order.get('asin'),
-            shipping_address=shipping_address,
-            verify_only=verify_only
-        )
-        
-        # Update order file with result
-        order['bot_result'] = result
-        order['status'] = 'ordered' if result['success'] else 'failed'
-        order['amazon_order_id'] = result.get('amazon_order_id')
-        order['bot_timestamp'] = result['timestamp']
+        try:
+            bot = AmazonAutoBuyer(headless=False)  # Set to True for background mode
+            result = bot.purchase_product(
+                asin=order.get('asin'),
+                shipping_address=shipping_address,
+                verify_only=verify_only
+            )
+        except Exception as e:
+            result = {'success': False, 'error': str(e), 'timestamp': datetime.now().isoformat()}
         
-        with open(order_file, 'w') as f:
-            json.dump(order, f, indent=2)
+        # Record the result on the order
+        if not verify_only:
+            order_store.transition(
+                order_id,
+                'ordered' if result['success'] else 'failed',
+                expect=('purchasing',),
+                bot_result=result,
+                amazon_order_id=result.get('amazon_order_id'),
+                bot_timestamp=result.get('timestamp')
+            )
         
         print(f"\n{'='*70}")
         if result['success']:
@@ -488,16 +502,28 @@ def process_order_from_file(order_file, verify_only=False):
         return {'success': False, 'error': str(e)}
 
 
+def process_order_from_file(order_file, verify_only=False):
+    """Import a legacy order JSON file into the order log and process it"""
+    with open(order_file, 'r') as f:
+        order = json.load(f)
+    if order_store.get(order['order_id']) is None:
+        order_store.create(order)
+    return process_order(order['order_id'], verify_only=verify_only)
+
+
 if __name__ == "__main__":
     import sys
     
     # Test mode
     if len(sys.argv) > 1:
-        order_file = sys.argv[1]
+        order_ref = sys.argv[1]
         verify_only = '--verify' in sys.argv
-        process_order_from_file(order_file, verify_only=verify_only)
+        if order_ref.endswith('.json'):
+            process_order_from_file(order_ref, verify_only=verify_only)
+        else:
+            process_order(order_ref, verify_only=verify_only)
     else:
-        print("Usage: python amazon_auto_buyer.py <order_file.json> [--verify]")
+        print("Usage: python amazon_auto_buyer.py <order_id> [--verify]")
         print("\nExample:")
-        print("  python amazon_auto_buyer.py orders/ORD-1234567890.json --verify")
+        print("  python amazon_auto_buyer.py ORD-1234567890 --verify")
         print("\n  Use --verify to test without actually placing the order")
@@ -0,0 +1,279 @@
+"""
+Amazon Extractors - Pluggable HTML extraction for Amazon product pages
+The BeautifulSoup extractor is the original reference implementation;
+the lxml extractor pre-scans the raw bytes and only builds a DOM when it must.
+"""
+
+import os
+import re
+import html
+from typing import Callable, Dict, List, Optional
+
+try:
+    from lxml import etree
+    import lxml.html
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+try:
+    from bs4 import BeautifulSoup
+    BS4_AVAILABLE = True
+except ImportError:
+    BS4_AVAILABLE = False
+
+# Tried in order - the first one that yields a positive price wins
+PRICE_CLASSES = ['a-price-whole', 'a-offscreen']
+PRICE_IDS = ['priceblock_ourprice', 'priceblock_dealprice']
+
+LARGE_IMAGE_RE = re.compile(r'"large":"(https://m\.media-amazon\.com/images/I/[^"]+)"')
+HIRES_IMAGE_RE = re.compile(r'"hiRes":"(https://[^"]+)"')
+GALLERY_RE = re.compile(r'"imageGalleryData"\s*:\s*\[([^\]]+)\]')
+GALLERY_URL_RE = re.compile(r'"mainUrl":"(https://[^"]+)"')
+DYNAMIC_IMAGE_RE = re.compile(r'"(https://[^"]+)"')
+
+
+def parse_price(text: str) -> float:
+    """Parse a price string like "$1,299.99" (0 if it isn't a price)"""
+    text = text.replace(',', '').replace('$', '').replace('£', '').strip()
+    try:
+        return float(re.sub(r'[^\d.]', '', text))
+    except ValueError:
+        return 0
+
+
+def images_from_scripts(find_script: Callable[[str], Optional[str]], page_text: Callable[[], str]) -> List[str]:
+    """Image URLs from the colorImages / hiRes scripts, then imageGalleryData
+
+    find_script(marker) returns the first <script> body containing marker;
+    both callables are only invoked when the previous method found nothing.
+    """
+    color_script = find_script('colorImages')
+    if color_script:
+        images = LARGE_IMAGE_RE.findall(color_script)[:5]
+        if images:
+            return images
+    hires_script = find_script('"hiRes"')
+    if hires_script:
+        images = HIRES_IMAGE_RE.findall(hires_script)[:5]
+        if images:
+            return images
+    gallery_match = GALLERY_RE.search(page_text())
+    if gallery_match:
+        return GALLERY_URL_RE.findall(gallery_match.group(1))[:5]
+    return []
+
+
+def images_from_img_tag(dynamic_img: str, src: str) -> List[str]:
+    """Image URLs from the landing <img> (data-a-dynamic-image JSON, then src)"""
+    if dynamic_img:
+        images = DYNAMIC_IMAGE_RE.findall(dynamic_img)[:3]
+        if images:
+            return images
+    if src and 'amazon' in src:
+        return [src]
+    return []
+
+
+def keep_features(bullets: List[str]) -> List[str]:
+    features = []
+    for text in bullets[:5]:
+        text = text.strip()
+        if text and len(text) > 10 and not text.startswith('Make sure'):
+            features.append(text)
+    return features
+
+
+class SoupExtractor:
+    """Reference extractor - full BeautifulSoup html.parser tree"""
+
+    name = 'soup'
+
+    def extract(self, content: bytes) -> Dict:
+        """Return {'title', 'price', 'images', 'features'} (title is None if missing)"""
+        soup = BeautifulSoup(content, 'html.parser')
+
+        title_elem = soup.find('span', {'id': 'productTitle'}) or soup.find('h1', {'id': 'title'})
+        title = title_elem.text.strip() if title_elem else None
+
+        price = 0
+        price_selectors = [('class', c) for c in PRICE_CLASSES] + [('id', i) for i in PRICE_IDS]
+        for attr, value in price_selectors:
+            price_elem = soup.find('span', {attr: value})
+            if price_elem:
+                price = parse_price(price_elem.text)
+                if price > 0:
+                    break
+
+        def find_script(marker: str) -> Optional[str]:
+            script = soup.find('script', string=re.compile(re.escape(marker)))
+            return script.string if script else None
+
+        images = images_from_scripts(find_script, lambda: content.decode('utf-8', errors='replace'))
+        if not images:
+            main_img = soup.find('img', {'id': 'landingImage'}) or soup.find('img', {'data-a-dynamic-image': True})
+            if main_img:
+                images = images_from_img_tag(main_img.get('data-a-dynamic-image', ''), main_img.get('src', ''))
+
+        bullets = []
+        feature_bullets = soup.find('div', {'id': 'feature-bullets'})
+        if feature_bullets:
+            bullets = [b.text for b in feature_bullets.find_all('span', {'class': 'a-list-item'})]
+
+        return {'title': title, 'price': price, 'images': images, 'features': keep_features(bullets)}
+
+
+def _has_class(name: str) -> str:
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+class LxmlExtractor:
+    """Fast extractor - byte-level regex pre-scan with an lxml/XPath fallback
+
+    The pre-scan handles the common page layout without building a DOM:
+    title and price come from tightly anchored regexes, images from the
+    enclosing <script> of the colorImages/hiRes data, and only the
+    feature-bullets <div> is parsed. Anything inconclusive falls back to
+    one full lxml parse with precompiled XPath selectors.
+    """
+
+    name = 'lxml'
+
+    TITLE_RE = re.compile(rb'<span\s[^>]*?\bid=["\']productTitle["\'][^>]*>([^<]*)</span>')
+    PRICE_RES = (
+        [re.compile(rb'<span\s[^>]*?\bclass=["\'](?:[^"\']*\s)?' + re.escape(c.encode()) +
+                    rb'(?:\s[^"\']*)?["\'][^>]*>([^<]*)') for c in PRICE_CLASSES] +
+        [re.compile(rb'<span\s[^>]*?\bid=["\']' + re.escape(i.encode()) + rb'["\'][^>]*>([^<]*)')
+         for i in PRICE_IDS]
+    )
+    FEATURES_OPEN_RE = re.compile(rb'<div\s[^>]*?\bid=["\']feature-bullets["\']')
+    DIV_TAG_RE = re.compile(rb'<(/?)div\b', re.IGNORECASE)
+
+    def __init__(self):
+        self.parser = lxml.html.HTMLParser(encoding='utf-8')
+        self.xp_title = etree.XPath("(//span[@id='productTitle'] | //h1[@id='title'])")
+        self.xp_prices = (
+            [etree.XPath(f"(//span[{_has_class(c)}])[1]") for c in PRICE_CLASSES] +
+            [etree.XPath(f"(//span[@id='{i}'])[1]") for i in PRICE_IDS]
+        )
+        self.xp_scripts = etree.XPath("//script")
+        self.xp_main_img = etree.XPath("(//img[@id='landingImage'])[1] | (//img[@data-a-dynamic-image])[1]")
+        self.xp_features = etree.XPath(f"(//div[@id='feature-bullets'])[1]//span[{_has_class('a-list-item')}]")
+        self.xp_fragment_features = etree.XPath(f"//span[{_has_class('a-list-item')}]")
+        self.stats = {"fast": 0, "dom": 0}
+
+    def extract(self, content: bytes) -> Dict:
+        """Return {'title', 'price', 'images', 'features'} (title is None if missing)"""
+        result = self._prescan(content)
+        if result is not None:
+            self.stats["fast"] += 1
+            return result
+        self.stats["dom"] += 1
+        return self._extract_dom(content)
+
+    # ------------------------------------------------------------------
+    # Byte-level pre-scan
+    # ------------------------------------------------------------------
+
+    def _prescan(self, content: bytes) -> Optional[Dict]:
+        match = self.TITLE_RE.search(content)
+        if not match:
+            return None
+        title = html.unescape(match.group(1).decode('utf-8', errors='replace')).strip()
+
+        price = 0
+        for regex in self.PRICE_RES:
+            match = regex.search(content)
+            if match:
+                price = parse_price(html.unescape(match.group(1).decode('utf-8', errors='replace')))
+                if price <= 0:
+                    return None     # element exists but its text is nested - let the DOM decide
+                break
+
+        images = images_from_scripts(lambda marker: self._script_containing(content, marker.encode()),
+                                     lambda: content.decode('utf-8', errors='replace'))
+        if not images:
+            return None             # needs the <img> attributes
+
+        return {'title': title, 'price': price, 'images': images,
+                'features': self._prescan_features(content)}
+
+    @staticmethod
+    def _script_containing(content: bytes, marker: bytes) -> Optional[str]:
+        """Body of the first <script> element whose text contains marker"""
+        idx = content.find(marker)
+        while idx != -1:
+            start = content.rfind(b'<script', 0, idx)
+            if start != -1 and start > content.rfind(b'</script', 0, idx):
+                body_start = content.find(b'>', start) + 1
+                if 0 < body_start <= idx:
+                    end = content.find(b'</script', idx)
+                    body = content[body_start:end if end != -1 else len(content)]
+                    return body.decode('utf-8', errors='replace')
+            idx = content.find(marker, idx + 1)
+        return None
+
+    def _prescan_features(self, content: bytes) -> List[str]:
+        match = self.FEATURES_OPEN_RE.search(content)
+        if not match:
+            return []
+        # Slice out just the feature-bullets <div> by balancing nested divs
+        depth = 0
+        end = len(content)
+        for tag in self.DIV_TAG_RE.finditer(content, match.start()):
+            depth += -1 if tag.group(1) else 1
+            if depth == 0:
+                end = content.find(b'>', tag.end()) + 1 or len(content)
+                break
+        fragment = lxml.html.fragment_fromstring(content[match.start():end], parser=self.parser)
+        return keep_features([span.text_content() for span in self.xp_fragment_features(fragment)])
+
+    # ------------------------------------------------------------------
+    # Full DOM fallback
+    # ------------------------------------------------------------------
+
+    def _extract_dom(self, content: bytes) -> Dict:
+        root = lxml.html.document_fromstring(content, parser=self.parser)
+
+        titles = self.xp_title(root)
+        by_id = {el.get('id'): el for el in titles}
+        title_elem = by_id.get('productTitle') if by_id.get('productTitle') is not None else by_id.get('title')
+        title = title_elem.text_content().strip() if title_elem is not None else None
+
+        price = 0
+        for xp in self.xp_prices:
+            found = xp(root)
+            if found:
+                price = parse_price(found[0].text_content())
+                if price > 0:
+                    break
+
+        def find_script(marker: str) -> Optional[str]:
+            return next((s.text for s in self.xp_scripts(root) if s.text and marker in s.text), None)
+
+        images = images_from_scripts(find_script, lambda: content.decode('utf-8', errors='replace'))
+        if not images:
+            imgs = self.xp_main_img(root)
+            main_img = next((img for img in imgs if img.get('id') == 'landingImage'), imgs[0] if imgs else None)
+            if main_img is not None:
+                images = images_from_img_tag(main_img.get('data-a-dynamic-image', ''), main_img.get('src', ''))
+
+        bullets = [span.text_content() for span in self.xp_features(root)]
+        return {'title': title, 'price': price, 'images': images, 'features': keep_features(bullets)}
+
+
+EXTRACTORS = {'soup': SoupExtractor}
+if LXML_AVAILABLE:
+    EXTRACTORS['lxml'] = LxmlExtractor
+
+
+def get_extractor(name: Optional[str] = None):
+    """Build an extractor by name (AMAZON_EXTRACTOR env var, default lxml if installed)"""
+    name = name or os.getenv('AMAZON_EXTRACTOR') or ('lxml' if LXML_AVAILABLE else 'soup')
+    if name not in EXTRACTORS:
+        raise ValueError(f"Unknown extractor '{name}' (available: {', '.join(EXTRACTORS)})")
+    return EXTRACTORS[name]()
+
+
+# Global extractor shared by the API server
+amazon_extractor = get_extractor()
@@ -1,9 +1,19 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import JSONResponse
+from pydantic import ValidationError
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
 from backend.core.database import get_db
-from backend.models.schemas import SalesForecastRequest, SalesForecastResponse
+from backend.models.schemas import (
+    SalesForecastRequest,
+    SalesForecastResponse,
+    BatchSalesForecastRequest,
+    AnalyticsEventBatch
+)
+from backend.services.analytics.ingest import BufferFull, event_buffer
 from backend.services.analytics.forecasting import (
     SalesForecaster,
+    BatchSalesForecaster,
     ROIAnalyzer,
     CustomerBehaviorAnalyzer,
     DashboardMetrics
@@ -12,31 +22,72 @@ from backend.services.analytics.forecasting import (
 router = APIRouter()
 
 @router.post("/forecast-sales", response_model=SalesForecastResponse)
-async def forecast_sales(request: SalesForecastRequest, db: Session = Depends(get_db)):
+async def forecast_sales(request: SalesForecastRequest, db: AsyncSession = Depends(get_db)):
     """Forecast future sales for a product"""
     forecaster = SalesForecaster(db)
-    return forecaster.forecast_sales(request.product_id, request.days_ahead)
+    return await forecaster.forecast_sales(request.product_id, request.days_ahead)
+
+@router.post("/forecast-sales/batch")
+async def forecast_sales_batch(request: BatchSalesForecastRequest, db: AsyncSession = Depends(get_db)):
+    """Forecast sales for every product (or the given ones) in one pass"""
+    forecaster = BatchSalesForecaster(db)
+    return await forecaster.forecast_all(request.days_ahead, request.product_ids, request.seasonality, request.include_daily)
 
 @router.get("/roi/{product_id}")
-async def calculate_roi(product_id: int, period_days: int = 30, db: Session = Depends(get_db)):
+async def calculate_roi(product_id: int, period_days: int = 30, db: AsyncSession = Depends(get_db)):
     """Calculate ROI for a product"""
     analyzer = ROIAnalyzer(db)
-    return analyzer.calculate_product_roi(product_id, period_days)
+    return await analyzer.calculate_product_roi(product_id, period_days)
 
 @router.get("/top-performers")
-async def get_top_performers(limit: int = 10, db: Session = Depends(get_db)):
+async def get_top_performers(limit: int = 10, period_days: int = 30, db: AsyncSession = Depends(get_db)):
     """Get top performing products"""
     analyzer = ROIAnalyzer(db)
-    return {"top_products": analyzer.get_top_performing_products(limit)}
+    return {"top_products": await analyzer.get_top_performing_products(limit, period_days)}
 
 @router.get("/conversion-funnel/{product_id}")
-async def analyze_conversion_funnel(product_id: int, period_days: int = 30, db: Session = Depends(get_db)):
+async def analyze_conversion_funnel(product_id: int, period_days: int = 30, db: AsyncSession = Depends(get_db)):
     """Analyze conversion funnel for a product"""
-    analyzer = CustomerBehaviorAnalyzer()
-    return analyzer.analyze_conversion_funnel(product_id, period_days)
+    analyzer = CustomerBehaviorAnalyzer(db)
+    return await analyzer.analyze_conversion_funnel(product_id, period_days)
 
 @router.get("/dashboard")
-async def get_dashboard_metrics(period_days: int = 30, db: Session = Depends(get_db)):
+async def get_dashboard_metrics(period_days: int = 30, db: AsyncSession = Depends(get_db)):
     """Get overall dashboard metrics"""
     metrics = DashboardMetrics(db)
-    return metrics.get_overview_metrics(period_days)
+    return await metrics.get_overview_metrics(period_days)
+
+@router.get("/timeseries")
+async def get_time_series(product_id: Optional[int] = None, period: str = "day", days: int = 30,
+                          db: AsyncSession = Depends(get_db)):
+    """Hourly or daily analytics buckets for a product or the whole store"""
+    metrics = DashboardMetrics(db)
+    try:
+        return {"period": period, "series": await metrics.get_time_series(product_id, period, days)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/events", status_code=202)
+async def ingest_events(request: Request):
+    """Storefront beacon - batched view/click/sale events, written to product_analytics in bulk"""
+    if not event_buffer.enabled:
+        raise HTTPException(status_code=503, detail="Event ingestion is disabled")
+    # Parsed by hand: navigator.sendBeacon posts text/plain to avoid a CORS preflight
+    try:
+        batch = AnalyticsEventBatch.model_validate_json(await request.body())
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if len(batch.events) > event_buffer.max_request_events:
+        raise HTTPException(status_code=413,
+                            detail=f"At most {event_buffer.max_request_events} events per request")
+    try:
+        accepted = event_buffer.add(batch.events)
+    except BufferFull as e:
+        return JSONResponse(status_code=503, content={"error": str(e), "retry_after": e.retry_after},
+                            headers={"Retry-After": str(e.retry_after)})
+    return {"accepted": accepted}
+
+@router.get("/events/stats")
+async def get_event_stats():
+    """Queue depth and flush counters for event ingestion"""
+    return event_buffer.stats()
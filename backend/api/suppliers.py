@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from backend.core.database import get_db
 from backend.models.models import Supplier
@@ -8,32 +9,32 @@ from backend.models.schemas import SupplierCreate, SupplierResponse
 router = APIRouter()
 
 @router.post("/", response_model=SupplierResponse)
-async def create_supplier(supplier: SupplierCreate, db: Session = Depends(get_db)):
+async def create_supplier(supplier: SupplierCreate, db: AsyncSession = Depends(get_db)):
     """Create a new supplier"""
     db_supplier = Supplier(**supplier.model_dump())
     db.add(db_supplier)
-    db.commit()
-    db.refresh(db_supplier)
+    await db.commit()
+    await db.refresh(db_supplier)
     return db_supplier
 
 @router.get("/", response_model=List[SupplierResponse])
-async def list_suppliers(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+async def list_suppliers(skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_db)):
     """List all suppliers"""
-    suppliers = db.query(Supplier).offset(skip).limit(limit).all()
+    suppliers = (await db.execute(select(Supplier).offset(skip).limit(limit))).scalars().all()
     return suppliers
 
 @router.get("/{supplier_id}", response_model=SupplierResponse)
-async def get_supplier(supplier_id: int, db: Session = Depends(get_db)):
+async def get_supplier(supplier_id: int, db: AsyncSession = Depends(get_db)):
     """Get a specific supplier"""
-    supplier = db.query(Supplier).filter(Supplier.id == supplier_id).first()
+    supplier = await db.get(Supplier, supplier_id)
     if not supplier:
         raise HTTPException(status_code=404, detail="Supplier not found")
     return supplier
 
 @router.post("/{supplier_id}/update-score")
-async def update_supplier_score(supplier_id: int, db: Session = Depends(get_db)):
+async def update_supplier_score(supplier_id: int, db: AsyncSession = Depends(get_db)):
     """Update supplier reliability score"""
-    supplier = db.query(Supplier).filter(Supplier.id == supplier_id).first()
+    supplier = await db.get(Supplier, supplier_id)
     if not supplier:
         raise HTTPException(status_code=404, detail="Supplier not found")
     
@@ -50,7 +51,7 @@ async def update_supplier_score(supplier_id: int, db: Session = Depends(get_db))
     )
     
     supplier.reliability_score = round(reliability_score, 2)
-    db.commit()
-    db.refresh(supplier)
+    await db.commit()
+    await db.refresh(supplier)
     
     return {"reliability_score": supplier.reliability_score}
@@ -1,5 +1,5 @@
-from fastapi import APIRouter, Depends
-from backend.models.schemas import TrendAnalysisRequest, TrendResponse
+from fastapi import APIRouter, Depends, HTTPException
+from backend.models.schemas import TrendAnalysisRequest, TrendBatchRequest, TrendResponse
 from backend.services.product_research.trend_analyzer import (
     TrendAnalyzer, 
     CompetitorAnalyzer, 
@@ -9,6 +9,8 @@ from backend.services.product_research.trend_analyzer import (
 
 router = APIRouter()
 
+MAX_BATCH_KEYWORDS = 100
+
 @router.post("/analyze")
 async def analyze_trends(request: TrendAnalysisRequest):
     """Analyze trends for a keyword across multiple platforms"""
@@ -25,6 +27,29 @@ async def get_multi_platform_analysis(keyword: str):
     analyzer = TrendAnalyzer()
     return await analyzer.get_all_platform_data(keyword)
 
+@router.post("/batch")
+async def analyze_trends_batch(request: TrendBatchRequest):
+    """Score a whole keyword list in one call, ranked by combined score"""
+    if len(request.keywords) > MAX_BATCH_KEYWORDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_KEYWORDS} keywords per batch")
+    
+    analyzer = TrendAnalyzer()
+    reports = await analyzer.score_keywords(request.keywords)
+    
+    if request.validate_niches:
+        validator = NicheValidator()
+        validator.trend_analyzer = analyzer
+        validations = await validator.validate_niches(list(reports), reports)
+        for keyword, validation in validations.items():
+            reports[keyword]["niche_validation"] = validation
+    
+    ranking = sorted(reports, key=lambda k: reports[k]["combined_score"], reverse=True)
+    return {
+        "count": len(reports),
+        "ranking": [{"keyword": k, "combined_score": reports[k]["combined_score"]} for k in ranking],
+        "results": reports
+    }
+
 @router.get("/competitors/{niche}")
 async def analyze_competitors(niche: str, limit: int = 10):
     """Analyze competitor products in a niche"""
@@ -0,0 +1,259 @@
+"""
+Two-tier cache - bounded in-process LRU in front of Redis
+
+Concurrent misses for the same key share one load (single-flight), TTLs are
+jittered so hot keys don't expire together, entries are refreshed early with
+probability rising towards expiry (XFetch), expired entries are served stale
+while a background refresh runs, and when Redis is unreachable the local tier
+keeps answering on its own.
+
+    @cached("trends:google", ttl=3600, key=lambda self, keyword: keyword)
+    async def analyze_google_trends(self, keyword: str) -> Dict: ...
+"""
+
+import math
+import time
+import json
+import random
+import asyncio
+import functools
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from redis.exceptions import RedisError
+
+from backend.core.redis import get_async_redis
+
+# Seconds to stop calling Redis after it fails, before trying again
+REDIS_RETRY_AFTER = 5.0
+_redis_down_until = 0.0
+
+_caches: Dict[str, "TwoTierCache"] = {}
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "delta")
+
+    def __init__(self, value: Any, expires_at: float, delta: float):
+        self.value = value
+        self.expires_at = expires_at    # wall clock, shared with other workers via Redis
+        self.delta = delta              # seconds the last load took (XFetch weight)
+
+
+class TwoTierCache:
+    """One cache namespace (e.g. "trends:google")"""
+
+    def __init__(self, namespace: str, ttl: int, stale_ttl: Optional[int] = None, max_local: int = 1024,
+                 jitter: float = 0.1, beta: float = 1.0):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl if stale_ttl is not None else ttl   # serve-stale window after expiry
+        self.max_local = max_local
+        self.jitter = jitter
+        self.beta = beta                # > 1 refreshes earlier, < 1 later
+
+        self._local = OrderedDict()     # key -> _Entry (LRU order)
+        self._inflight = {}             # key -> asyncio.Task
+        self.counters = {"local_hits": 0, "redis_hits": 0, "stale_hits": 0, "misses": 0, "loads": 0,
+                         "coalesced": 0, "early_refreshes": 0, "load_errors": 0, "redis_errors": 0}
+        _caches[namespace] = self
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    async def get(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Cached value for key, calling loader at most once per miss"""
+        now = time.time()
+        entry = self._local_get(key)
+        if entry is not None and now < entry.expires_at:
+            return self._hit("local_hits", key, loader, entry, now)
+        return await self._resolve(key, loader, entry, await self._redis_get(key), now)
+
+    async def get_many(self, keys: List[str], loaders: List[Callable[[], Awaitable[Any]]]) -> List[Any]:
+        """Batch get - local misses share one Redis MGET, remaining misses load concurrently"""
+        now = time.time()
+        results = [None] * len(keys)
+        pending = []
+        for i, key in enumerate(keys):
+            entry = self._local_get(key)
+            if entry is not None and now < entry.expires_at:
+                results[i] = self._hit("local_hits", key, loaders[i], entry, now)
+            else:
+                pending.append(i)
+        if pending:
+            remote = await self._redis_get_many([keys[i] for i in pending])
+            values = await asyncio.gather(*(
+                self._resolve(keys[i], loaders[i], self._local.get(keys[i]), entry, now)
+                for i, entry in zip(pending, remote)
+            ))
+            for i, value in zip(pending, values):
+                results[i] = value
+        return results
+
+    async def _resolve(self, key: str, loader, entry: Optional[_Entry], remote: Optional[_Entry], now: float) -> Any:
+        if remote is not None and now < remote.expires_at:
+            self._local_put(key, remote)
+            return self._hit("redis_hits", key, loader, remote, now)
+
+        stale = remote or entry
+        if stale is not None and now < stale.expires_at + self.stale_ttl:
+            self.counters["stale_hits"] += 1
+            self._refresh(key, loader)
+            return stale.value
+
+        self.counters["misses"] += 1
+        if key in self._inflight:
+            self.counters["coalesced"] += 1
+        return await asyncio.shield(self._refresh(key, loader))
+
+    def _hit(self, counter: str, key: str, loader, entry: _Entry, now: float) -> Any:
+        self.counters[counter] += 1
+        self._maybe_refresh_early(key, loader, entry, now)
+        return entry.value
+
+    async def invalidate(self, key: str):
+        self._local.pop(key, None)
+        if self._redis_available():
+            try:
+                await get_async_redis().delete(self._redis_key(key))
+            except (RedisError, OSError):
+                self._redis_failed()
+
+    def _maybe_refresh_early(self, key: str, loader, entry: _Entry, now: float):
+        # XFetch: refresh before expiry with probability growing as it nears
+        if entry.delta and now - entry.delta * self.beta * math.log(random.random() or 1e-12) >= entry.expires_at:
+            if key not in self._inflight:
+                self.counters["early_refreshes"] += 1
+                self._refresh(key, loader)
+
+    # ------------------------------------------------------------------
+    # Loading (single-flight)
+    # ------------------------------------------------------------------
+
+    def _refresh(self, key: str, loader) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load(key, loader))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+        return task
+
+    def _finish(self, key: str, task: asyncio.Task):
+        self._inflight.pop(key, None)
+        if not task.cancelled() and task.exception() is not None:
+            self.counters["load_errors"] += 1
+
+    async def _load(self, key: str, loader) -> Any:
+        started = time.monotonic()
+        value = await loader()
+        self.counters["loads"] += 1
+        ttl = self.ttl * (1 + random.uniform(-self.jitter, self.jitter))
+        entry = _Entry(value, time.time() + ttl, time.monotonic() - started)
+        self._local_put(key, entry)
+        await self._redis_put(key, entry, ttl)
+        return value
+
+    # ------------------------------------------------------------------
+    # Local tier
+    # ------------------------------------------------------------------
+
+    def _local_get(self, key: str) -> Optional[_Entry]:
+        entry = self._local.get(key)
+        if entry is not None:
+            self._local.move_to_end(key)
+        return entry
+
+    def _local_put(self, key: str, entry: _Entry):
+        self._local[key] = entry
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_local:
+            self._local.popitem(last=False)
+
+    # ------------------------------------------------------------------
+    # Redis tier (skipped while Redis is down)
+    # ------------------------------------------------------------------
+
+    def _redis_key(self, key: str) -> str:
+        return f"cache:{self.namespace}:{key}"
+
+    def _redis_available(self) -> bool:
+        return time.monotonic() >= _redis_down_until
+
+    def _redis_failed(self):
+        global _redis_down_until
+        self.counters["redis_errors"] += 1
+        _redis_down_until = time.monotonic() + REDIS_RETRY_AFTER
+
+    async def _redis_get(self, key: str) -> Optional[_Entry]:
+        return (await self._redis_get_many([key]))[0]
+
+    async def _redis_get_many(self, keys: List[str]) -> List[Optional[_Entry]]:
+        if not self._redis_available():
+            return [None] * len(keys)
+        try:
+            raws = await get_async_redis().mget([self._redis_key(key) for key in keys])
+        except (RedisError, OSError):
+            self._redis_failed()
+            return [None] * len(keys)
+        return [self._decode(raw) for raw in raws]
+
+    @staticmethod
+    def _decode(raw) -> Optional[_Entry]:
+        if not raw:
+            return None
+        try:
+            data = json.loads(raw)
+            return _Entry(data["v"], data["x"], data["d"])
+        except (ValueError, KeyError, TypeError):
+            return None
+
+    async def _redis_put(self, key: str, entry: _Entry, ttl: float):
+        if not self._redis_available():
+            return
+        payload = json.dumps({"v": entry.value, "x": entry.expires_at, "d": entry.delta})
+        try:
+            await get_async_redis().setex(self._redis_key(key), max(1, int(ttl + self.stale_ttl)), payload)
+        except (RedisError, OSError):
+            self._redis_failed()
+
+    def stats(self) -> Dict:
+        lookups = sum(self.counters[k] for k in ("local_hits", "redis_hits", "stale_hits", "misses"))
+        hits = lookups - self.counters["misses"]
+        return dict(self.counters, local_size=len(self._local), refreshing=len(self._inflight),
+                    hit_rate=round(hits / lookups, 3) if lookups else 0)
+
+
+def cached(namespace: str, ttl: int, key: Optional[Callable[..., str]] = None, **options):
+    """Cache an async function's JSON-serializable result in a TwoTierCache
+
+    key builds the cache key from the call's arguments (default: all
+    arguments after self joined with ':').
+    """
+    cache = TwoTierCache(namespace, ttl, **options)
+
+    def decorator(fn):
+        def make_key(*args, **kwargs) -> str:
+            if key is not None:
+                return key(*args, **kwargs)
+            return ":".join(str(a) for a in args[1:] + tuple(kwargs.values()))
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            return await cache.get(make_key(*args, **kwargs), lambda: fn(*args, **kwargs))
+
+        async def many(calls: List[tuple]) -> List[Any]:
+            """One lookup per argument tuple, batched through get_many"""
+            return await cache.get_many([make_key(*args) for args in calls],
+                                        [functools.partial(fn, *args) for args in calls])
+
+        wrapper.cache = cache
+        wrapper.many = many
+        return wrapper
+
+    return decorator
+
+
+def cache_stats() -> Dict[str, Dict]:
+    """Per-namespace counters for every cache"""
+    return {namespace: cache.stats() for namespace, cache in _caches.items()}
@@ -1,22 +1,63 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-import sys
-from pathlib import Path
+from backend.core.config import settings
+from scaling_config import SCALING_CONFIG
 
-# Add parent directory to path
-sys.path.append(str(Path(__file__).parent.parent))
+DB_CONFIG = SCALING_CONFIG["database"]
 
-from core.config import settings
+# Async drivers for each sync URL scheme
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
 
-engine = create_engine(settings.DATABASE_URL, connect_args={"check_same_thread": False} if "sqlite" in settings.DATABASE_URL else {})
+
+def _engine_kwargs(url: str) -> dict:
+    """Pool settings from SCALING_CONFIG["database"]"""
+    url = make_url(url)
+    kwargs = {"pool_pre_ping": DB_CONFIG["pool_pre_ping"], "echo": DB_CONFIG["echo"]}
+    if url.get_backend_name() == "sqlite":
+        kwargs["connect_args"] = {"check_same_thread": False}
+        # In-memory databases live in a single connection - nothing to pool
+        if url.database in (None, "", ":memory:"):
+            return kwargs
+    else:
+        # SQLite has no READ COMMITTED level
+        kwargs["isolation_level"] = DB_CONFIG["isolation_level"]
+    kwargs.update(
+        pool_size=DB_CONFIG["pool_size"],
+        max_overflow=DB_CONFIG["max_overflow"],
+        pool_timeout=DB_CONFIG["pool_timeout"],
+        pool_recycle=DB_CONFIG["pool_recycle"],
+    )
+    return kwargs
+
+
+def async_url(url: str) -> str:
+    """sqlite:///x -> sqlite+aiosqlite:///x, postgresql://... -> postgresql+asyncpg://..."""
+    if url.startswith("postgres://"):
+        url = "postgresql://" + url[len("postgres://"):]
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend in ASYNC_DRIVERS and parsed.get_driver_name() != ASYNC_DRIVERS[backend]:
+        parsed = parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+    return parsed.render_as_string(hide_password=False)
+
+
+# Sync engine (scripts, migrations, background threads)
+engine = create_engine(settings.DATABASE_URL, **_engine_kwargs(settings.DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for request handlers - queries never block the event loop
+async_engine = create_async_engine(async_url(settings.DATABASE_URL), **_engine_kwargs(settings.DATABASE_URL))
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+async def close_async_db():
+    """Release pooled connections (call on shutdown)"""
+    await async_engine.dispose()
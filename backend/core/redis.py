@@ -1,7 +1,65 @@
+import socket
+
 import redis
+import redis.asyncio as aioredis
 from backend.core.config import settings
+from scaling_config import SCALING_CONFIG
+
+REDIS_CONFIG = SCALING_CONFIG["redis"]
+
+
+def _pool_kwargs() -> dict:
+    """Connection pool settings from SCALING_CONFIG["redis"]"""
+    # Keepalive options are named after socket constants (TCP_KEEPIDLE, ...);
+    # platforms that lack one (e.g. TCP_KEEPIDLE on macOS) just skip it
+    keepalive = {
+        getattr(socket, name): value
+        for name, value in REDIS_CONFIG.get("socket_keepalive_options", {}).items()
+        if hasattr(socket, name)
+    }
+    return {
+        "max_connections": REDIS_CONFIG["max_connections"],
+        "socket_keepalive": REDIS_CONFIG["socket_keepalive"],
+        "socket_keepalive_options": keepalive,
+        "decode_responses": REDIS_CONFIG["decode_responses"],
+        "retry_on_timeout": REDIS_CONFIG["retry_on_timeout"],
+        "health_check_interval": REDIS_CONFIG["health_check_interval"],
+    }
+
+
+# Sync client (scripts and sync code paths)
+redis_client = redis.Redis(connection_pool=redis.ConnectionPool.from_url(settings.REDIS_URL, **_pool_kwargs()))
+
+# Async client for request handlers and services - never block the event loop
+async_pool = aioredis.ConnectionPool.from_url(settings.REDIS_URL, **_pool_kwargs())
+async_redis_client = aioredis.Redis(connection_pool=async_pool)
+
+# Async client that returns raw bytes (binary values such as price history segments)
+async_binary_pool = aioredis.ConnectionPool.from_url(settings.REDIS_URL, **dict(_pool_kwargs(), decode_responses=False))
+async_binary_client = aioredis.Redis(connection_pool=async_binary_pool)
 
-redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
 
 def get_redis():
     return redis_client
+
+
+def get_async_redis():
+    return async_redis_client
+
+
+def get_async_redis_binary():
+    return async_binary_client
+
+
+async def ping_redis() -> bool:
+    """Health check - True if Redis answers a PING"""
+    try:
+        return bool(await async_redis_client.ping())
+    except (redis.RedisError, OSError):
+        return False
+
+
+async def close_async_redis():
+    """Release pooled connections (call on shutdown)"""
+    await async_pool.disconnect()
+    await async_binary_pool.disconnect()
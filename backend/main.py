@@ -1,17 +1,25 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.middleware.gzip import GZipMiddleware
 import sys
 from pathlib import Path
 
-# Add parent directory to path
+# Make the repo root importable so `backend.*` and scaling_config resolve
 sys.path.append(str(Path(__file__).parent.parent))
 
-from core.config import settings
-from core.database import engine, Base
-from api import products, suppliers, trends, marketing, analytics, automation
-from api.admin import admin_router
-from api.subscriptions import subscription_router
-from middleware.rate_limit import RateLimitMiddleware
+from backend.core.config import settings
+from backend.core.database import engine, Base, close_async_db
+from backend.api import products, suppliers, trends, marketing, analytics, automation
+from backend.api.admin import admin_router
+from backend.api.subscriptions import subscription_router
+from backend.middleware.asgi import RequestIDMiddleware, TimingMiddleware
+from backend.middleware.rate_limit import RateLimitMiddleware
+from backend.services.analytics import rollups
+from backend.services.analytics.ingest import event_buffer
+from backend.services.supplier_management.price_scanner import price_scanner
+from backend.core.redis import ping_redis, close_async_redis
+from backend.core.cache import cache_stats
+from browser_pool import browser_pool
 
 # Create tables
 try:
@@ -19,13 +27,19 @@ try:
 except Exception as e:
     print(f"Database initialization warning: {e}")
 
+# Keep analytics rollups in step with ORM writes to product_analytics
+rollups.install()
+
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.VERSION,
     description="AI-Powered Drop Shipping Automation Platform"
 )
 
-# CORS
+# Middleware - all pure ASGI (no BaseHTTPMiddleware). Added innermost first,
+# so requests pass: request ID -> timing -> CORS -> gzip -> rate limit -> routes
+app.add_middleware(RateLimitMiddleware)
+app.add_middleware(GZipMiddleware, minimum_size=1000)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -33,19 +47,18 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
-
-# Rate Limiting
-app.add_middleware(RateLimitMiddleware)
+app.add_middleware(TimingMiddleware)
+app.add_middleware(RequestIDMiddleware)
 
 # Include routers
 app.include_router(products.router, prefix="/api/products", tags=["Products"])
 app.include_router(suppliers.router, prefix="/api/suppliers", tags=["Suppliers"])
 app.include_router(trends.router, prefix="/api/trends", tags=["Trends"])
-app.include_router(marketing.router, prefix="/ap
-app.include_router(subscription_router, tags=["Subscriptions"])i/marketing", tags=["Marketing"])
+app.include_router(marketing.router, prefix="/api/marketing", tags=["Marketing"])
 app.include_router(analytics.router, prefix="/api/analytics", tags=["Analytics"])
 app.include_router(automation.router, prefix="/api/automation", tags=["Automation"])
 app.include_router(admin_router, tags=["Admin"])
+app.include_router(subscription_router, tags=["Subscriptions"])
 
 @app.get("/")
 async def root():
@@ -55,6 +68,40 @@ async def root():
         "status": "running"
     }
 
+@app.on_event("startup")
+async def startup():
+    await event_buffer.start()
+    await price_scanner.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await event_buffer.stop()
+    await price_scanner.stop()
+    await close_async_redis()
+    await close_async_db()
+    await browser_pool.close()
+
 @app.get("/health")
 async def health():
-    return {"status": "healthy"}
+    redis_ok = await ping_redis()
+    return {"status": "healthy" if redis_ok else "degraded", "redis": redis_ok}
+
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    """Hit/miss counters for each cache namespace"""
+    return cache_stats()
+
+@app.get("/api/scraping/browsers")
+async def get_browser_pool_status():
+    """Warm browser pool usage - leases, restarts and per-browser page counts"""
+    return browser_pool.status()
+
+@app.get("/api/scanner/status")
+async def get_price_scanner_status():
+    """Recent price-scan runs - duration, throughput and alert counts"""
+    return price_scanner.status()
+
+@app.post("/api/scanner/run")
+async def run_price_scanner():
+    """Run a price scan now (continues an unfinished one)"""
+    return await price_scanner.scan()
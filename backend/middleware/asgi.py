@@ -0,0 +1,57 @@
+"""
+Pure ASGI middleware for the backend app
+
+Each middleware wraps `send` directly instead of going through Starlette's
+BaseHTTPMiddleware, so there is no extra task or response stream copy per
+request. Response headers are added to the http.response.start message as it
+passes through.
+"""
+
+import time
+import uuid
+from typing import Callable, Dict
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+def send_with_headers(send: Send, headers: Callable[[], Dict[str, str]]) -> Send:
+    """Wrap send so headers() is merged into the response start message"""
+    async def wrapped(message: Message):
+        if message["type"] == "http.response.start":
+            MutableHeaders(scope=message).update(headers())
+        await send(message)
+    return wrapped
+
+
+class RequestIDMiddleware:
+    """Propagate X-Request-ID (or assign one) and expose it as request.state.request_id"""
+
+    def __init__(self, app: ASGIApp, header: str = "X-Request-ID"):
+        self.app = app
+        self.header = header
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        request_id = Headers(scope=scope).get(self.header) or uuid.uuid4().hex
+        scope.setdefault("state", {})["request_id"] = request_id
+        await self.app(scope, receive, send_with_headers(send, lambda: {self.header: request_id}))
+
+
+class TimingMiddleware:
+    """Report time to first response byte as X-Response-Time and Server-Timing"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        started = time.perf_counter()
+
+        def timing_headers() -> Dict[str, str]:
+            ms = (time.perf_counter() - started) * 1000
+            return {"X-Response-Time": f"{ms:.2f}ms", "Server-Timing": f"app;dur={ms:.2f}"}
+
+        await self.app(scope, receive, send_with_headers(send, timing_headers))
@@ -1,61 +1,216 @@
 #!/usr/bin/env python3
 """
 API Rate Limiting Middleware
-Enforces subscription-based rate limits
+Enforces subscription-based and per-endpoint rate limits
+
+Limits are GCRA token buckets (sustained rate = limit/window, bucket size =
+limit * burst_limit) checked atomically in one Redis script, so every worker
+shares the same counters. When Redis is unreachable each worker falls back to
+an in-process limiter with the same semantics.
 """
 
-from fastapi import Request, HTTPException
-from starlette.middleware.base import BaseHTTPMiddleware
-from datetime import datetime, timedelta
-from collections import defaultdict
+import math
 import time
+from typing import Dict, List, Optional, Tuple
+
+from fastapi.responses import JSONResponse
+from redis.exceptions import RedisError
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from backend.api import subscriptions
+from backend.core.redis import get_async_redis
+from backend.middleware.asgi import send_with_headers
+from scaling_config import SCALING_CONFIG
+
+# Subscription plan rate_limit values are requests per hour
+PLAN_WINDOW = 3600
+
+# Seconds to use the local limiter after a Redis failure before trying Redis again
+REDIS_RETRY_AFTER = 5.0
+
+WINDOWS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+# KEYS = bucket keys; ARGV = interval_ms, tolerance_ms per key.
+# Returns {allowed, key index (denied key, or the one with least room), retry_ms, remaining, reset_ms}
+GCRA_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local tats = {}
+local tightest, least = 1, nil
+for i, key in ipairs(KEYS) do
+    local interval = tonumber(ARGV[i * 2 - 1])
+    local tolerance = tonumber(ARGV[i * 2])
+    local tat = tonumber(redis.call('GET', key)) or now
+    if tat < now then tat = now end
+    local new_tat = tat + interval
+    local wait = new_tat - tolerance - now
+    if wait > 0 then
+        return {0, i, math.ceil(wait), 0, math.ceil(tat - now)}
+    end
+    tats[i] = new_tat
+    local remaining = math.floor((tolerance - (new_tat - now)) / interval)
+    if least == nil or remaining < least then
+        tightest, least = i, remaining
+    end
+end
+for i, key in ipairs(KEYS) do
+    redis.call('SET', key, tats[i], 'PX', math.ceil(tats[i] - now))
+end
+return {1, tightest, 0, least, math.ceil(tats[tightest] - now)}
+"""
+
+
+def parse_rate(rate: str) -> Tuple[int, int]:
+    """'1000/minute' -> (1000, 60)"""
+    count, _, unit = rate.partition('/')
+    return int(count), WINDOWS[unit.strip().rstrip('s')]
+
+
+class Bucket:
+    """One limit to enforce: limit requests per window, plus burst headroom"""
+
+    __slots__ = ('key', 'capacity', 'interval_ms', 'tolerance_ms')
+
+    def __init__(self, key: str, limit: int, window: int, burst: float):
+        self.key = key
+        self.capacity = max(1, math.ceil(limit * burst))   # requests allowed back to back
+        self.interval_ms = window * 1000 / limit
+        self.tolerance_ms = self.interval_ms * self.capacity
+
+
+class RateLimiter:
+    """GCRA limiter over several buckets at once - Redis first, local fallback"""
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app):
-        super().__init__(app)
-        self.request_counts = defaultdict(lambda: {'count': 0, 'reset_time': time.time() + 3600})
-    
-    async def dispatch(self, request: Request, call_next):
+    def __init__(self, config: Optional[Dict] = None):
+        config = config or SCALING_CONFIG["rate_limiting"]
+        self.enabled = config.get("enabled", True)
+        self.burst = config.get("burst_limit", 1.0)
+        self.default_limit = parse_rate(config["default_limit"])
+        # Longest prefix first so /api/products/x matches /api/products, not a shorter prefix
+        self.api_limits = sorted(((prefix, parse_rate(rate)) for prefix, rate in config.get("api_limits", {}).items()),
+                                 key=lambda item: len(item[0]), reverse=True)
+        self._script = None
+        self._redis_down_until = 0.0
+        self._local = {}            # bucket key -> theoretical arrival time (ms)
+        self._last_sweep = 0.0
+        self.counters = {"allowed": 0, "limited": 0, "redis_errors": 0, "local_decisions": 0}
+
+    def buckets_for(self, path: str, api_key: Optional[str], client_ip: str) -> List[Bucket]:
+        """Endpoint bucket for the caller plus the subscription plan bucket for known keys"""
+        key_data = subscriptions.API_KEYS_DB.get(api_key) if api_key else None
+        identity = f"key:{api_key}" if key_data else f"ip:{client_ip}"
+
+        scope, (limit, window) = "default", self.default_limit
+        for prefix, rate in self.api_limits:
+            if path.startswith(prefix):
+                scope, (limit, window) = prefix, rate
+                break
+        buckets = [Bucket(f"ratelimit:{scope}:{identity}", limit, window, self.burst)]
+
+        if key_data and key_data.get('rate_limit'):
+            buckets.append(Bucket(f"ratelimit:plan:{identity}", int(key_data['rate_limit']), PLAN_WINDOW, self.burst))
+        return buckets
+
+    async def check(self, buckets: List[Bucket]) -> Dict:
+        """Take one request from every bucket, or none if any is exhausted"""
+        result = None
+        if time.monotonic() >= self._redis_down_until:
+            try:
+                result = await self._check_redis(buckets)
+            except (RedisError, OSError):
+                self.counters["redis_errors"] += 1
+                self._redis_down_until = time.monotonic() + REDIS_RETRY_AFTER
+        if result is None:
+            self.counters["local_decisions"] += 1
+            result = self._check_local(buckets)
+        self.counters["allowed" if result["allowed"] else "limited"] += 1
+        return result
+
+    async def _check_redis(self, buckets: List[Bucket]) -> Dict:
+        if self._script is None:
+            self._script = get_async_redis().register_script(GCRA_SCRIPT)
+        args = []
+        for bucket in buckets:
+            args.extend((bucket.interval_ms, bucket.tolerance_ms))
+        allowed, index, retry_ms, remaining, reset_ms = await self._script(
+            keys=[bucket.key for bucket in buckets], args=args
+        )
+        return self._result(bool(allowed), buckets[int(index) - 1], float(retry_ms), int(remaining), float(reset_ms))
+
+    def _check_local(self, buckets: List[Bucket]) -> Dict:
+        now = time.time() * 1000
+        self._sweep(now)
+        new_tats = []
+        for bucket in buckets:
+            tat = max(self._local.get(bucket.key, now), now)
+            new_tat = tat + bucket.interval_ms
+            wait = new_tat - bucket.tolerance_ms - now
+            if wait > 0:
+                return self._result(False, bucket, wait, 0, tat - now)
+            new_tats.append(new_tat)
+
+        tightest, least, reset_ms = None, None, 0.0
+        for bucket, new_tat in zip(buckets, new_tats):
+            self._local[bucket.key] = new_tat
+            remaining = int((bucket.tolerance_ms - (new_tat - now)) // bucket.interval_ms)
+            if least is None or remaining < least:
+                tightest, least, reset_ms = bucket, remaining, new_tat - now
+        return self._result(True, tightest, 0, least, reset_ms)
+
+    def _sweep(self, now: float):
+        # A bucket whose arrival time has passed is full again - forget it
+        if now - self._last_sweep < 60_000:
+            return
+        self._last_sweep = now
+        for key in [k for k, tat in self._local.items() if tat <= now]:
+            del self._local[key]
+
+    @staticmethod
+    def _result(allowed: bool, bucket: Bucket, retry_ms: float, remaining: int, reset_ms: float) -> Dict:
+        return {
+            "allowed": allowed,
+            "limit": bucket.capacity,
+            "remaining": max(0, remaining),
+            "retry_after": math.ceil(retry_ms / 1000),
+            "reset": int(time.time() + reset_ms / 1000),
+            "bucket": bucket.key,
+        }
+
+
+class RateLimitMiddleware:
+    """Pure ASGI rate limiting - a 429 is sent directly, allowed requests get X-RateLimit-* headers"""
+
+    def __init__(self, app: ASGIApp, limiter: Optional[RateLimiter] = None):
+        self.app = app
+        self.limiter = limiter or RateLimiter()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
         # Skip rate limiting for non-API routes
-        if not request.url.path.startswith('/api/'):
-            return await call_next(request)
-        
-        # Get API key from header
-        api_key = request.headers.get('X-API-Key')
-        
-        if api_key:
-            # Check rate limit
-            current_time = time.time()
-            user_data = self.request_counts[api_key]
-            
-            # Reset counter if time window passed
-            if current_time > user_data['reset_time']:
-                user_data['count'] = 0
-                user_data['reset_time'] = current_time + 3600  # 1 hour window
-            
-            # Increment counter
-            user_data['count'] += 1
-            
-            # Get user's rate limit (from API key DB)
-            # For now, default to 100/hour
-            rate_limit = 100  # This should be fetched from subscription data
-            
-            if user_data['count'] > rate_limit:
-                raise HTTPException(
-                    status_code=429,
-                    detail={
-                        'error': 'Rate limit exceeded',
-                        'limit': rate_limit,
-                        'reset_at': datetime.fromtimestamp(user_data['reset_time']).isoformat()
-                    }
-                )
-            
-            # Add rate limit headers to response
-            response = await call_next(request)
-            response.headers['X-RateLimit-Limit'] = str(rate_limit)
-            response.headers['X-RateLimit-Remaining'] = str(max(0, rate_limit - user_data['count']))
-            response.headers['X-RateLimit-Reset'] = str(int(user_data['reset_time']))
-            
-            return response
-        
-        return await call_next(request)
+        if scope["type"] != "http" or not self.limiter.enabled or not scope["path"].startswith('/api/'):
+            return await self.app(scope, receive, send)
+
+        client = scope.get("client")
+        api_key = Headers(scope=scope).get('X-API-Key')
+        buckets = self.limiter.buckets_for(scope["path"], api_key, client[0] if client else 'unknown')
+        result = await self.limiter.check(buckets)
+
+        headers = {
+            'X-RateLimit-Limit': str(result['limit']),
+            'X-RateLimit-Remaining': str(result['remaining']),
+            'X-RateLimit-Reset': str(result['reset']),
+        }
+        if not result['allowed']:
+            headers['Retry-After'] = str(result['retry_after'])
+            response = JSONResponse(
+                status_code=429,
+                content={
+                    'error': 'Rate limit exceeded',
+                    'limit': result['limit'],
+                    'retry_after': result['retry_after']
+                },
+                headers=headers
+            )
+            return await response(scope, receive, send)
+
+        await self.app(scope, receive, send_with_headers(send, lambda: headers))
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, JSON, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Boolean, JSON, Text, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from backend.core.database import Base
@@ -65,6 +65,50 @@ class ProductAnalytics(Base):
     conversion_rate = Column(Float, default=0.0)
     
     product = relationship("Product", back_populates="analytics")
+    
+    __table_args__ = (
+        Index("ix_product_analytics_product_id_date", "product_id", "date"),
+    )
+
+
+# Rollups of product_analytics, maintained by backend/services/analytics/rollups.py
+
+class ProductAnalyticsDaily(Base):
+    __tablename__ = "product_analytics_daily"
+    
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    day = Column(Date, primary_key=True, index=True)
+    views = Column(Integer, default=0)
+    clicks = Column(Integer, default=0)
+    sales = Column(Integer, default=0)
+    revenue = Column(Float, default=0.0)
+    ad_spend = Column(Float, default=0.0)
+    rows = Column(Integer, default=0)  # raw product_analytics rows folded in
+
+
+class ProductAnalyticsHourly(Base):
+    __tablename__ = "product_analytics_hourly"
+    
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    hour = Column(DateTime, primary_key=True, index=True)
+    views = Column(Integer, default=0)
+    clicks = Column(Integer, default=0)
+    sales = Column(Integer, default=0)
+    revenue = Column(Float, default=0.0)
+    ad_spend = Column(Float, default=0.0)
+    rows = Column(Integer, default=0)
+
+
+class AnalyticsDaily(Base):
+    __tablename__ = "analytics_daily"
+    
+    day = Column(Date, primary_key=True)
+    products = Column(Integer, default=0)  # products with activity that day
+    views = Column(Integer, default=0)
+    clicks = Column(Integer, default=0)
+    sales = Column(Integer, default=0)
+    revenue = Column(Float, default=0.0)
+    ad_spend = Column(Float, default=0.0)
 
 
 class TrendData(Base):
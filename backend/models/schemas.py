@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict
+from typing import List, Literal, Optional, Dict
 from datetime import datetime
 
 # Product Schemas
@@ -57,6 +57,10 @@ class TrendAnalysisRequest(BaseModel):
     keyword: str
     platforms: List[str] = ["tiktok", "google_trends"]
 
+class TrendBatchRequest(BaseModel):
+    keywords: List[str]
+    validate_niches: bool = False
+
 class TrendResponse(BaseModel):
     keyword: str
     platform: str
@@ -83,6 +87,22 @@ class SalesForecastRequest(BaseModel):
     product_id: int
     days_ahead: int = 30
 
+class BatchSalesForecastRequest(BaseModel):
+    product_ids: Optional[List[int]] = None  # None = every product with analytics
+    days_ahead: int = 30
+    seasonality: bool = False  # add day-of-week terms to the trend
+    include_daily: bool = True  # per-day forecast_data for each product
+
+class AnalyticsEvent(BaseModel):
+    type: Literal["view", "click", "sale"]
+    product_id: int
+    ts: Optional[datetime] = None  # defaults to the time the server received it
+    quantity: int = Field(default=1, ge=1, le=1000)
+    # No client-supplied revenue: the beacon is public, so sales are priced from Product.price
+
+class AnalyticsEventBatch(BaseModel):
+    events: List[AnalyticsEvent]
+
 class SalesForecastResponse(BaseModel):
     product_id: int
     forecast_data: List[Dict]
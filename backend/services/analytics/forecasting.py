@@ -1,24 +1,28 @@
+import asyncio
 import pandas as pd
 import numpy as np
 from sklearn.linear_model import LinearRegression
-from typing import List, Dict
+from typing import List, Dict, Optional
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
-from backend.models.models import ProductAnalytics, Product
+from sqlalchemy import select, func, case
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.models.models import ProductAnalyticsDaily, ProductAnalyticsHourly, AnalyticsDaily, Product
 
 class SalesForecaster:
     """Forecast future sales using historical data"""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
     
-    def forecast_sales(self, product_id: int, days_ahead: int = 30) -> Dict:
+    async def forecast_sales(self, product_id: int, days_ahead: int = 30) -> Dict:
         """Forecast sales for the next N days"""
         
-        # Get historical data
-        analytics = self.db.query(ProductAnalytics).filter(
-            ProductAnalytics.product_id == product_id
-        ).order_by(ProductAnalytics.date).all()
+        # Get historical data (one point per day from the daily rollup)
+        analytics = (await self.db.execute(
+            select(ProductAnalyticsDaily)
+            .where(ProductAnalyticsDaily.product_id == product_id)
+            .order_by(ProductAnalyticsDaily.day)
+        )).scalars().all()
         
         if len(analytics) < 7:
             return {
@@ -28,7 +32,7 @@ class SalesForecaster:
             }
         
         # Prepare data
-        dates = [a.date for a in analytics]
+        dates = [a.day for a in analytics]
         sales = [a.sales for a in analytics]
         
         # Convert to numeric for regression
@@ -44,8 +48,7 @@ class SalesForecaster:
         forecast = model.predict(future_X)
         
         # Get product price for revenue calculation
-        product = self.db.query(Product).filter(Product.id == product_id).first()
-        price = product.price if product else 0
+        price = (await self.db.execute(select(Product.price).where(Product.id == product_id))).scalar() or 0
         
         forecast_data = []
         for i, pred_sales in enumerate(forecast):
@@ -73,35 +76,242 @@ class SalesForecaster:
         }
 
 
+# Batch forecasts keyed by request, reused while the analytics data version is unchanged
+_batch_forecast_cache: Dict[tuple, tuple] = {}
+BATCH_FORECAST_CACHE_SIZE = 32
+
+
+class BatchSalesForecaster:
+    """Forecast sales for many products at once
+    
+    Every product's daily sales series comes from one columnar query over the
+    daily rollup and is
+    packed into a (products x days) matrix. Each row's linear trend (the same
+    fit SalesForecaster makes per product) is then solved in closed form for
+    all products together; weekly seasonality adds day-of-week terms solved as
+    a batch of small least-squares systems.
+    """
+    
+    MIN_POINTS = 7
+    SEASONAL_CHUNK = 2000     # products per batched solve (bounds memory)
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def data_version(self) -> tuple:
+        """Changes whenever the daily rollup changes or products are edited"""
+        daily = ProductAnalyticsDaily
+        products_updated = select(func.max(Product.updated_at)).scalar_subquery()
+        return tuple((await self.db.execute(
+            select(func.count(daily.day), func.sum(daily.rows), func.sum(daily.sales), products_updated)
+        )).one())
+    
+    async def forecast_all(self, days_ahead: int = 30, product_ids: Optional[List[int]] = None,
+                     seasonality: bool = False, include_daily: bool = True) -> Dict:
+        """Forecast every product (or product_ids), cached until new analytics data arrives"""
+        key = (days_ahead, tuple(sorted(product_ids)) if product_ids else None, seasonality, include_daily)
+        version = await self.data_version()
+        cached = _batch_forecast_cache.get(key)
+        if cached and cached[0] == version:
+            return dict(cached[1], cached=True)
+        
+        result = await self._forecast(days_ahead, product_ids, seasonality, include_daily)
+        if len(_batch_forecast_cache) >= BATCH_FORECAST_CACHE_SIZE:
+            _batch_forecast_cache.pop(next(iter(_batch_forecast_cache)))
+        _batch_forecast_cache[key] = (version, result)
+        return dict(result, cached=False)
+    
+    async def _load_series(self, product_ids: Optional[List[int]]):
+        """One query for all series -> (ids, counts, sales matrix, mask, weekday matrix, last dates)"""
+        daily = ProductAnalyticsDaily
+        stmt = select(daily.product_id, daily.day, daily.sales).order_by(daily.product_id, daily.day)
+        if product_ids:
+            stmt = stmt.where(daily.product_id.in_(product_ids))
+        rows = (await self.db.execute(stmt)).all()
+        if not rows:
+            return None
+        
+        pids, dates, sales = zip(*rows)
+        pids = np.array(pids, dtype=np.int64)
+        ids, starts, counts = np.unique(pids, return_index=True, return_counts=True)
+        row = np.repeat(np.arange(len(ids)), counts)
+        pos = np.arange(len(pids)) - np.repeat(starts, counts)
+        
+        Y = np.zeros((len(ids), counts.max()))
+        mask = np.zeros(Y.shape, dtype=bool)
+        weekday = np.zeros(Y.shape, dtype=np.int64)
+        Y[row, pos] = np.array(sales, dtype=float)
+        mask[row, pos] = True
+        # 1970-01-01 was a Thursday: shift so Monday == 0 like datetime.weekday()
+        weekday[row, pos] = (np.array(dates, dtype='datetime64[D]').astype(np.int64) + 3) % 7
+        last_dates = [dates[i] for i in starts + counts - 1]
+        return ids, counts, Y, mask, weekday, last_dates
+    
+    @staticmethod
+    def _r_squared(Y: np.ndarray, fitted: np.ndarray, w: np.ndarray, counts: np.ndarray) -> np.ndarray:
+        mean = (Y * w).sum(axis=1) / counts
+        ss_res = (((Y - fitted) ** 2) * w).sum(axis=1)
+        ss_tot = (((Y - mean[:, None]) ** 2) * w).sum(axis=1)
+        # Same convention as sklearn's score() for a constant series
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(ss_tot > 0, 1 - ss_res / ss_tot, np.where(ss_res > 1e-12, 0.0, 1.0))
+    
+    def _fit_trend(self, Y, w, counts, days_ahead):
+        """Closed-form slope/intercept for every row at once"""
+        x = np.arange(Y.shape[1], dtype=float)
+        n = counts.astype(float)
+        sx = (w * x).sum(axis=1)
+        sy = (w * Y).sum(axis=1)
+        sxx = (w * x * x).sum(axis=1)
+        sxy = (w * x * Y).sum(axis=1)
+        slope = (n * sxy - sx * sy) / (n * sxx - sx * sx)
+        intercept = (sy - slope * sx) / n
+        
+        fitted = intercept[:, None] + slope[:, None] * x
+        future_x = n[:, None] + np.arange(days_ahead)
+        return intercept[:, None] + slope[:, None] * future_x, self._r_squared(Y, fitted, w, counts)
+    
+    def _fit_seasonal(self, Y, w, weekday, counts, last_weekday, days_ahead):
+        """Trend + day-of-week terms, solved as batched normal equations"""
+        P, L = Y.shape
+        forecast = np.empty((P, days_ahead))
+        r_squared = np.empty(P)
+        future_weekday = (last_weekday[:, None] + 1 + np.arange(days_ahead)) % 7
+        
+        for lo in range(0, P, self.SEASONAL_CHUNK):
+            hi = min(lo + self.SEASONAL_CHUNK, P)
+            X = self._design(np.broadcast_to(np.arange(L, dtype=float), (hi - lo, L)), weekday[lo:hi])
+            Xw = X * w[lo:hi, :, None]
+            beta = np.einsum('pkl,pl->pk', np.linalg.pinv(np.einsum('plk,plj->pkj', Xw, X)),
+                             np.einsum('plk,pl->pk', Xw, Y[lo:hi]))
+            r_squared[lo:hi] = self._r_squared(Y[lo:hi], np.einsum('plk,pk->pl', X, beta), w[lo:hi], counts[lo:hi])
+            
+            future_x = counts[lo:hi, None] + np.arange(days_ahead, dtype=float)
+            forecast[lo:hi] = np.einsum('pdk,pk->pd', self._design(future_x, future_weekday[lo:hi]), beta)
+        return forecast, r_squared
+    
+    @staticmethod
+    def _design(x: np.ndarray, weekday: np.ndarray) -> np.ndarray:
+        """[1, t, is_tuesday .. is_sunday] for every cell"""
+        dummies = (weekday[..., None] == np.arange(1, 7)).astype(float)
+        return np.concatenate([np.ones(x.shape + (1,)), x[..., None], dummies], axis=-1)
+    
+    async def _forecast(self, days_ahead: int, product_ids: Optional[List[int]], seasonality: bool,
+                        include_daily: bool) -> Dict:
+        result = {
+            "forecast_period_days": days_ahead,
+            "seasonality": seasonality,
+            "forecasts": [],
+            "skipped": [],
+            "total_predicted_sales": 0,
+            "total_predicted_revenue": 0.0
+        }
+        series = await self._load_series(product_ids)
+        if series is None:
+            return result
+        ids, counts, Y, mask, weekday, last_dates = series
+        
+        for pid, n in zip(ids[counts < self.MIN_POINTS], counts[counts < self.MIN_POINTS]):
+            result["skipped"].append({
+                "product_id": int(pid),
+                "error": "Insufficient data for forecasting",
+                "minimum_required": self.MIN_POINTS,
+                "current_data_points": int(n)
+            })
+        keep = counts >= self.MIN_POINTS
+        if not keep.any():
+            return result
+        ids, counts, Y, w, weekday = ids[keep], counts[keep], Y[keep], mask[keep].astype(float), weekday[keep]
+        last_dates = [d for d, k in zip(last_dates, keep) if k]
+        
+        # The fits are pure NumPy - run them off the event loop
+        if seasonality:
+            last_weekday = weekday[np.arange(len(ids)), counts - 1]
+            forecast, r_squared = await asyncio.to_thread(
+                self._fit_seasonal, Y, w, weekday, counts, last_weekday, days_ahead
+            )
+        else:
+            forecast, r_squared = await asyncio.to_thread(self._fit_trend, Y, w, counts, days_ahead)
+        
+        prices = dict((await self.db.execute(
+            select(Product.id, Product.price).where(Product.id.in_(ids.tolist()))
+        )).all())
+        price = np.array([prices.get(int(pid)) or 0 for pid in ids], dtype=float)
+        predicted_sales = np.maximum(0, np.trunc(forecast)).astype(np.int64)
+        predicted_revenue = np.maximum(0, np.round(forecast * price[:, None], 2))
+        total_sales = predicted_sales.sum(axis=1)
+        total_revenue = predicted_revenue.sum(axis=1)
+        
+        for i, pid in enumerate(ids.tolist()):
+            forecast_entry = {
+                "product_id": pid,
+                "forecast_period_days": days_ahead,
+                "total_predicted_sales": int(total_sales[i]),
+                "total_predicted_revenue": round(float(total_revenue[i]), 2),
+                "confidence_score": round(float(r_squared[i]) * 100, 2),
+                "model_accuracy": f"{round(float(r_squared[i]) * 100, 1)}%"
+            }
+            if include_daily:
+                forecast_entry["forecast_data"] = [
+                    {
+                        "date": (last_dates[i] + timedelta(days=d + 1)).isoformat(),
+                        "predicted_sales": int(predicted_sales[i, d]),
+                        "predicted_revenue": float(predicted_revenue[i, d])
+                    }
+                    for d in range(days_ahead)
+                ]
+            result["forecasts"].append(forecast_entry)
+        
+        result["total_predicted_sales"] = int(total_sales.sum())
+        result["total_predicted_revenue"] = round(float(total_revenue.sum()), 2)
+        return result
+
+
+def _cutoff_day(period_days: int):
+    return (datetime.utcnow() - timedelta(days=period_days)).date()
+
+
+def _period_totals(rollup=ProductAnalyticsDaily):
+    """COUNT/SUM() columns over the rollup days a query selects"""
+    return (
+        func.count().label("days"),
+        func.coalesce(func.sum(rollup.views), 0).label("views"),
+        func.coalesce(func.sum(rollup.clicks), 0).label("clicks"),
+        func.coalesce(func.sum(rollup.sales), 0).label("sales"),
+        func.coalesce(func.sum(rollup.revenue), 0.0).label("revenue"),
+        func.coalesce(func.sum(rollup.ad_spend), 0.0).label("ad_spend"),
+    )
+
+
 class ROIAnalyzer:
     """Analyze return on investment for products"""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
     
-    def calculate_product_roi(self, product_id: int, period_days: int = 30) -> Dict:
+    async def calculate_product_roi(self, product_id: int, period_days: int = 30) -> Dict:
         """Calculate ROI for a product over a period"""
         
-        cutoff_date = datetime.utcnow() - timedelta(days=period_days)
+        totals = (await self.db.execute(
+            select(*_period_totals()).where(
+                ProductAnalyticsDaily.product_id == product_id,
+                ProductAnalyticsDaily.day >= _cutoff_day(period_days)
+            )
+        )).one()
         
-        analytics = self.db.query(ProductAnalytics).filter(
-            ProductAnalytics.product_id == product_id,
-            ProductAnalytics.date >= cutoff_date
-        ).all()
-        
-        if not analytics:
+        if not totals.days:
             return {"error": "No data available for the specified period"}
         
-        total_revenue = sum([a.revenue for a in analytics])
-        total_ad_spend = sum([a.ad_spend for a in analytics])
-        total_sales = sum([a.sales for a in analytics])
-        
-        product = self.db.query(Product).filter(Product.id == product_id).first()
+        product_cost = (await self.db.execute(select(Product.cost).where(Product.id == product_id))).first()
         
-        if not product:
+        if not product_cost:
             return {"error": "Product not found"}
         
-        total_cost = product.cost * total_sales
+        total_revenue = totals.revenue
+        total_ad_spend = totals.ad_spend
+        total_sales = totals.sales
+        
+        total_cost = (product_cost.cost or 0) * total_sales
         gross_profit = total_revenue - total_cost
         net_profit = gross_profit - total_ad_spend
         
@@ -122,54 +332,70 @@ class ROIAnalyzer:
             "average_sale_value": round(total_revenue / total_sales, 2) if total_sales > 0 else 0
         }
     
-    def get_top_performing_products(self, limit: int = 10) -> List[Dict]:
-        """Get top performing products by ROI"""
-        
-        # Get all products with recent analytics
-        cutoff_date = datetime.utcnow() - timedelta(days=30)
-        
-        products = self.db.query(Product).join(ProductAnalytics).filter(
-            ProductAnalytics.date >= cutoff_date
-        ).distinct().all()
-        
-        performance = []
-        
-        for product in products:
-            roi_data = self.calculate_product_roi(product.id, 30)
-            if "error" not in roi_data:
-                performance.append({
-                    "product_id": product.id,
-                    "product_title": product.title,
-                    "roi": roi_data["roi_percent"],
-                    "net_profit": roi_data["net_profit"],
-                    "total_sales": roi_data["total_sales"]
-                })
-        
-        # Sort by ROI
-        performance.sort(key=lambda x: x["roi"], reverse=True)
-        
-        return performance[:limit]
+    async def get_top_performing_products(self, limit: int = 10, period_days: int = 30) -> List[Dict]:
+        """Get top performing products by ROI - one grouped query, ranked and limited in SQL"""
+        
+        daily = ProductAnalyticsDaily
+        per_product = select(
+            daily.product_id,
+            func.sum(daily.revenue).label("revenue"),
+            func.sum(daily.ad_spend).label("ad_spend"),
+            func.sum(daily.sales).label("sales")
+        ).where(
+            daily.day >= _cutoff_day(period_days)
+        ).group_by(daily.product_id).subquery()
+        
+        revenue = func.coalesce(per_product.c.revenue, 0.0)
+        ad_spend = func.coalesce(per_product.c.ad_spend, 0.0)
+        sales = func.coalesce(per_product.c.sales, 0)
+        total_cost = func.coalesce(Product.cost, 0.0) * sales
+        net_profit = revenue - total_cost - ad_spend
+        roi = case(
+            (total_cost + ad_spend > 0, net_profit * 100.0 / (total_cost + ad_spend)),
+            else_=0.0
+        ).label("roi")
+        
+        rows = (await self.db.execute(
+            select(Product.id, Product.title, roi, net_profit.label("net_profit"), sales.label("total_sales"))
+            .join(per_product, per_product.c.product_id == Product.id)
+            .order_by(roi.desc())
+            .limit(limit)
+        )).all()
+        
+        return [
+            {
+                "product_id": row.id,
+                "product_title": row.title,
+                "roi": round(row.roi, 2),
+                "net_profit": round(row.net_profit, 2),
+                "total_sales": row.total_sales
+            }
+            for row in rows
+        ]
 
 
 class CustomerBehaviorAnalyzer:
     """Analyze customer behavior patterns"""
     
-    def analyze_conversion_funnel(self, product_id: int, period_days: int = 30) -> Dict:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def analyze_conversion_funnel(self, product_id: int, period_days: int = 30) -> Dict:
         """Analyze conversion funnel for a product"""
         
-        cutoff_date = datetime.utcnow() - timedelta(days=period_days)
-        
-        analytics = self.db.query(ProductAnalytics).filter(
-            ProductAnalytics.product_id == product_id,
-            ProductAnalytics.date >= cutoff_date
-        ).all()
+        totals = (await self.db.execute(
+            select(*_period_totals()).where(
+                ProductAnalyticsDaily.product_id == product_id,
+                ProductAnalyticsDaily.day >= _cutoff_day(period_days)
+            )
+        )).one()
         
-        if not analytics:
+        if not totals.days:
             return {"error": "No data available"}
         
-        total_views = sum([a.views for a in analytics])
-        total_clicks = sum([a.clicks for a in analytics])
-        total_sales = sum([a.sales for a in analytics])
+        total_views = totals.views
+        total_clicks = totals.clicks
+        total_sales = totals.sales
         
         click_rate = (total_clicks / total_views * 100) if total_views > 0 else 0
         conversion_rate = (total_sales / total_clicks * 100) if total_clicks > 0 else 0
@@ -218,25 +444,26 @@ class CustomerBehaviorAnalyzer:
 class DashboardMetrics:
     """Generate dashboard metrics and reports"""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
     
-    def get_overview_metrics(self, period_days: int = 30) -> Dict:
+    async def get_overview_metrics(self, period_days: int = 30) -> Dict:
         """Get overall business metrics"""
         
-        cutoff_date = datetime.utcnow() - timedelta(days=period_days)
-        
-        analytics = self.db.query(ProductAnalytics).filter(
-            ProductAnalytics.date >= cutoff_date
-        ).all()
+        active_products = select(func.count(Product.id)).where(
+            Product.status == "active"
+        ).scalar_subquery()
         
-        total_revenue = sum([a.revenue for a in analytics])
-        total_sales = sum([a.sales for a in analytics])
-        total_ad_spend = sum([a.ad_spend for a in analytics])
+        totals = (await self.db.execute(
+            select(*_period_totals(AnalyticsDaily), active_products.label("active_products")).where(
+                AnalyticsDaily.day >= _cutoff_day(period_days)
+            )
+        )).one()
         
-        active_products = self.db.query(Product).filter(
-            Product.status == "active"
-        ).count()
+        total_revenue = totals.revenue
+        total_sales = totals.sales
+        total_ad_spend = totals.ad_spend
+        active_products = totals.active_products
         
         avg_order_value = total_revenue / total_sales if total_sales > 0 else 0
         
@@ -250,3 +477,31 @@ class DashboardMetrics:
             "average_order_value": round(avg_order_value, 2),
             "roi": round(((total_revenue - total_ad_spend) / total_ad_spend * 100), 2) if total_ad_spend > 0 else 0
         }
+    
+    async def get_time_series(self, product_id: Optional[int] = None, period: str = "day", days: int = 30) -> List[Dict]:
+        """Hourly or daily buckets for one product or the whole store, from the rollups"""
+        if period == "hour":
+            rollup, bucket = ProductAnalyticsHourly, ProductAnalyticsHourly.hour
+            since = datetime.utcnow().replace(minute=0, second=0, microsecond=0) - timedelta(days=days)
+        elif period == "day":
+            rollup = ProductAnalyticsDaily if product_id is not None else AnalyticsDaily
+            bucket, since = rollup.day, _cutoff_day(days)
+        else:
+            raise ValueError("period must be 'hour' or 'day'")
+        
+        stmt = select(bucket.label("bucket"), *_period_totals(rollup)[1:]).where(bucket >= since)
+        if product_id is not None:
+            stmt = stmt.where(rollup.product_id == product_id)
+        rows = (await self.db.execute(stmt.group_by(bucket).order_by(bucket))).all()
+        
+        return [
+            {
+                "bucket": row.bucket.isoformat(),
+                "views": row.views,
+                "clicks": row.clicks,
+                "sales": row.sales,
+                "revenue": round(row.revenue, 2),
+                "ad_spend": round(row.ad_spend, 2)
+            }
+            for row in rows
+        ]
@@ -0,0 +1,331 @@
+"""
+Analytics event ingestion - buffered storefront beacons -> product_analytics
+
+The beacon endpoint only appends events to a bounded in-memory queue and
+returns. A background task drains the queue every flush_interval seconds, or
+as soon as batch_size events are waiting, folding each flush into one
+product_analytics row per (product, hour) written with a single executemany
+INSERT, and refreshes the rollup buckets it touched in the same transaction.
+
+Delivery is at-least-once: an accepted batch is appended to the spool file
+before the request is acknowledged, the spool checkpoint only moves once the
+flush has committed, and anything past the checkpoint is replayed on startup
+(a crash between commit and checkpoint writes that flush twice). When the
+queue is full the whole request is refused with 503 + Retry-After instead of
+dropping events.
+
+A flush that keeps failing for max_flush_attempts tries is retried one
+request at a time; a request that still fails with anything but a
+connection error is moved to the dead-letter file so it can't block the
+queue. Sale revenue is priced from Product.price - the beacon is public, so
+client-supplied amounts are never trusted.
+"""
+
+import os
+import json
+import math
+import asyncio
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import insert, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+
+from backend.core.database import engine
+from backend.models.models import Product, ProductAnalytics
+from backend.services.analytics import rollups
+from scaling_config import SCALING_CONFIG
+
+# Event type -> product_analytics counter it increments
+EVENT_COLUMNS = {"view": "views", "click": "clicks", "sale": "sales"}
+
+# Longest pause between attempts while the database keeps failing
+MAX_RETRY_DELAY = 30
+
+# (product_id, column, timestamp, quantity)
+Event = Tuple[int, str, datetime, int]
+
+
+class BufferFull(Exception):
+    """The queue can't take the batch - the client should retry after retry_after seconds"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"analytics event buffer full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class EventBuffer:
+    """Bounded event queue with a spool file and a size/time-triggered bulk writer"""
+
+    def __init__(self, config: Optional[Dict] = None, bind: Engine = engine):
+        config = config or SCALING_CONFIG["background_tasks"]["analytics_events"]
+        self.enabled = config.get("enabled", True)
+        self.queue_size = config["queue_size"]
+        self.batch_size = config["batch_size"]
+        self.flush_interval = config["flush_interval"]
+        self.max_request_events = config.get("max_request_events", 500)
+        self.spool_path = Path(config["spool_path"]) if config.get("spool_path") else None
+        self.spool_max_bytes = config.get("spool_max_bytes", 16 * 1024 * 1024)
+        self.max_flush_attempts = config.get("max_flush_attempts", 5)
+        self.bind = bind
+
+        self._queue = deque()       # (events of one request, spool offset after it)
+        self._queued = 0            # events in _queue
+        self._in_flight = 0         # events taken by the running flush
+        self._wake = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = None
+        self._spool = None
+        self._spool_end = 0         # bytes written to the spool
+        self._checkpoint = 0        # spool bytes already committed to the database
+        self._failures = 0          # consecutive failed flushes
+        self._suspect = 0           # queued requests to flush one at a time after repeated failures
+        self.counters = {"accepted": 0, "rejected": 0, "written": 0, "rows": 0, "flushes": 0,
+                         "flush_errors": 0, "unknown_products": 0, "replayed": 0, "dead_lettered": 0}
+
+    # ------------------------------------------------------------------
+    # Accepting events
+    # ------------------------------------------------------------------
+
+    def add(self, events: List) -> int:
+        """Queue a batch of AnalyticsEvent; raises BufferFull when it doesn't fit"""
+        if self._queued + self._in_flight + len(events) > self.queue_size:
+            self.counters["rejected"] += len(events)
+            raise BufferFull(self.retry_after())
+
+        now = datetime.utcnow()
+        batch = [(e.product_id, EVENT_COLUMNS[e.type], self._timestamp(e.ts, now), e.quantity) for e in events]
+        self._enqueue(batch, self._spool_append(batch))
+        self.counters["accepted"] += len(batch)
+        return len(batch)
+
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.flush_interval))
+
+    @staticmethod
+    def _timestamp(ts: Optional[datetime], now: datetime) -> datetime:
+        if ts is None:
+            return now
+        if ts.tzinfo is not None:
+            ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+        return min(ts, now)     # client clocks running ahead don't create future buckets
+
+    def _enqueue(self, batch: List[Event], spool_offset: int):
+        self._queue.append((batch, spool_offset))
+        self._queued += len(batch)
+        if self._queued >= self.batch_size:
+            self._wake.set()
+
+    # ------------------------------------------------------------------
+    # Flushing
+    # ------------------------------------------------------------------
+
+    async def flush(self) -> int:
+        """Write everything taken from the queue (up to batch_size events); re-queues it on failure"""
+        async with self._flush_lock:
+            isolated = self._suspect > 0
+            taken, offset = self._take(1 if isolated else None)
+            if not taken:
+                return 0
+            events = [event for batch, _ in taken for event in batch]
+            self._in_flight = len(events)
+            try:
+                rows, unknown = await asyncio.to_thread(self._write, events)
+            except Exception as e:
+                self.counters["flush_errors"] += 1
+                if isolated and not self._transient(e):
+                    # This request is what keeps failing - set it aside and move on
+                    self._dead_letter(events, e)
+                    self._suspect -= 1
+                    self._commit_checkpoint(offset)
+                    return 0
+                self._queue.extendleft(reversed(taken))
+                self._queued += len(events)
+                self._failures += 1
+                if not isolated and self._failures >= self.max_flush_attempts:
+                    self._suspect = len(taken)
+                raise
+            finally:
+                self._in_flight = 0
+
+            self._failures = 0
+            if isolated:
+                self._suspect -= 1
+            self.counters["flushes"] += 1
+            self.counters["written"] += len(events) - unknown
+            self.counters["unknown_products"] += unknown
+            self.counters["rows"] += rows
+            self._commit_checkpoint(offset)
+            return len(events)
+
+    def _take(self, max_requests: Optional[int] = None) -> Tuple[List, int]:
+        # Whole requests only, so the checkpoint never lands inside a spool line
+        taken, count, offset = [], 0, self._checkpoint
+        while self._queue and (not taken or count + len(self._queue[0][0]) <= self.batch_size) \
+                and (max_requests is None or len(taken) < max_requests):
+            batch, offset = self._queue.popleft()
+            taken.append((batch, offset))
+            count += len(batch)
+        self._queued -= count
+        return taken, offset
+
+    def _write(self, events: List[Event]) -> Tuple[int, int]:
+        """One transaction: an executemany INSERT of per-(product, hour) rows + rollup refresh"""
+        buckets = {}
+        for product_id, column, ts, quantity in events:
+            hour = ts.replace(minute=0, second=0, microsecond=0)
+            row = buckets.get((product_id, hour))
+            if row is None:
+                row = buckets[(product_id, hour)] = {"product_id": product_id, "date": hour, "views": 0,
+                                                     "clicks": 0, "sales": 0, "revenue": 0.0, "ad_spend": 0.0}
+            row[column] += quantity
+
+        with self.bind.begin() as conn:
+            # Unknown products are dropped rather than failing (and endlessly retrying) the whole flush
+            product_ids = sorted({product_id for product_id, _ in buckets})
+            prices = dict(conn.execute(select(Product.id, Product.price).where(Product.id.in_(product_ids))).all())
+            known = set(prices)
+            rows = [row for (product_id, _), row in buckets.items() if product_id in known]
+            for row in rows:
+                row["revenue"] = row["sales"] * (prices[row["product_id"]] or 0.0)
+            if rows:
+                conn.execute(insert(ProductAnalytics), rows)
+                rollups.refresh(conn, [(row["product_id"], row["date"]) for row in rows])
+        unknown = sum(1 for event in events if event[0] not in known)
+        return len(rows), unknown
+
+    async def _run(self):
+        failures = 0
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+                failures = 0
+            except Exception as e:
+                failures += 1
+                if self._suspect:
+                    failures = 0    # isolating the bad request - no need to back off
+                delay = min(MAX_RETRY_DELAY, self.flush_interval * 2 ** failures)
+                print(f"⚠️ Analytics event flush failed ({e}); {self._queued} events queued, retrying in {delay}s")
+                await asyncio.sleep(delay)
+                continue
+            if self._queued >= self.batch_size:
+                self._wake.set()
+
+    # ------------------------------------------------------------------
+    # Spool (at-least-once across restarts)
+    # ------------------------------------------------------------------
+
+    def _spool_append(self, batch: List[Event]) -> int:
+        if self._spool is None:
+            return self._spool_end
+        line = json.dumps([[pid, col, ts.isoformat(), qty] for pid, col, ts, qty in batch],
+                          separators=(",", ":")) + "\n"
+        data = line.encode()
+        self._spool.write(data)
+        self._spool.flush()
+        self._spool_end += len(data)
+        return self._spool_end
+
+    @staticmethod
+    def _transient(error: Exception) -> bool:
+        """Connection-level failures (database down, locked, dropped) - worth retrying as-is"""
+        return isinstance(error, (OperationalError, InterfaceError)) or \
+            (isinstance(error, DBAPIError) and error.connection_invalidated)
+
+    def _dead_letter(self, events: List[Event], error: Exception):
+        self.counters["dead_lettered"] += len(events)
+        print(f"⚠️ Dead-lettering {len(events)} analytics events that keep failing: {error}")
+        if self.spool_path is None:
+            return
+        path = self.spool_path.with_name(self.spool_path.name + ".dead")
+        line = json.dumps({"error": str(error), "events": [[pid, col, ts.isoformat(), qty]
+                                                            for pid, col, ts, qty in events]})
+        with open(path, "a") as f:
+            f.write(line + "\n")
+
+    def _checkpoint_path(self) -> Path:
+        return self.spool_path.with_name(self.spool_path.name + ".checkpoint")
+
+    def _commit_checkpoint(self, offset: int):
+        if self._spool is None:
+            return
+        self._checkpoint = offset
+        if offset == self._spool_end and offset > self.spool_max_bytes:
+            # Everything is in the database - start the spool over
+            self._spool.truncate(0)
+            self._spool.seek(0)
+            self._checkpoint = self._spool_end = 0
+        tmp = self._checkpoint_path().with_suffix(".tmp")
+        tmp.write_text(str(self._checkpoint))
+        os.replace(tmp, self._checkpoint_path())
+
+    def _open_spool(self):
+        self.spool_path.parent.mkdir(parents=True, exist_ok=True)
+        self._spool = open(self.spool_path, "a+b")
+        try:
+            self._checkpoint = int(self._checkpoint_path().read_text() or 0)
+        except (FileNotFoundError, ValueError):
+            self._checkpoint = 0
+
+        self._spool.seek(self._checkpoint)
+        pending = self._spool.read()
+        # A torn last line (crash mid-append) was never acknowledged - drop it
+        complete = pending[:pending.rfind(b"\n") + 1]
+        self._spool_end = self._checkpoint + len(complete)
+        self._spool.truncate(self._spool_end)
+
+        offset = self._checkpoint
+        for line in complete.splitlines(keepends=True):
+            offset += len(line)
+            # Lines written before sales were priced server-side carry a fifth (revenue) field - ignored
+            batch = [(pid, col, datetime.fromisoformat(ts), qty) for pid, col, ts, qty, *_ in json.loads(line)]
+            self._enqueue(batch, offset)
+            self.counters["replayed"] += len(batch)
+        if self.counters["replayed"]:
+            print(f"♻️ Replaying {self.counters['replayed']} unflushed analytics events from {self.spool_path}")
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    async def start(self):
+        if not self.enabled or self._task is not None:
+            return
+        if self.spool_path is not None:
+            self._open_spool()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flush loop and write out what's left (the spool keeps it if that fails)"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        try:
+            while self._queued:
+                await self.flush()
+        except Exception as e:
+            print(f"⚠️ Analytics events left in spool at shutdown ({self._queued}): {e}")
+        if self._spool is not None:
+            self._spool.close()
+            self._spool = None
+
+    def stats(self) -> Dict:
+        return dict(self.counters, queued=self._queued, in_flight=self._in_flight, capacity=self.queue_size,
+                    spool_pending_bytes=self._spool_end - self._checkpoint)
+
+
+# Global event buffer shared by the API server
+event_buffer = EventBuffer()
@@ -0,0 +1,160 @@
+"""
+Analytics rollups - hourly and daily aggregates of product_analytics
+
+Raw product_analytics rows are folded into per-product hourly and daily
+buckets plus a global daily table, so dashboards read a few rows per day
+instead of scanning raw analytics. Buckets are recomputed from the raw rows
+with set-based INSERT ... SELECT, which makes every refresh idempotent.
+
+ORM writes refresh the buckets they touch once install() has been called;
+bulk writers call refresh() with the (product_id, timestamp) pairs they wrote.
+
+Backfill (rebuild from raw rows):
+    python -m backend.services.analytics.rollups backfill [--since YYYY-MM-DD]
+"""
+
+import argparse
+from datetime import date, datetime, time, timedelta
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, event, func, insert, inspect, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from backend.models.models import AnalyticsDaily, ProductAnalytics, ProductAnalyticsDaily, ProductAnalyticsHourly
+
+METRICS = ("views", "clicks", "sales", "revenue", "ad_spend")
+
+_TOUCHED = "analytics_rollups_touched"
+_installed = False
+
+
+def _hour_bucket(dialect: str, column):
+    if dialect == "sqlite":
+        # Same text layout SQLAlchemy uses for DateTime on SQLite, so range filters compare correctly
+        return func.strftime('%Y-%m-%d %H:00:00.000000', column)
+    return func.date_trunc('hour', column)
+
+
+def _sums(model) -> list:
+    return [func.coalesce(func.sum(getattr(model, metric)), 0) for metric in METRICS]
+
+
+def rebuild(conn: Connection, product_ids: Optional[List[int]] = None, start: Optional[date] = None,
+            end: Optional[date] = None):
+    """Recompute rollup buckets for product_ids (None = all) on days in [start, end)"""
+    start_at = datetime.combine(start, time.min) if start else None
+    end_at = datetime.combine(end, time.min) if end else None
+
+    def window(product_column, time_column, lo, hi) -> list:
+        conditions = []
+        if product_ids is not None and product_column is not None:
+            conditions.append(product_column.in_(product_ids))
+        if lo is not None:
+            conditions.append(time_column >= lo)
+        if hi is not None:
+            conditions.append(time_column < hi)
+        return conditions
+
+    # Raw rows -> per-product hours
+    raw, hourly = ProductAnalytics, ProductAnalyticsHourly
+    hour = _hour_bucket(conn.dialect.name, raw.date)
+    conn.execute(delete(hourly).where(*window(hourly.product_id, hourly.hour, start_at, end_at)))
+    conn.execute(insert(hourly).from_select(
+        ["product_id", "hour", *METRICS, "rows"],
+        select(raw.product_id, hour, *_sums(raw), func.count())
+        .where(raw.product_id.isnot(None), raw.date.isnot(None), *window(raw.product_id, raw.date, start_at, end_at))
+        .group_by(raw.product_id, hour)
+    ))
+
+    # Per-product hours -> per-product days
+    daily = ProductAnalyticsDaily
+    day = func.date(hourly.hour)
+    conn.execute(delete(daily).where(*window(daily.product_id, daily.day, start, end)))
+    conn.execute(insert(daily).from_select(
+        ["product_id", "day", *METRICS, "rows"],
+        select(hourly.product_id, day, *_sums(hourly), func.sum(hourly.rows))
+        .where(*window(hourly.product_id, hourly.hour, start_at, end_at))
+        .group_by(hourly.product_id, day)
+    ))
+
+    # Per-product days -> global days (all products on the affected days)
+    conn.execute(delete(AnalyticsDaily).where(*window(None, AnalyticsDaily.day, start, end)))
+    conn.execute(insert(AnalyticsDaily).from_select(
+        ["day", "products", *METRICS],
+        select(daily.day, func.count(daily.product_id), *_sums(daily))
+        .where(*window(None, daily.day, start, end))
+        .group_by(daily.day)
+    ))
+
+
+def refresh(conn: Connection, touched: Iterable[Tuple[int, datetime]]):
+    """Recompute the buckets covering raw rows written for these (product_id, timestamp) pairs"""
+    touched = [(pid, ts) for pid, ts in touched if pid is not None and ts is not None]
+    if not touched:
+        return
+    days = [ts.date() if isinstance(ts, datetime) else ts for _, ts in touched]
+    rebuild(conn, sorted({pid for pid, _ in touched}), min(days), max(days) + timedelta(days=1))
+
+
+def backfill(db: Session, since: Optional[date] = None):
+    """Rebuild every rollup from raw rows (optionally only days from since)"""
+    rebuild(db.connection(), start=since)
+    db.commit()
+
+
+# ----------------------------------------------------------------------
+# Keep rollups current for ORM writes
+# ----------------------------------------------------------------------
+
+def _collect_touched(session: Session, flush_context):
+    touched = session.info.setdefault(_TOUCHED, set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if not isinstance(obj, ProductAnalytics):
+            continue
+        touched.add((obj.product_id, obj.date or datetime.utcnow()))
+        # An update that moved the row also empties its old bucket
+        state = inspect(obj)
+        old_product = state.attrs.product_id.history.deleted
+        old_date = state.attrs.date.history.deleted
+        if old_product or old_date:
+            touched.add((old_product[0] if old_product else obj.product_id,
+                         old_date[0] if old_date else obj.date))
+
+
+def _refresh_touched(session: Session, flush_context):
+    touched = session.info.pop(_TOUCHED, None)
+    if touched:
+        refresh(session.connection(), touched)
+
+
+def install():
+    """Refresh rollups after every ORM flush that writes ProductAnalytics rows"""
+    global _installed
+    if not _installed:
+        event.listen(Session, "after_flush", _collect_touched)
+        event.listen(Session, "after_flush_postexec", _refresh_touched)
+        _installed = True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain product_analytics rollup tables")
+    parser.add_argument('command', choices=['backfill'])
+    parser.add_argument('--since', type=date.fromisoformat, help="only rebuild days from YYYY-MM-DD")
+    args = parser.parse_args()
+
+    from backend.core.database import Base, SessionLocal, engine
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        started = datetime.now()
+        backfill(db, args.since)
+        days = db.query(func.count(AnalyticsDaily.day)).scalar()
+        print(f"✅ Rollups rebuilt{' since ' + str(args.since) if args.since else ''}: "
+              f"{days} days in {(datetime.now() - started).total_seconds():.1f}s")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
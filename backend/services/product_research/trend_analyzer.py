@@ -1,25 +1,30 @@
 import httpx
 from bs4 import BeautifulSoup
-from typing import List, Dict
+from typing import List, Dict, Optional
 import asyncio
-from backend.core.redis import get_redis
+from backend.core.cache import cached
 import json
 
+# Platform name -> TrendAnalyzer method
+PLATFORM_ANALYZERS = {
+    "google_trends": "analyze_google_trends",
+    "tiktok": "analyze_tiktok_trends",
+    "instagram": "analyze_instagram_trends",
+    "amazon": "analyze_amazon_trends",
+    "ebay": "analyze_ebay_trends",
+    "reddit": "analyze_reddit_trends",
+}
+
+# Weights of the platforms that make up the combined trend score
+SCORE_WEIGHTS = {"google_trends": 0.25, "tiktok": 0.30, "instagram": 0.20, "amazon": 0.25}
+
 class TrendAnalyzer:
     """Analyze trends from various platforms"""
     
-    def __init__(self):
-        self.redis = get_redis()
-    
+    @cached("trends:google", ttl=3600, key=lambda self, keyword: keyword)
     async def analyze_google_trends(self, keyword: str) -> Dict:
         """Analyze Google Trends data for a keyword"""
         # In production, use pytrends library or Google Trends API
-        cache_key = f"trends:google:{keyword}"
-        cached = self.redis.get(cache_key)
-        
-        if cached:
-            return json.loads(cached)
-        
         # Simulated trend analysis
         result = {
             "keyword": keyword,
@@ -37,17 +42,11 @@ class TrendAnalyzer:
             }
         }
         
-        self.redis.setex(cache_key, 3600, json.dumps(result))
         return result
     
+    @cached("trends:tiktok", ttl=3600, key=lambda self, keyword: keyword)
     async def analyze_tiktok_trends(self, keyword: str) -> Dict:
         """Analyze TikTok trends for a keyword"""
-        cache_key = f"trends:tiktok:{keyword}"
-        cached = self.redis.get(cache_key)
-        
-        if cached:
-            return json.loads(cached)
-        
         # In production, scrape TikTok or use TikTok API
         result = {
             "keyword": keyword,
@@ -60,107 +59,118 @@ class TrendAnalyzer:
             "trending_hashtags": ["#" + keyword, "#tech", "#gadgets", "#musthave"]
         }
         
-        self.redis.setex(cache_key, 3600, json.dumps(result))
         return result
     
-    async def get_combined_trend_score(self, keyword: str) -> float:
-        """Get combined trend score from all platforms"""
-        google_data = await self.analyze_google_trends(keyword)
-        tiktok_data = await self.analyze_tiktok_trends(keyword)
-        instagram_data = await self.analyze_instagram_trends(keyword)
-        amazon_data = await self.analyze_amazon_trends(keyword)
-        
-        # Weighted average across all platforms
-        google_score = google_data.get("trend_score", 0) * 0.25
-        tiktok_score = tiktok_data.get("trend_score", 0) * 0.30
-        instagram_score = instagram_data.get("trend_score", 0) * 0.20
-        amazon_score = amazon_data.get("trend_score", 0) * 0.25
+    @cached("trends:instagram", ttl=3600, key=lambda self, keyword: keyword)
+    async def analyze_instagram_trends(self, keyword: str) -> Dict:
+        """Analyze Instagram hashtag activity for a keyword"""
+        # In production, use the Instagram Graph API hashtag search
+        result = {
+            "keyword": keyword,
+            "platform": "instagram",
+            "trend_score": 72.8,
+            "hashtag_posts": 540000,
+            "engagement_rate": 8.3,
+            "top_hashtags": ["#" + keyword.replace(" ", ""), "#musthave", "#gadgets"]
+        }
         
-        return round(google_score + tiktok_score + instagram_score + amazon_score, 2)
+        return result
     
-    async def get_all_platform_data(self, keyword: str) -> Dict:
-        """Get trend data from all platforms"""
-        import asyncio
-        platforms = await asyncio.gather(
-            self.analyze_google_trends(keyword),
-            self.analyze_tiktok_trends(keyword),
-            self.analyze_instagram_trends(keyword),
-            self.analyze_amazon_trends(keyword),
-            self.analyze_ebay_trends(keyword),
-            self.analyze_reddit_trends(keyword)
-        )
-        
-        combined_score = await self.get_combined_trend_score(keyword)
+    @cached("trends:amazon", ttl=3600, key=lambda self, keyword: keyword)
+    async def analyze_amazon_trends(self, keyword: str) -> Dict:
+        """Analyze Amazon best-seller demand for a keyword"""
+        # In production, scrape Amazon best sellers / movers & shakers
+        result = {
+            "keyword": keyword,
+            "platform": "amazon",
+            "trend_score": 80.1,
+            "best_seller_rank": 1250,
+            "avg_price": 34.99,
+            "avg_rating": 4.3,
+            "review_velocity": 120
+        }
         
-        return {
+        return result
+    
+    @cached("trends:ebay", ttl=3600, key=lambda self, keyword: keyword)
+    async def analyze_ebay_trends(self, keyword: str) -> Dict:
+        """Analyze eBay sold listings for a keyword"""
+        # In production, use the eBay Browse/Marketplace Insights API
+        result = {
             "keyword": keyword,
-            "combined_score": combined_score,
-            "platforms": {
-                "google_trends": platforms[0],
-                "tiktok": platforms[1],
-                "instagram": platforms[2],
-                "amazon": platforms[3],
-                "ebay": platforms[4],
-                "reddit": platforms[5]
-            },
-            "recommendation": self._get_recommendation(combined_score),
-            "market_insights": self._generate_market_insights(platforms)
+            "platform": "ebay",
+            "trend_score": 64.0,
+            "sold_last_30_days": 3200,
+            "avg_sold_price": 27.5,
+            "sell_through_rate": 61.2
         }
+        
+        return result
     
-    def _get_recommendation(self, score: float) -> str:
-        """Get recommendation based on combined score"""
-        if score >= 85:
-            return "🔥 HIGHLY RECOMMENDED - Extremely hot market, act fast!"
-        elif score >= 75:
-            return "✅ RECOMMENDED - Strong market demand, good opportunity"
-        elif score >= 65:
-            return "👍 GOOD - Decent market potential, worth testing"
-        elif score >= 50:
-            return "⚠️ MODERATE - Average opportunity, requires good execution"
-        else:
-            return "❌ RISKY - Low market interest, not recommended"
+    @cached("trends:reddit", ttl=3600, key=lambda self, keyword: keyword)
+    async def analyze_reddit_trends(self, keyword: str) -> Dict:
+        """Analyze Reddit discussion volume for a keyword"""
+        # In production, use the Reddit search API
+        result = {
+            "keyword": keyword,
+            "platform": "reddit",
+            "trend_score": 58.6,
+            "mentions_last_30_days": 870,
+            "sentiment": "positive",
+            "top_subreddits": ["r/gadgets", "r/BuyItForLife", "r/deals"]
+        }
+        
+        return result
     
-    def _generate_market_insights(self, platforms: list) -> Dict:
-        """Generate insights from all platform data"""
+    async def analyze_batch(self, keywords: List[str], platforms: Optional[List[str]] = None) -> Dict[str, Dict]:
+        """Platform data for many keywords - each (platform, keyword) pair computed once
+        
+        Returns {keyword: {platform: data}}. Every platform does one batched cache
+        lookup for all keywords, and the platforms run concurrently.
+        """
+        keywords = list(dict.fromkeys(k.strip() for k in keywords if k and k.strip()))
+        platforms = platforms or list(PLATFORM_ANALYZERS)
+        
+        async def run(platform: str) -> List[Dict]:
+            analyzer = getattr(TrendAnalyzer, PLATFORM_ANALYZERS[platform])
+            return await analyzer.many([(self, keyword) for keyword in keywords])
+        
+        per_platform = await asyncio.gather(*(run(platform) for platform in platforms))
         return {
-            "strongest_platform": max(platforms[:4], key=lambda x: x.get("trend_score", 0))["platform"],
-            "total_social_engagement": sum([p.get("engagement_rate", 0) for p in platforms[:2]]),
-            "market_maturity": "Growing" if platforms[3].get("trend_score", 0) > 75 else "Mature",
-            "competition_analysis": "Medium competition with room for differentiation"
+            keyword: {platform: results[i] for platform, results in zip(platforms, per_platform)}
+            for i, keyword in enumerate(keywords)
         }
-        instagram_score = instagram_data.get("trend_score", 0) * 0.20
-        amazon_score = amazon_data.get("trend_score", 0) * 0.25
-        
-        return round(google_score + tiktok_score + instagram_score + amazon_score, 2)
+    
+    async def get_combined_trend_score(self, keyword: str) -> float:
+        """Get combined trend score from all platforms"""
+        data = await self.analyze_batch([keyword], list(SCORE_WEIGHTS))
+        return self._combined_score(data[keyword])
     
     async def get_all_platform_data(self, keyword: str) -> Dict:
         """Get trend data from all platforms"""
-        platforms = await asyncio.gather(
-            self.analyze_google_trends(keyword),
-            self.analyze_tiktok_trends(keyword),
-            self.analyze_instagram_trends(keyword),
-            self.analyze_amazon_trends(keyword),
-            self.analyze_ebay_trends(keyword),
-            self.analyze_reddit_trends(keyword)
-        )
-        
-        combined_score = await self.get_combined_trend_score(keyword)
-        
+        return (await self.score_keywords([keyword]))[keyword.strip()]
+    
+    async def score_keywords(self, keywords: List[str]) -> Dict[str, Dict]:
+        """Full report (platforms, combined score, insights) for each keyword"""
+        batch = await self.analyze_batch(keywords)
+        return {keyword: self._report(keyword, platforms) for keyword, platforms in batch.items()}
+    
+    def _report(self, keyword: str, platforms: Dict[str, Dict]) -> Dict:
+        combined_score = self._combined_score(platforms)
         return {
             "keyword": keyword,
             "combined_score": combined_score,
-            "platforms": {
-                "google_trends": platforms[0],
-                "tiktok": platforms[1],
-                "instagram": platforms[2],
-                "amazon": platforms[3],
-                "ebay": platforms[4],
-                "reddit": platforms[5]
-            },
+            "platforms": platforms,
             "recommendation": self._get_recommendation(combined_score),
-            "market_insights": self._generate_market_insights(platforms)
+            "market_insights": self._generate_market_insights([platforms[p] for p in PLATFORM_ANALYZERS])
         }
     
+    @staticmethod
+    def _combined_score(platforms: Dict[str, Dict]) -> float:
+        """Weighted average across the scoring platforms"""
+        score = sum(platforms[p].get("trend_score", 0) * weight for p, weight in SCORE_WEIGHTS.items())
+        return round(score, 2)
+    
     def _get_recommendation(self, score: float) -> str:
         """Get recommendation based on combined score"""
         if score >= 85:
@@ -184,9 +194,6 @@ class TrendAnalyzer:
         }
 
 
-import asyncio
-
-
 class CompetitorAnalyzer:
     """Analyze competitor products and pricing"""
     
@@ -292,9 +299,19 @@ class NicheValidator:
         self.trend_analyzer = TrendAnalyzer()
         self.competitor_analyzer = CompetitorAnalyzer()
     
-    async def validate_niche(self, niche: str) -> Dict:
-        """Comprehensive niche validation"""
-        trend_score = await self.trend_analyzer.get_combined_trend_score(niche)
+    async def validate_niches(self, niches: List[str], reports: Optional[Dict[str, Dict]] = None) -> Dict[str, Dict]:
+        """Validate many niches, reusing trend reports from TrendAnalyzer.score_keywords"""
+        if reports is None:
+            reports = await self.trend_analyzer.score_keywords(niches)
+        results = await asyncio.gather(*(
+            self.validate_niche(niche, report["combined_score"]) for niche, report in reports.items()
+        ))
+        return dict(zip(reports, results))
+    
+    async def validate_niche(self, niche: str, trend_score: Optional[float] = None) -> Dict:
+        """Comprehensive niche validation (pass trend_score to skip re-scoring)"""
+        if trend_score is None:
+            trend_score = await self.trend_analyzer.get_combined_trend_score(niche)
         pricing_data = await self.competitor_analyzer.analyze_pricing_strategy(niche)
         
         # Calculate viability score
@@ -0,0 +1,249 @@
+"""
+Price history store - compact, downsampled supplier price series in Redis
+
+Each product's series lives in fixed-width binary segments, so writes are
+in-place APPEND/SETRANGE calls and reads decode straight into NumPy arrays:
+
+    prices:{id}:raw:{day}      every observation (ts, cents) - 8 bytes, expires after RAW_DAYS
+    prices:{id}:hour:{YYYYMM}  hourly (ts, low, high, close) - 16 bytes, expires after HOURLY_DAYS
+    prices:{id}:day            daily (ts, low, high, close) - 16 bytes, kept
+    prices:latest              hash id -> "cents:ts:previous_cents" for O(1) latest-price reads
+
+All tiers are updated by one Lua script per batch as observations arrive, so
+there is no compaction job; retention is plain key expiry.
+
+Migrating the old price_history:{id} ZSETs (run once after upgrading):
+    python -m backend.services.supplier_management.price_history import-legacy
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from backend.core.redis import close_async_redis, get_async_redis, get_async_redis_binary
+
+RAW_DAYS = 7
+HOURLY_DAYS = 90
+DAY = 86400
+
+# Products per script call; several calls go out in one pipeline
+BATCH_PRODUCTS = 1000
+
+LATEST_KEY = "prices:latest"
+
+RAW_DTYPE = np.dtype([("ts", "<u4"), ("cents", "<i4")])
+BUCKET_DTYPE = np.dtype([("ts", "<u4"), ("low", "<i4"), ("high", "<i4"), ("close", "<i4")])
+
+# KEYS[1] = latest hash, then (raw, hour, day) per observation.
+# ARGV = (product_id, ts, cents, raw_expire_at, hour_expire_at) per observation.
+RECORD_SCRIPT = """
+local function fold(key, bucket, cents)
+    local len = redis.call('STRLEN', key)
+    if len >= 16 then
+        local t, low, high = struct.unpack('<I4i4i4', redis.call('GETRANGE', key, len - 16, len - 5))
+        if t == bucket then
+            redis.call('SETRANGE', key, len - 16,
+                struct.pack('<I4i4i4i4', t, math.min(low, cents), math.max(high, cents), cents))
+            return
+        elseif t > bucket then
+            return  -- late observation for a closed bucket: kept in raw only
+        end
+    end
+    redis.call('APPEND', key, struct.pack('<I4i4i4i4', bucket, cents, cents, cents))
+end
+
+for i = 0, (#KEYS - 1) / 3 - 1 do
+    local raw, hour, day = KEYS[i * 3 + 2], KEYS[i * 3 + 3], KEYS[i * 3 + 4]
+    local pid, ts, cents = ARGV[i * 5 + 1], tonumber(ARGV[i * 5 + 2]), tonumber(ARGV[i * 5 + 3])
+
+    redis.call('APPEND', raw, struct.pack('<I4i4', ts, cents))
+    redis.call('EXPIREAT', raw, ARGV[i * 5 + 4])
+    fold(hour, ts - ts % 3600, cents)
+    redis.call('EXPIREAT', hour, ARGV[i * 5 + 5])
+    fold(day, ts - ts % 86400, cents)
+
+    local latest = redis.call('HGET', KEYS[1], pid)
+    if not latest then
+        redis.call('HSET', KEYS[1], pid, cents .. ':' .. ts .. ':' .. cents)
+    else
+        local last_cents, last_ts = string.match(latest, '^(-?%d+):(%d+)')
+        if ts >= tonumber(last_ts) then
+            redis.call('HSET', KEYS[1], pid, cents .. ':' .. ts .. ':' .. last_cents)
+        end
+    end
+end
+return #KEYS - 1
+"""
+
+
+def _raw_key(product_id: str, ts: int) -> str:
+    return f"prices:{product_id}:raw:{ts // DAY}"
+
+
+def _month(ts: int) -> Tuple[int, int]:
+    moment = datetime.fromtimestamp(ts, timezone.utc)
+    return moment.year, moment.month
+
+
+def _hour_key(product_id: str, ts: int) -> str:
+    year, month = _month(ts)
+    return f"prices:{product_id}:hour:{year}{month:02d}"
+
+
+def _month_end(ts: int) -> int:
+    year, month = _month(ts)
+    year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return int(datetime(year, month, 1, tzinfo=timezone.utc).timestamp())
+
+
+def _cents(price: float) -> int:
+    return int(round(price * 100))
+
+
+def parse_latest(value) -> Optional[Dict]:
+    """'cents:ts:previous_cents' -> {price, timestamp, previous_price}"""
+    if not value:
+        return None
+    cents, ts, previous = (int(part) for part in (value.decode() if isinstance(value, bytes) else value).split(":"))
+    return {"price": cents / 100, "timestamp": ts, "previous_price": previous / 100}
+
+
+class PriceHistoryStore:
+    """Raw/hourly/daily price series per product plus a latest-price index"""
+
+    def __init__(self):
+        self.redis = get_async_redis()
+        self.binary = get_async_redis_binary()
+        self._script = None
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    async def record(self, product_id: str, price: float, timestamp: Optional[int] = None):
+        await self.record_many([(product_id, price, timestamp)])
+
+    async def record_many(self, observations: Iterable[Tuple[str, float, Optional[int]]]) -> int:
+        """Ingest (product_id, price, timestamp or None) tuples - one pipeline of batched script calls"""
+        if self._script is None:
+            self._script = self.redis.register_script(RECORD_SCRIPT)
+        now = int(time.time())
+        keys, args, count = [LATEST_KEY], [], 0
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for product_id, price, ts in observations:
+                ts = int(ts or now)
+                keys += [_raw_key(product_id, ts), _hour_key(product_id, ts), f"prices:{product_id}:day"]
+                args += [product_id, ts, _cents(price), ts - ts % DAY + (RAW_DAYS + 1) * DAY,
+                         _month_end(ts) + HOURLY_DAYS * DAY]
+                count += 1
+                if count % BATCH_PRODUCTS == 0:
+                    await self._script(keys=keys, args=args, client=pipe)
+                    keys, args = [LATEST_KEY], []
+            if args:
+                await self._script(keys=keys, args=args, client=pipe)
+            await pipe.execute()
+        return count
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    async def latest(self, product_id: str) -> Optional[Dict]:
+        """Latest and previous price in one HGET"""
+        return parse_latest(await self.redis.hget(LATEST_KEY, product_id))
+
+    async def latest_many(self, product_ids: List[str]) -> List[Optional[Dict]]:
+        if not product_ids:
+            return []
+        return [parse_latest(value) for value in await self.redis.hmget(LATEST_KEY, product_ids)]
+
+    async def scan_latest(self, cursor: int = 0, count: int = 5000) -> Tuple[int, Dict[str, str]]:
+        """One HSCAN step over the latest-price index -> (next cursor, {id: raw value})"""
+        return await self.redis.hscan(LATEST_KEY, cursor, count=count)
+
+    async def history(self, product_id: str, since: Optional[int] = None) -> List[Dict]:
+        """Series from since (default: everything) - raw points for the last RAW_DAYS days,
+        hourly buckets back to HOURLY_DAYS, daily buckets before that"""
+        now = int(time.time())
+        since = since or 0
+        # Tier boundaries fall on bucket edges so no span is counted twice
+        raw_from = now - RAW_DAYS * DAY
+        raw_from -= raw_from % 3600
+        hour_from = now - HOURLY_DAYS * DAY
+        hour_from -= hour_from % DAY
+
+        raw_keys = [f"prices:{product_id}:raw:{day}" for day in range(max(since, raw_from) // DAY, now // DAY + 1)]
+        hour_keys = []
+        if since < raw_from:
+            ts = max(since, hour_from)
+            while ts < raw_from:
+                hour_keys.append(_hour_key(product_id, ts))
+                ts = _month_end(ts)
+        day_keys = [f"prices:{product_id}:day"] if since < hour_from else []
+
+        async with self.binary.pipeline(transaction=False) as pipe:
+            for key in day_keys + hour_keys + raw_keys:
+                pipe.get(key)
+            values = await pipe.execute()
+        daily = self._buckets(values[:len(day_keys)])
+        hourly = self._buckets(values[len(day_keys):len(day_keys) + len(hour_keys)])
+        raw = np.concatenate([np.frombuffer(v, RAW_DTYPE) for v in values[len(day_keys) + len(hour_keys):] if v]
+                             or [np.empty(0, RAW_DTYPE)])
+
+        history = []
+        tiers = ((daily, since - since % DAY, hour_from, "day"),
+                 (hourly, max(since - since % 3600, hour_from), raw_from, "hour"))
+        for buckets, lo, hi, resolution in tiers:
+            buckets = buckets[(buckets["ts"] >= lo) & (buckets["ts"] < hi)]
+            for ts, low, high, close in np.sort(buckets, order="ts").tolist():
+                history.append({"price": close / 100, "timestamp": ts, "low": low / 100, "high": high / 100,
+                                "resolution": resolution})
+        raw = np.sort(raw[raw["ts"] >= max(since, raw_from)], order="ts", kind="stable")
+        history.extend({"price": cents / 100, "timestamp": ts, "resolution": "raw"} for ts, cents in raw.tolist())
+        return history
+
+    @staticmethod
+    def _buckets(values: List[Optional[bytes]]) -> np.ndarray:
+        return np.concatenate([np.frombuffer(v, BUCKET_DTYPE) for v in values if v] or [np.empty(0, BUCKET_DTYPE)])
+
+    # ------------------------------------------------------------------
+    # Migration from the old one-ZSET-per-product layout
+    # ------------------------------------------------------------------
+
+    async def import_legacy(self) -> int:
+        """Move every price_history:{id} ZSET ("price:ts" members) into the store, oldest first"""
+        imported = 0
+        async for key in self.redis.scan_iter(match="price_history:*", count=1000):
+            product_id = key.split(":", 1)[1]
+            members = await self.redis.zrange(key, 0, -1)
+            points = []
+            for member in members:
+                price, ts = member.split(":")
+                points.append((product_id, float(price), int(ts)))
+            imported += await self.record_many(points)
+            await self.redis.delete(key)
+        return imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the supplier price history store")
+    parser.add_argument('command', choices=['import-legacy'])
+    parser.parse_args()
+
+    async def run():
+        try:
+            started = time.monotonic()
+            imported = await PriceHistoryStore().import_legacy()
+            print(f"✅ Imported {imported} legacy price points in {time.monotonic() - started:.1f}s")
+        finally:
+            await close_async_redis()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
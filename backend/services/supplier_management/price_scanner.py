@@ -0,0 +1,219 @@
+"""
+Price scanner - catalog-wide supplier price-drop and margin-erosion checks
+
+Every run walks the latest-price index in HSCAN batches and, per batch,
+computes drop percentages and resale margins for all products at once with
+NumPy. A tracked product's latest supplier price is its current cost; the
+campaign's stored cost and suggested_resale_price give the margin it was
+priced at. Campaigns without a tracked price are checked on their stored
+cost. Alerts are written with SET NX, so a product crossing a threshold
+raises one alert per alert_ttl instead of one per run.
+
+Runs stay inside time_budget seconds; a scan that doesn't finish resumes from
+its HSCAN cursor on the next run.
+"""
+
+import json
+import time
+import asyncio
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from redis.exceptions import RedisError
+
+from backend.core.redis import get_async_redis
+from backend.services.supplier_management.price_history import PriceHistoryStore
+from catalog_store import CatalogStore, catalog_store
+from scaling_config import SCALING_CONFIG
+
+# Alerts returned in a run report (all of them are written to Redis)
+REPORT_ALERTS = 100
+
+
+def campaign_pricing(campaign: Dict) -> Optional[Tuple[str, float, float]]:
+    """(tracked product id, resale price, stored cost) for a campaign, if it has them"""
+    product = campaign.get("product", campaign)     # old format nests the product
+    product_id = campaign.get("asin") or product.get("asin") or product.get("product_id")
+    try:
+        resale = float(product.get("suggested_resale_price") or product.get("retail_price") or 0)
+        cost = float(product.get("cost") or 0)
+    except (TypeError, ValueError):
+        return None
+    if not product_id or resale <= 0:
+        return None
+    return str(product_id), resale, cost
+
+
+class PriceScanner:
+    """Scheduled scan over every tracked product and campaign"""
+
+    def __init__(self, store: Optional[PriceHistoryStore] = None, catalog: Optional[CatalogStore] = None,
+                 config: Optional[Dict] = None):
+        self.config = config or SCALING_CONFIG["background_tasks"]["price_scanning"]
+        self.store = store or PriceHistoryStore()
+        self.catalog = catalog or catalog_store
+        self.redis = get_async_redis()
+        self._cursor = 0            # HSCAN position when the last run ran out of time
+        self._tracked = set()       # ids seen so far in the current pass over the index
+        self._task = None
+        self._lock = asyncio.Lock()
+        self.runs = deque(maxlen=20)
+
+    # ------------------------------------------------------------------
+    # One run
+    # ------------------------------------------------------------------
+
+    async def scan(self) -> Dict:
+        """Scan until the index is exhausted or the time budget is spent"""
+        async with self._lock:
+            started = time.monotonic()
+            deadline = started + self.config["time_budget"]
+            index = await asyncio.to_thread(self._campaign_index)
+            report = {"started_at": int(time.time()), "resumed": self._cursor != 0, "tracked_scanned": 0,
+                      "campaigns_checked": 0, "price_drops": 0, "margin_alerts": 0, "alerts_emitted": 0,
+                      "complete": False, "alerts": []}
+
+            cursor = self._cursor
+            if cursor == 0:
+                self._tracked = set()
+            while True:
+                cursor, batch = await self.store.scan_latest(cursor, self.config["batch_size"])
+                if batch:
+                    self._tracked.update(batch)
+                    alerts = self._check_tracked(batch, index)
+                    report["tracked_scanned"] += len(batch)
+                    await self._emit(alerts, report)
+                if cursor == 0:
+                    break
+                if time.monotonic() >= deadline:
+                    break
+            self._cursor = cursor
+
+            if cursor == 0:
+                # Campaigns whose supplier price isn't tracked - judged on their stored cost
+                untracked = {pid: row for pid, row in index.items() if pid not in self._tracked}
+                await self._emit(self._check_untracked(untracked), report)
+                self._tracked = set()
+                report["campaigns_checked"] = len(index)
+                report["complete"] = True
+
+            duration = time.monotonic() - started
+            report["duration_seconds"] = round(duration, 3)
+            report["products_per_second"] = round(report["tracked_scanned"] / duration) if duration > 0 else 0
+            self.runs.appendleft(report)
+            print(f"🔎 Price scan: {report['tracked_scanned']} tracked products in {duration:.1f}s "
+                  f"({report['products_per_second']}/s), {report['alerts_emitted']} new alerts"
+                  f"{'' if report['complete'] else ' - resuming next run'}")
+            return report
+
+    def _campaign_index(self) -> Dict[str, Tuple[float, float, str]]:
+        """tracked product id -> (resale price, stored cost, campaign filename)"""
+        index = {}
+        for filename, campaign in self.catalog.items():
+            pricing = campaign_pricing(campaign)
+            if pricing:
+                product_id, resale, cost = pricing
+                index[product_id] = (resale, cost, filename)
+        return index
+
+    def _check_tracked(self, batch: Dict[str, str], index: Dict) -> List[Dict]:
+        """Vectorized drop and margin checks for one HSCAN batch"""
+        ids = list(batch)
+        latest = np.array(":".join(batch[pid] for pid in ids).split(":"), dtype=np.int64).reshape(-1, 3)
+        price, previous = latest[:, 0] / 100, latest[:, 2] / 100
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            drop = np.where(previous > 0, (previous - price) / previous * 100, 0.0)
+
+        rows = [index.get(pid) for pid in ids]
+        resale = np.array([row[0] if row else np.nan for row in rows])
+        stored_cost = np.array([row[1] if row else np.nan for row in rows])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            margin = (resale - price) / resale * 100
+            erosion = (resale - stored_cost) / resale * 100 - margin
+
+        drops = drop >= self.config["drop_percent"]
+        eroded = (margin < self.config["min_margin_percent"]) | (erosion >= self.config["margin_erosion_points"])
+        eroded &= ~np.isnan(resale)
+
+        alerts = []
+        now = int(time.time())
+        for i in np.flatnonzero(drops).tolist():
+            alerts.append({"type": "price_drop", "product_id": ids[i], "previous_price": float(previous[i]),
+                           "current_price": float(price[i]), "drop_percent": round(float(drop[i]), 2),
+                           "timestamp": now})
+        for i in np.flatnonzero(eroded).tolist():
+            alerts.append(self._margin_alert(ids[i], rows[i], float(price[i]), float(margin[i]),
+                                             float(erosion[i]), now))
+        return alerts
+
+    def _check_untracked(self, index: Dict) -> List[Dict]:
+        if not index:
+            return []
+        ids = list(index)
+        resale = np.array([index[pid][0] for pid in ids])
+        cost = np.array([index[pid][1] for pid in ids])
+        margin = (resale - cost) / resale * 100
+        now = int(time.time())
+        return [self._margin_alert(ids[i], index[ids[i]], float(cost[i]), float(margin[i]), 0.0, now)
+                for i in np.flatnonzero(margin < self.config["min_margin_percent"]).tolist()]
+
+    @staticmethod
+    def _margin_alert(product_id: str, row: Tuple, cost: float, margin: float, erosion: float, now: int) -> Dict:
+        resale, stored_cost, filename = row
+        return {"type": "margin_erosion", "product_id": product_id, "campaign": filename,
+                "suggested_resale_price": resale, "stored_cost": stored_cost, "current_cost": cost,
+                "margin_percent": round(margin, 2), "erosion_points": round(erosion, 2), "timestamp": now}
+
+    async def _emit(self, alerts: List[Dict], report: Dict):
+        """SET NX each alert in one pipeline; only newly raised ones count"""
+        if not alerts:
+            return
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for alert in alerts:
+                pipe.set(f"alerts:{alert['type']}:{alert['product_id']}", json.dumps(alert),
+                         ex=self.config["alert_ttl"], nx=True)
+            created = await pipe.execute()
+        for alert, new in zip(alerts, created):
+            report["price_drops" if alert["type"] == "price_drop" else "margin_alerts"] += 1
+            if new:
+                report["alerts_emitted"] += 1
+                if len(report["alerts"]) < REPORT_ALERTS:
+                    report["alerts"].append(alert)
+
+    # ------------------------------------------------------------------
+    # Schedule
+    # ------------------------------------------------------------------
+
+    async def start(self):
+        if self.config.get("enabled", True) and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                report = await self.scan()
+            except (RedisError, OSError) as e:
+                print(f"⚠️ Price scan failed: {e}")
+                report = None
+            # An unfinished scan picks up again right away; a finished one waits for the next interval
+            await asyncio.sleep(1 if report and not report["complete"] else self.config["interval"])
+
+    def status(self) -> Dict:
+        return {
+            "running": self._task is not None,
+            "scanning": self._lock.locked(),
+            "resume_cursor": self._cursor,
+            "runs": [{k: v for k, v in run.items() if k != "alerts"} for run in self.runs],
+        }
+
+
+# Global scanner shared by the API server
+price_scanner = PriceScanner()
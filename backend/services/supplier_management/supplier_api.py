@@ -1,11 +1,33 @@
 import httpx
 from typing import List, Dict, Optional
 from backend.core.config import settings
-from backend.core.redis import get_redis
+from backend.core.redis import get_async_redis
+from backend.core.cache import cached
+from backend.services.supplier_management.price_history import PriceHistoryStore
 import json
-from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeout
+import time
+from playwright.async_api import TimeoutError as PlaywrightTimeout
 import asyncio
 import re
+from browser_pool import browser_pool, extract_cards, wait_for_any
+
+# Search result cards - several layouts, since AliExpress changes frequently
+SEARCH_CARD_SELECTORS = [
+    'div[class*="product-item"]',
+    'div[class*="list-item"]',
+    'a[class*="search-card-item"]',
+    'div.list--gallery--C2f2tvm'
+]
+
+# Fields read from each card in one page.evaluate (see browser_pool.extract_cards)
+SEARCH_CARD_FIELDS = {
+    "title": ('h1, h3, [class*="title"]', None),
+    "price": ('[class*="price"], [class*="Price"]', None),
+    "rating": ('[class*="rating"], [class*="star"]', None),
+    "orders": ('[class*="sold"], [class*="order"]', None),
+    "url": ('a', ['href']),
+    "image": ('img', ['src', 'data-src']),
+}
 
 class AliExpressAPI:
     """Interface for AliExpress - Web Scraping Implementation"""
@@ -13,126 +35,67 @@ class AliExpressAPI:
     def __init__(self):
         self.api_key = settings.ALIEXPRESS_API_KEY
         self.api_secret = settings.ALIEXPRESS_API_SECRET
-        self.redis = get_redis()
         self.base_url = "https://www.aliexpress.com"
     
+    @cached("aliexpress:search", ttl=1800,
+            key=lambda self, keyword, page=1, page_size=20: f"{keyword}:{page}:{page_size}")
     async def search_products(self, keyword: str, page: int = 1, page_size: int = 20) -> List[Dict]:
         """Search for products on AliExpress using web scraping"""
-        cache_key = f"aliexpress:search:{keyword}:{page}"
-        cached = self.redis.get(cache_key)
-        
-        if cached:
-            return json.loads(cached)
-        
         try:
             # Try real scraping first
             products = await self._scrape_search_results(keyword, page, page_size)
             if products:
-                self.redis.setex(cache_key, 1800, json.dumps(products))
                 return products
         except Exception as e:
             print(f"Scraping failed: {e}, falling back to simulated data")
         
         # Fallback to simulated data if scraping fails
-        products = self._generate_simulated_products(keyword, page_size)
-        self.redis.setex(cache_key, 1800, json.dumps(products))
-        return products
+        return self._generate_simulated_products(keyword, page_size)
     
     async def _scrape_search_results(self, keyword: str, page: int, limit: int) -> List[Dict]:
-        """Scrape AliExpress search results using Playwright"""
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(
-                headless=True,
-                args=['--no-sandbox', '--disable-setuid-sandbox']
-            )
-            
-            context = await browser.new_context(
-                user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            )
-            
-            page_obj = await context.new_page()
-            
+        """Scrape AliExpress search results using a page leased from the shared browser pool"""
+        async with browser_pool.page() as page_obj:
             try:
                 # Search URL
                 search_url = f"{self.base_url}/w/wholesale-{keyword.replace(' ', '-')}.html"
                 print(f"Scraping: {search_url}")
                 
-                await page_obj.goto(search_url, timeout=30000)
-                await page_obj.wait_for_timeout(3000)  # Wait for dynamic content
+                # Ready as soon as the result grid is in the DOM - no fixed sleep
+                await page_obj.goto(search_url, wait_until='domcontentloaded', timeout=30000)
+                await wait_for_any(page_obj, SEARCH_CARD_SELECTORS)
                 
-                products = []
-                
-                # Try multiple selectors (AliExpress changes frequently)
-                product_selectors = [
-                    'div[class*="product-item"]',
-                    'div[class*="list-item"]',
-                    'a[class*="search-card-item"]',
-                    'div.list--gallery--C2f2tvm'
-                ]
-                
-                product_elements = None
-                for selector in product_selectors:
-                    try:
-                        product_elements = await page_obj.query_selector_all(selector)
-                        if product_elements and len(product_elements) > 0:
-                            print(f"Found {len(product_elements)} products with selector: {selector}")
-                            break
-                    except:
-                        continue
-                
-                if not product_elements:
+                # Every card's fields in one round trip
+                selector, cards = await extract_cards(page_obj, SEARCH_CARD_SELECTORS, SEARCH_CARD_FIELDS, limit)
+                if not cards:
                     raise Exception("No products found with any selector")
+                print(f"Found {len(cards)} products with selector: {selector}")
                 
-                for idx, element in enumerate(product_elements[:limit]):
-                    try:
-                        product_data = await self._extract_product_data(element, idx)
-                        if product_data:
-                            products.append(product_data)
-                    except Exception as e:
-                        print(f"Error extracting product {idx}: {e}")
-                        continue
-                
-                await browser.close()
+                products = []
+                for idx, card in enumerate(cards):
+                    product_data = self._extract_product_data(card, idx)
+                    if product_data:
+                        products.append(product_data)
                 return products
                 
             except Exception as e:
                 print(f"Scraping error: {e}")
-                await browser.close()
                 raise
     
-    async def _extract_product_data(self, element, idx: int) -> Optional[Dict]:
-        """Extract product data from a DOM element"""
+    def _extract_product_data(self, card: Dict, idx: int) -> Optional[Dict]:
+        """Build a product from one card's raw fields (SEARCH_CARD_FIELDS)"""
         try:
-            # Extract title
-            title_elem = await element.query_selector('h1, h3, [class*="title"]')
-            title = await title_elem.inner_text() if title_elem else f"Product {idx + 1}"
-            
-            # Extract price
-            price_elem = await element.query_selector('[class*="price"], [class*="Price"]')
-            price_text = await price_elem.inner_text() if price_elem else "9.99"
-            price = self._extract_price(price_text)
-            
-            # Extract rating
-            rating_elem = await element.query_selector('[class*="rating"], [class*="star"]')
-            rating_text = await rating_elem.inner_text() if rating_elem else "4.5"
-            rating = self._extract_rating(rating_text)
-            
-            # Extract orders
-            orders_elem = await element.query_selector('[class*="sold"], [class*="order"]')
-            orders_text = await orders_elem.inner_text() if orders_elem else "1000"
-            orders = self._extract_number(orders_text)
+            title = card.get("title") or f"Product {idx + 1}"
+            price = self._extract_price(card.get("price") or "9.99")
+            rating = self._extract_rating(card.get("rating") or "4.5")
+            orders = self._extract_number(card.get("orders") or "1000")
             
-            # Extract URL
-            link_elem = await element.query_selector('a')
-            url = await link_elem.get_attribute('href') if link_elem else ""
-            if url and not url.startswith('http'):
+            url = card.get("url") or ""
+            if url.startswith('//'):
+                url = 'https:' + url
+            elif url and not url.startswith('http'):
                 url = self.base_url + url
             
-            # Extract image
-            img_elem = await element.query_selector('img')
-            image_url = await img_elem.get_attribute('src') if img_elem else ""
-            if not image_url:
-                image_url = await img_elem.get_attribute('data-src') if img_elem else ""
+            image_url = card.get("image") or ""
             
             # Extract product ID from URL
             product_id = self._extract_product_id(url) or f"AE{1000000 + idx}"
@@ -232,14 +195,9 @@ class AliExpressAPI:
             })
         return products
     
+    @cached("aliexpress:product", ttl=3600, key=lambda self, product_id: product_id)
     async def get_product_details(self, product_id: str) -> Dict:
         """Get detailed information about a product"""
-        cache_key = f"aliexpress:product:{product_id}"
-        cached = self.redis.get(cache_key)
-        
-        if cached:
-            return json.loads(cached)
-        
         # Simulated product details
         details = {
             "product_id": product_id,
@@ -264,7 +222,6 @@ class AliExpressAPI:
             }
         }
         
-        self.redis.setex(cache_key, 3600, json.dumps(details))
         return details
 
 
@@ -305,45 +262,36 @@ class PriceMonitor:
     """Monitor and track price changes"""
     
     def __init__(self):
-        self.redis = get_redis()
+        self.store = PriceHistoryStore()
     
     async def track_price(self, product_id: str, current_price: float):
         """Track price history for a product"""
-        key = f"price_history:{product_id}"
-        
-        # Store price with timestamp
-        import time
-        timestamp = int(time.time())
-        self.redis.zadd(key, {f"{current_price}:{timestamp}": timestamp})
-        
-        # Keep only last 90 days
-        cutoff = timestamp - (90 * 24 * 60 * 60)
-        self.redis.zremrangebyscore(key, 0, cutoff)
+        await self.store.record(product_id, current_price)
     
-    async def get_price_history(self, product_id: str) -> List[Dict]:
-        """Get price history for a product"""
-        key = f"price_history:{product_id}"
-        data = self.redis.zrange(key, 0, -1, withscores=True)
-        
-        history = []
-        for item, timestamp in data:
-            price, _ = item.split(":")
-            history.append({
-                "price": float(price),
-                "timestamp": int(timestamp)
-            })
-        
-        return history
+    async def track_prices(self, prices: Dict[str, float]) -> int:
+        """Track many products at once (batched script calls in one pipeline)"""
+        return await self.store.record_many((product_id, price, None) for product_id, price in prices.items())
+    
+    async def get_latest_price(self, product_id: str) -> Optional[Dict]:
+        """Latest and previous observed price"""
+        return await self.store.latest(product_id)
+    
+    async def get_price_history(self, product_id: str, since: Optional[int] = None) -> List[Dict]:
+        """Get price history for a product (raw last 7 days, hourly to 90 days, daily before)"""
+        return await self.store.history(product_id, since)
     
     async def check_price_drop(self, product_id: str, threshold_percent: float = 10) -> Optional[Dict]:
         """Check if price has dropped significantly"""
-        history = await self.get_price_history(product_id)
+        latest = await self.store.latest(product_id)
         
-        if len(history) < 2:
+        if latest is None:
             return None
         
-        latest_price = history[-1]["price"]
-        previous_price = history[-2]["price"]
+        latest_price = latest["price"]
+        previous_price = latest["previous_price"]
+        
+        if previous_price <= 0:
+            return None
         
         drop_percent = ((previous_price - latest_price) / previous_price) * 100
         
@@ -363,7 +311,7 @@ class InventorySync:
     """Sync inventory across platforms"""
     
     def __init__(self):
-        self.redis = get_redis()
+        self.redis = get_async_redis()
     
     async def sync_inventory(self, product_id: str, platform: str, quantity: int):
         """Update inventory for a product on a specific platform"""
@@ -375,14 +323,17 @@ class InventorySync:
             "platform": platform
         }
         
-        self.redis.setex(key, 3600, json.dumps(inventory_data))
-        
-        # Check if low stock alert needed
-        if quantity < 10:
-            await self._create_low_stock_alert(product_id, platform, quantity)
+        # Inventory update and low stock alert go out in one round trip
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.setex(key, 3600, json.dumps(inventory_data))
+            
+            # Check if low stock alert needed
+            if quantity < 10:
+                self._create_low_stock_alert(pipe, product_id, platform, quantity)
+            await pipe.execute()
     
-    async def _create_low_stock_alert(self, product_id: str, platform: str, quantity: int):
-        """Create alert for low stock"""
+    def _create_low_stock_alert(self, pipe, product_id: str, platform: str, quantity: int):
+        """Queue alert for low stock on the caller's pipeline"""
         alert_key = f"alerts:low_stock:{product_id}"
         alert = {
             "product_id": product_id,
@@ -391,23 +342,18 @@ class InventorySync:
             "type": "low_stock",
             "timestamp": int(time.time())
         }
-        self.redis.setex(alert_key, 86400, json.dumps(alert))
+        pipe.setex(alert_key, 86400, json.dumps(alert))
     
     async def get_inventory_status(self, product_id: str) -> Dict:
         """Get inventory status across all platforms"""
         platforms = ["shopify", "woocommerce", "aliexpress"]
         status = {}
         
-        for platform in platforms:
-            key = f"inventory:{product_id}:{platform}"
-            data = self.redis.get(key)
-            
+        keys = [f"inventory:{product_id}:{platform}" for platform in platforms]
+        for platform, data in zip(platforms, await self.redis.mget(keys)):
             if data:
                 status[platform] = json.loads(data)
             else:
                 status[platform] = {"quantity": 0, "status": "unknown"}
         
         return status
-
-
-import time
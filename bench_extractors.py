@@ -0,0 +1,174 @@
+"""
+Amazon Extractor Benchmark
+
+Times every available extractor (amazon_extractors.EXTRACTORS) over a corpus
+of saved product pages and checks that each one agrees with the reference
+BeautifulSoup extractor.
+
+Usage:
+    python bench_extractors.py [corpus_dir] [--repeat N]
+    python bench_extractors.py scrape_corpus --fetch B08N5WRWNW B07FZ8S74R   # save live pages first
+    python bench_extractors.py scrape_corpus --synthetic 20                  # generate test pages
+"""
+
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+import statistics
+
+from amazon_extractors import EXTRACTORS, SoupExtractor
+
+DEFAULT_CORPUS = "scrape_corpus"
+
+
+async def fetch_pages(corpus_dir: str, asins: list):
+    """Save live product pages into the corpus via the shared scrape engine"""
+    from scrape_engine import scrape_engine
+
+    async def save(asin: str):
+        try:
+            response = await scrape_engine.fetch(f"https://www.amazon.com/dp/{asin}")
+        except Exception as e:
+            print(f"  ❌ {asin}: {e}")
+            return
+        if response.status_code != 200:
+            print(f"  ❌ {asin}: HTTP {response.status_code}")
+            return
+        with open(os.path.join(corpus_dir, f"{asin}.html"), 'wb') as f:
+            f.write(response.content)
+        print(f"  ✅ {asin}: {len(response.content) / 1024:.0f} KB")
+
+    try:
+        await asyncio.gather(*(save(asin) for asin in asins))
+    finally:
+        await scrape_engine.aclose()
+
+
+def synthetic_page(n: int, rng: random.Random) -> bytes:
+    """A product page shaped like Amazon's (~1.5 MB of markup and inline scripts)"""
+    layout = n % 4
+    title = f"Wireless Gadget Model {n} with Extra Long Battery &amp; Fast Charging"
+    whole, cents = rng.randint(9, 1299), rng.randint(0, 99)
+    filler = ''.join(
+        f'<div class="a-section a-spacing-small filler-{i}"><span class="a-size-base">Item {i}</span>'
+        f'<a href="/dp/B0{rng.randint(10**7, 10**8 - 1)}">link</a></div>\n'
+        for i in range(6000)
+    )
+    script_noise = '<script>var P = {"data": "' + 'x' * 200_000 + '"};</script>\n'
+    images = [f"https://m.media-amazon.com/images/I/{n}{k}abcdef._AC_SL1500_.jpg" for k in range(7)]
+    color_images = ('<script type="text/javascript">P.when("A").register("ImageBlockATF", function(A){'
+                    'var data = {"colorImages": {"initial": [' +
+                    ','.join(f'{{"hiRes":"{u}","large":"{u}"}}' for u in images) +
+                    ']}}; return data; });</script>\n')
+    bullets = ''.join(f'<li><span class="a-list-item"> Feature number {k} of this product is really useful and durable </span></li>'
+                      for k in range(6))
+    bullets = ('<div id="feature-bullets" class="a-section"><div class="a-row"><ul class="a-unordered-list">'
+               '<li><span class="a-list-item">Make sure this fits by entering your model number.</span></li>'
+               f'{bullets}</ul></div></div>')
+
+    if layout == 2:
+        # No productTitle span - title lives in a nested h1
+        title_html = f'<h1 id="title" class="a-size-large"><span class="a-text-bold">{title}</span></h1>'
+    else:
+        title_html = f'<span id="productTitle" class="a-size-large product-title-word-break">   {title}   </span>'
+    price_html = (f'<span class="a-price aok-align-center"><span class="a-offscreen">${whole:,}.{cents:02d}</span>'
+                  f'<span class="a-price-whole">{whole:,}<span class="a-price-decimal">.</span></span>'
+                  f'<span class="a-price-fraction">{cents:02d}</span></span>')
+    if layout == 3:
+        # No image scripts - only the landing <img>
+        color_images = ''
+        dynamic = ','.join(f'&quot;{u}&quot;:[500,500]' for u in images[:4])
+        image_html = f'<img id="landingImage" src="{images[0]}" data-a-dynamic-image="{{{dynamic}}}">'
+    else:
+        image_html = f'<img id="landingImage" src="{images[0]}">'
+
+    page = (f'<!doctype html><html><head><meta charset="utf-8"><title>{title}</title>{script_noise}</head><body>'
+            f'{filler[:len(filler) // 2]}<div id="centerCol">{title_html}{price_html}{bullets}</div>'
+            f'{image_html}{color_images}{filler[len(filler) // 2:]}</body></html>')
+    return page.encode('utf-8')
+
+
+def write_synthetic(corpus_dir: str, count: int):
+    rng = random.Random(42)
+    for n in range(count):
+        with open(os.path.join(corpus_dir, f"synthetic_{n:03d}.html"), 'wb') as f:
+            f.write(synthetic_page(n, rng))
+    print(f"📝 Wrote {count} synthetic pages to {corpus_dir}/")
+
+
+def load_corpus(corpus_dir: str) -> dict:
+    pages = {}
+    for name in sorted(os.listdir(corpus_dir)):
+        if name.endswith(('.html', '.htm')):
+            with open(os.path.join(corpus_dir, name), 'rb') as f:
+                pages[name] = f.read()
+    return pages
+
+
+def run_benchmark(pages: dict, repeat: int):
+    extractors = {name: cls() for name, cls in EXTRACTORS.items()}
+    reference = SoupExtractor()
+    expected = {name: reference.extract(content) for name, content in pages.items()}
+    total_mb = sum(len(c) for c in pages.values()) / 1024 / 1024
+
+    print(f"📚 Corpus: {len(pages)} pages, {total_mb:.1f} MB, {repeat} rounds")
+    print("=" * 72)
+    print(f"{'extractor':<10} {'mean ms':>9} {'median ms':>10} {'p95 ms':>8} {'pages/s':>9} {'MB/s':>7} {'mismatch':>9}")
+    print("-" * 72)
+
+    results = {}
+    for name, extractor in extractors.items():
+        timings = []
+        mismatches = set()
+        for _ in range(repeat):
+            for page_name, content in pages.items():
+                started = time.perf_counter()
+                output = extractor.extract(content)
+                timings.append(time.perf_counter() - started)
+                if output != expected[page_name]:
+                    mismatches.add(page_name)
+        total = sum(timings)
+        timings.sort()
+        results[name] = statistics.mean(timings)
+        print(f"{name:<10} {statistics.mean(timings) * 1000:>9.2f} {statistics.median(timings) * 1000:>10.2f} "
+              f"{timings[int(len(timings) * 0.95) - 1] * 1000:>8.2f} {len(timings) / total:>9.1f} "
+              f"{total_mb * repeat / total:>7.1f} {len(mismatches):>9}")
+        for page_name in sorted(mismatches):
+            print(f"    ⚠️  {page_name}: {extractor.extract(pages[page_name])} != {expected[page_name]}")
+
+    print("=" * 72)
+    baseline = results.get('soup')
+    for name, mean in results.items():
+        if name != 'soup' and baseline:
+            print(f"⚡ {name}: {baseline / mean:.1f}x faster than soup")
+        stats = getattr(extractors[name], 'stats', None)
+        if stats:
+            print(f"   {name} path usage: {stats}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Amazon HTML extractors")
+    parser.add_argument('corpus', nargs='?', default=DEFAULT_CORPUS, help="directory of saved product pages")
+    parser.add_argument('--repeat', type=int, default=3, help="rounds over the corpus")
+    parser.add_argument('--fetch', nargs='+', metavar='ASIN', help="save live pages for these ASINs first")
+    parser.add_argument('--synthetic', type=int, metavar='N', help="generate N synthetic pages first")
+    args = parser.parse_args()
+
+    os.makedirs(args.corpus, exist_ok=True)
+    if args.fetch:
+        asyncio.run(fetch_pages(args.corpus, args.fetch))
+    if args.synthetic:
+        write_synthetic(args.corpus, args.synthetic)
+
+    pages = load_corpus(args.corpus)
+    if not pages:
+        print(f"❌ No pages in {args.corpus}/ - use --fetch ASIN ... or --synthetic N")
+        sys.exit(1)
+    run_benchmark(pages, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
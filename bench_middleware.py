@@ -0,0 +1,138 @@
+"""
+Backend Middleware Benchmark
+
+Compares requests/sec for the backend middleware stack built on Starlette's
+BaseHTTPMiddleware (the previous stack) against the pure ASGI stack in
+backend/middleware, on /health and /api/products. Requests go straight into
+the app through httpx's ASGI transport, so only app + middleware cost is measured.
+
+Usage:
+    python bench_middleware.py [--requests N] [--concurrency C]
+"""
+
+import os
+import time
+import uuid
+import asyncio
+import argparse
+import tempfile
+
+# Throwaway database for /api/products (must be set before backend.core.config loads)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.gettempdir()}/bench_middleware.db")
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from backend.api import products
+from backend.core.database import Base, engine
+from backend.middleware.asgi import RequestIDMiddleware, TimingMiddleware
+from backend.middleware.rate_limit import RateLimiter, RateLimitMiddleware
+
+# Generous limits so the benchmark measures overhead, not 429s
+BENCH_LIMITS = {"enabled": True, "default_limit": "1000000/minute", "api_limits": {}, "burst_limit": 1.5}
+
+
+# ----------------------------------------------------------------------
+# Previous stack: the same middleware written as BaseHTTPMiddleware
+# ----------------------------------------------------------------------
+
+class BaseRequestID(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex
+        response = await call_next(request)
+        response.headers["X-Request-ID"] = request_id
+        return response
+
+
+class BaseTiming(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        started = time.perf_counter()
+        response = await call_next(request)
+        response.headers["X-Response-Time"] = f"{(time.perf_counter() - started) * 1000:.2f}ms"
+        return response
+
+
+class BaseRateLimit(BaseHTTPMiddleware):
+    def __init__(self, app, limiter: RateLimiter):
+        super().__init__(app)
+        self.limiter = limiter
+
+    async def dispatch(self, request: Request, call_next):
+        if not request.url.path.startswith('/api/'):
+            return await call_next(request)
+        buckets = self.limiter.buckets_for(request.url.path, request.headers.get('X-API-Key'), request.client.host)
+        result = await self.limiter.check(buckets)
+        if not result['allowed']:
+            return JSONResponse(status_code=429, content={'error': 'Rate limit exceeded'})
+        response = await call_next(request)
+        response.headers['X-RateLimit-Remaining'] = str(result['remaining'])
+        return response
+
+
+def build_app(stack: str) -> FastAPI:
+    app = FastAPI()
+    limiter = RateLimiter(BENCH_LIMITS)
+    if stack == "base":
+        app.add_middleware(BaseRateLimit, limiter=limiter)
+    else:
+        app.add_middleware(RateLimitMiddleware, limiter=limiter)
+    app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
+    if stack == "base":
+        app.add_middleware(BaseTiming)
+        app.add_middleware(BaseRequestID)
+    else:
+        app.add_middleware(TimingMiddleware)
+        app.add_middleware(RequestIDMiddleware)
+
+    app.include_router(products.router, prefix="/api/products")
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    return app
+
+
+async def run(app: FastAPI, path: str, total: int, concurrency: int) -> float:
+    """Requests/sec for total requests to path, concurrency at a time"""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(50):     # warm up
+            await client.get(path)
+
+        remaining = iter(range(total))
+
+        async def worker():
+            for _ in remaining:
+                response = await client.get(path)
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return total / (time.perf_counter() - started)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark backend middleware stacks")
+    parser.add_argument('--requests', type=int, default=3000, help="requests per endpoint and stack")
+    parser.add_argument('--concurrency', type=int, default=10, help="requests in flight")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    apps = {"base": build_app("base"), "asgi": build_app("asgi")}
+
+    print(f"🏁 {args.requests} requests per run, {args.concurrency} concurrent")
+    print("=" * 56)
+    print(f"{'endpoint':<16} {'BaseHTTP req/s':>15} {'ASGI req/s':>12} {'speedup':>9}")
+    print("-" * 56)
+    for path in ("/health", "/api/products/"):
+        rates = {name: await run(app, path, args.requests, args.concurrency) for name, app in apps.items()}
+        print(f"{path:<16} {rates['base']:>15.0f} {rates['asgi']:>12.0f} {rates['asgi'] / rates['base']:>8.2f}x")
+    print("=" * 56)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,312 @@
+"""
+Browser Pool - Warm Playwright browsers shared by all scrapers
+Keeps a few Chromium processes running and leases pages from recycled
+contexts, so a scrape costs a new tab instead of a browser launch.
+Browsers that crash, have served max_pages_per_browser pages or grow past
+max_rss_mb are drained and replaced.
+
+    async with browser_pool.page() as page:
+        await page.goto(url, wait_until='domcontentloaded')
+        await wait_for_any(page, CARD_SELECTORS)
+        cards = await extract_cards(page, CARD_SELECTORS, FIELDS)
+
+Pooled pages skip images, media, fonts and tracker requests, and
+extract_cards() reads every card on a page in a single evaluate call.
+"""
+
+import os
+import time
+import uuid
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple, Union
+from urllib.parse import urlsplit
+
+import psutil
+from playwright.async_api import Browser, BrowserContext, Page, Route, async_playwright
+
+from scaling_config import SCALING_CONFIG
+
+LAUNCH_ARGS = [
+    '--disable-blink-features=AutomationControlled',
+    '--disable-dev-shm-usage',
+    '--no-sandbox',
+    '--disable-setuid-sandbox',
+]
+
+CONTEXT_OPTIONS = {
+    'viewport': {'width': 1920, 'height': 1080},
+    'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+}
+
+# Check a browser's memory every this many pages it serves
+RSS_CHECK_EVERY = 10
+
+# Analytics/ad hosts (and their subdomains) aborted when block_trackers is on
+TRACKER_HOSTS = (
+    'google-analytics.com', 'googletagmanager.com', 'doubleclick.net', 'googlesyndication.com',
+    'googleadservices.com', 'facebook.net', 'connect.facebook.com', 'hotjar.com', 'criteo.com',
+    'criteo.net', 'mmstat.com', 'arms-retcode.aliyuncs.com', 'bat.bing.com', 'tiktok.com',
+)
+
+# Field spec for extract_cards: (selector or selectors tried in order, attributes tried in order;
+# None reads innerText). A selector also matches the card element itself.
+FieldSpec = Tuple[Union[str, Sequence[str]], Optional[Sequence[str]]]
+
+EXTRACT_CARDS_JS = """
+({selectors, fields, limit}) => {
+    const find = (card, selector) => card.matches(selector) ? card : card.querySelector(selector);
+    const read = (card, [selectors, attrs]) => {
+        for (const selector of [].concat(selectors)) {
+            const el = find(card, selector);
+            if (!el) continue;
+            if (!attrs) return el.innerText;
+            for (const attr of attrs) {
+                const value = el.getAttribute(attr);
+                if (value) return value;
+            }
+            return null;
+        }
+        return null;
+    };
+    for (const selector of selectors) {
+        const cards = Array.from(document.querySelectorAll(selector)).slice(0, limit);
+        if (!cards.length) continue;
+        return {selector, cards: cards.map(card => {
+            const out = {};
+            for (const [name, spec] of Object.entries(fields)) out[name] = read(card, spec);
+            return out;
+        })};
+    }
+    return {selector: null, cards: []};
+}
+"""
+
+
+def _is_tracker(url: str) -> bool:
+    host = urlsplit(url).hostname or ''
+    return any(host == t or host.endswith('.' + t) for t in TRACKER_HOSTS)
+
+
+async def wait_for_any(page: Page, selectors: Sequence[str], timeout: float = 15000):
+    """Wait until any of the selectors is in the DOM (instead of a fixed sleep)"""
+    await page.wait_for_selector(', '.join(selectors), state='attached', timeout=timeout)
+
+
+async def extract_cards(page: Page, selectors: Sequence[str], fields: Dict[str, FieldSpec],
+                        limit: int = 100) -> Tuple[Optional[str], List[Dict]]:
+    """Every card's fields in one round trip -> (card selector that matched, [field dicts])"""
+    result = await page.evaluate(EXTRACT_CARDS_JS, {
+        'selectors': list(selectors),
+        'fields': {name: [sel, list(attrs) if attrs else None] for name, (sel, attrs) in fields.items()},
+        'limit': limit,
+    })
+    return result['selector'], result['cards']
+
+
+def default_pool_size(config: Dict) -> int:
+    """Browsers the machine can carry: one per two CPUs, within the free-RAM budget"""
+    by_cpu = max(1, (os.cpu_count() or 2) // 2)
+    by_ram = max(1, psutil.virtual_memory().available // (config["ram_per_browser_mb"] * 1024 * 1024))
+    return int(min(by_cpu, by_ram, config["max_browsers"]))
+
+
+class _PooledBrowser:
+    """One Chromium process plus the context new pages are opened in"""
+
+    def __init__(self, browser: Browser, marker: str):
+        self.browser = browser
+        self.marker = marker        # extra launch flag that identifies this process tree
+        self.context: Optional[BrowserContext] = None
+        self.context_pages = 0      # pages opened in the current context
+        self.context_active: Dict[BrowserContext, int] = {}
+        self.pages_served = 0
+        self.active = 0
+        self.retiring = False
+        self.started = time.monotonic()
+
+    @property
+    def healthy(self) -> bool:
+        return not self.retiring and self.browser.is_connected()
+
+    def rss_mb(self) -> float:
+        """Resident memory of the browser process and all its children (renderers, GPU, ...)"""
+        for proc in psutil.process_iter(['cmdline']):
+            if self.marker in (proc.info['cmdline'] or []):
+                try:
+                    procs = [proc] + proc.children(recursive=True)
+                    return sum(p.memory_info().rss for p in procs) / (1024 * 1024)
+                except psutil.Error:
+                    return 0.0
+        return 0.0
+
+
+class BrowserPool:
+    """Fixed set of warm browsers; page() leases a tab within the concurrency limit"""
+
+    def __init__(self, config: Optional[Dict] = None, launch_args: Optional[List[str]] = None,
+                 context_options: Optional[Dict] = None):
+        self.config = config or SCALING_CONFIG["browser_pool"]
+        self.size = self.config.get("browsers") or default_pool_size(self.config)
+        self.pages_per_browser = self.config["pages_per_browser"]
+        self.launch_args = launch_args or LAUNCH_ARGS
+        self.context_options = context_options or CONTEXT_OPTIONS
+        self.blocked_types = frozenset(self.config.get("block_resources") or ())
+        self.block_trackers = self.config.get("block_trackers", False)
+
+        self._playwright = None
+        self._browsers: List[_PooledBrowser] = []
+        self._slots = asyncio.Semaphore(self.size * self.pages_per_browser)
+        self._lock = asyncio.Lock()
+        self.stats = {"leases": 0, "launches": 0, "restarts": 0, "crashes": 0, "recycled_contexts": 0,
+                      "blocked_requests": 0, "lease_wait_seconds": 0.0}
+
+    # ------------------------------------------------------------------
+    # Leasing
+    # ------------------------------------------------------------------
+
+    @asynccontextmanager
+    async def page(self) -> AsyncIterator[Page]:
+        """Lease a fresh page; it is closed and its browser slot freed on exit"""
+        started = time.monotonic()
+        await asyncio.wait_for(self._slots.acquire(), self.config["lease_timeout"])
+        self.stats["lease_wait_seconds"] += time.monotonic() - started
+        try:
+            pooled, context = await self._checkout()
+            try:
+                page = await context.new_page()
+                try:
+                    yield page
+                finally:
+                    try:
+                        await page.close()
+                    except Exception:
+                        pass    # browser already gone - handled on release
+            finally:
+                await self._checkin(pooled, context)
+        finally:
+            self._slots.release()
+
+    async def _checkout(self):
+        async with self._lock:
+            await self._ensure_browsers()
+            pooled = min((b for b in self._browsers if b.healthy), key=lambda b: b.active)
+            if pooled.context is None or pooled.context_pages >= self.config["context_max_pages"]:
+                # Open a new context; the old one closes once its last page is released
+                old = pooled.context
+                context = await pooled.browser.new_context(**self.context_options)
+                if self.blocked_types or self.block_trackers:
+                    await context.route('**/*', self._filter_request)
+                pooled.context = context
+                pooled.context_active[context] = 0
+                pooled.context_pages = 0
+                if old is not None:
+                    self.stats["recycled_contexts"] += 1
+                    await self._close_context_if_idle(pooled, old)
+            context = pooled.context
+            pooled.active += 1
+            pooled.context_pages += 1
+            pooled.context_active[context] += 1
+            self.stats["leases"] += 1
+            return pooled, context
+
+    async def _checkin(self, pooled: _PooledBrowser, context: BrowserContext):
+        pooled.active -= 1
+        pooled.pages_served += 1
+        pooled.context_active[context] -= 1
+
+        if not pooled.browser.is_connected():
+            if not pooled.retiring:
+                self.stats["crashes"] += 1
+            pooled.retiring = True
+        elif pooled.pages_served >= self.config["max_pages_per_browser"]:
+            pooled.retiring = True
+        elif pooled.pages_served % RSS_CHECK_EVERY == 0:
+            if await asyncio.to_thread(pooled.rss_mb) > self.config["max_rss_mb"]:
+                pooled.retiring = True
+
+        async with self._lock:
+            await self._close_context_if_idle(pooled, context)
+            if pooled.retiring and pooled.active == 0 and pooled in self._browsers:
+                self._browsers.remove(pooled)
+                self.stats["restarts"] += 1
+                await self._close_browser(pooled)
+                await self._ensure_browsers()
+
+    async def _filter_request(self, route: Route):
+        request = route.request
+        if request.resource_type in self.blocked_types or (self.block_trackers and _is_tracker(request.url)):
+            self.stats["blocked_requests"] += 1
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _close_context_if_idle(self, pooled: _PooledBrowser, context: BrowserContext):
+        if context is not pooled.context and pooled.context_active.get(context) == 0:
+            del pooled.context_active[context]
+            try:
+                await context.close()
+            except Exception:
+                pass
+
+    # ------------------------------------------------------------------
+    # Browser lifecycle
+    # ------------------------------------------------------------------
+
+    async def _ensure_browsers(self):
+        """Replace crashed browsers and top the pool up to size (caller holds _lock)"""
+        for pooled in [b for b in self._browsers if not b.browser.is_connected() and b.active == 0]:
+            self.stats["crashes"] += 1
+            self._browsers.remove(pooled)
+        # Retiring browsers still finishing pages don't count towards the size
+        missing = self.size - sum(1 for b in self._browsers if b.healthy)
+        if missing > 0:
+            self._browsers.extend(await asyncio.gather(*(self._launch() for _ in range(missing))))
+
+    async def _launch(self) -> _PooledBrowser:
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+        marker = f"--browser-pool-id={uuid.uuid4().hex}"
+        browser = await self._playwright.chromium.launch(headless=True, args=self.launch_args + [marker])
+        self.stats["launches"] += 1
+        return _PooledBrowser(browser, marker)
+
+    async def _close_browser(self, pooled: _PooledBrowser):
+        try:
+            await pooled.browser.close()
+        except Exception:
+            pass
+
+    async def start(self):
+        """Launch the browsers now instead of on the first lease"""
+        async with self._lock:
+            await self._ensure_browsers()
+
+    async def close(self):
+        async with self._lock:
+            for pooled in self._browsers:
+                await self._close_browser(pooled)
+            self._browsers = []
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+
+    def status(self) -> Dict:
+        return dict(
+            self.stats,
+            size=self.size,
+            concurrency=self.size * self.pages_per_browser,
+            browsers=[
+                {
+                    "pages_served": b.pages_served,
+                    "active_pages": b.active,
+                    "retiring": b.retiring,
+                    "uptime_seconds": round(time.monotonic() - b.started),
+                }
+                for b in self._browsers
+            ],
+        )
+
+
+# Global browser pool shared by the API server
+browser_pool = BrowserPool()
@@ -0,0 +1,395 @@
+"""
+Catalog Store - In-memory index over campaigns/*.json
+Loads the campaigns directory once and serves every product read from memory
+"""
+
+import os
+import json
+import bisect
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+
+class CatalogStore:
+    """Process-wide product catalog indexed by filename, ASIN, niche and created_at"""
+
+    def __init__(self, campaigns_dir: str = "campaigns"):
+        self.campaigns_dir = campaigns_dir
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._dir_mtime = None
+        self.watched = False    # set by fs_watcher while it keeps the index hot
+
+        self._products = {}     # filename -> raw campaign dict (as stored on disk)
+        self._entries = {}      # filename -> normalized listing entry
+        self._keys = {}         # filename -> (mtime, created_at, asin, niche, legacy_revenue, legacy_cost)
+        self._by_asin = defaultdict(set)
+        self._by_niche = defaultdict(list)  # niche -> sorted [(mtime, filename)]
+        self._by_mtime = []     # sorted [(mtime, filename)]
+        self._by_created = []   # sorted [(created_at, filename)]
+
+        # Running totals for legacy campaigns ({"product": {...}} format)
+        self._legacy_revenue = 0.0
+        self._legacy_cost = 0.0
+
+        self._listeners = []    # callables(filename, old_campaign, new_campaign)
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def load(self, force: bool = False):
+        """Scan the campaigns directory once and build all indexes"""
+        with self._lock:
+            if self._loaded and not force:
+                return
+            self._reset()
+            os.makedirs(self.campaigns_dir, exist_ok=True)
+            self._dir_mtime = self._read_dir_mtime()
+            for entry in os.scandir(self.campaigns_dir):
+                if self._is_campaign_file(entry.name):
+                    self._load_file(entry.name, entry.stat().st_mtime)
+            self._loaded = True
+            print(f"📚 Catalog loaded: {len(self._products)} products")
+
+    def _ensure_fresh(self):
+        """Load on first use and pick up files added/removed by other processes"""
+        if not self._loaded:
+            self.load()
+            return
+        if self.watched:
+            return
+        # A directory's mtime only changes when entries are created, renamed or
+        # removed, so one stat is enough to skip the rescan on the common path.
+        dir_mtime = self._read_dir_mtime()
+        if dir_mtime != self._dir_mtime:
+            self._dir_mtime = dir_mtime
+            self._sync_directory()
+
+    def _sync_directory(self):
+        """Reconcile the index with the directory listing without re-parsing known files"""
+        seen = set()
+        for entry in os.scandir(self.campaigns_dir):
+            if not self._is_campaign_file(entry.name):
+                continue
+            seen.add(entry.name)
+            mtime = entry.stat().st_mtime
+            known = self._keys.get(entry.name)
+            if known is None or known[0] != mtime:
+                self._load_file(entry.name, mtime)
+        for filename in list(self._products):
+            if filename not in seen:
+                self._unindex(filename)
+
+    def refresh_file(self, filename: str):
+        """Re-read a single campaign file after an external write or delete"""
+        with self._lock:
+            if not self._loaded:
+                return
+            path = os.path.join(self.campaigns_dir, filename)
+            try:
+                mtime = os.path.getmtime(path)
+            except OSError:
+                self._unindex(filename)
+                return
+            known = self._keys.get(filename)
+            if known is None or known[0] != mtime:
+                self._load_file(filename, mtime)
+
+    def apply_changes(self, changed: set, removed: set):
+        """Apply a batch of filesystem events (called by fs_watcher)"""
+        with self._lock:
+            if not self._loaded:
+                return
+            for filename in removed - changed:
+                if not os.path.exists(os.path.join(self.campaigns_dir, filename)):
+                    self._unindex(filename)
+            for filename in changed:
+                self.refresh_file(filename)
+            self._dir_mtime = self._read_dir_mtime()
+
+    def resync(self):
+        """Reconcile with the directory after missed events (re-reads only changed files)"""
+        with self._lock:
+            if not self._loaded:
+                self.load()
+                return
+            self._dir_mtime = self._read_dir_mtime()
+            self._sync_directory()
+
+    def _load_file(self, filename: str, mtime: float):
+        path = os.path.join(self.campaigns_dir, filename)
+        try:
+            with open(path, 'r') as f:
+                campaign = json.load(f)
+        except FileNotFoundError:
+            self._unindex(filename)
+            return
+        except Exception:
+            # Half-written or invalid file - keep the last good version
+            # until the next write event
+            return
+        self._index(filename, campaign, mtime)
+
+    # ------------------------------------------------------------------
+    # Index maintenance
+    # ------------------------------------------------------------------
+
+    def _reset(self):
+        for filename, campaign in list(self._products.items()):
+            self._notify(filename, campaign, None)
+        self._products.clear()
+        self._entries.clear()
+        self._keys.clear()
+        self._by_asin.clear()
+        self._by_niche.clear()
+        self._by_mtime = []
+        self._by_created = []
+        self._legacy_revenue = 0.0
+        self._legacy_cost = 0.0
+
+    def _index(self, filename: str, campaign: dict, mtime: float):
+        self._unindex(filename)
+
+        # Invalid old-format files stay loadable but are left out of the listing indexes
+        entry = self._normalize(filename, campaign)
+        created_at = str((entry or campaign).get("created_at") or "")
+        asin = campaign.get("asin") or (campaign.get("product") or {}).get("asin")
+        niche = str(entry.get("niche") or "").lower() if entry else ""
+        revenue, cost = self._legacy_totals(campaign)
+
+        # Index keys are kept separately so callers mutating the campaign dict
+        # in place can't desynchronize the indexes.
+        self._products[filename] = campaign
+        self._keys[filename] = (mtime, created_at, asin, niche, revenue, cost)
+        if entry is not None:
+            self._entries[filename] = entry
+            bisect.insort(self._by_mtime, (mtime, filename))
+        bisect.insort(self._by_created, (created_at, filename))
+        if asin:
+            self._by_asin[asin].add(filename)
+        if niche:
+            bisect.insort(self._by_niche[niche], (mtime, filename))
+
+        self._legacy_revenue += revenue
+        self._legacy_cost += cost
+        self._notify(filename, None, campaign)
+
+    def _unindex(self, filename: str):
+        campaign = self._products.pop(filename, None)
+        if campaign is None:
+            return
+        self._entries.pop(filename, None)
+        mtime, created_at, asin, niche, revenue, cost = self._keys.pop(filename)
+        self._remove_sorted(self._by_mtime, (mtime, filename))
+        self._remove_sorted(self._by_created, (created_at, filename))
+        if asin:
+            self._discard(self._by_asin, asin, filename)
+        if niche:
+            bucket = self._by_niche.get(niche)
+            if bucket is not None:
+                self._remove_sorted(bucket, (mtime, filename))
+                if not bucket:
+                    del self._by_niche[niche]
+
+        self._legacy_revenue -= revenue
+        self._legacy_cost -= cost
+        self._notify(filename, campaign, None)
+
+    def subscribe(self, listener):
+        """Call listener(filename, old, new) on every index change (None = absent)"""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def _notify(self, filename: str, old: Optional[dict], new: Optional[dict]):
+        for listener in self._listeners:
+            try:
+                listener(filename, old, new)
+            except Exception as e:
+                print(f"⚠️  Catalog listener failed for {filename}: {e}")
+
+    @staticmethod
+    def _remove_sorted(items: list, key: tuple):
+        idx = bisect.bisect_left(items, key)
+        if idx < len(items) and items[idx] == key:
+            del items[idx]
+
+    @staticmethod
+    def _discard(index: dict, key: str, filename: str):
+        bucket = index.get(key)
+        if bucket is not None:
+            bucket.discard(filename)
+            if not bucket:
+                del index[key]
+
+    @staticmethod
+    def _legacy_totals(campaign: dict):
+        """Potential revenue/cost as counted by /api/stats/live (legacy format only)"""
+        try:
+            return float(campaign["product"]["retail_price"]), float(campaign["product"]["cost"])
+        except Exception:
+            return 0.0, 0.0
+
+    @staticmethod
+    def _normalize(filename: str, campaign: dict) -> Optional[dict]:
+        """Build the /api/campaigns/list entry for a campaign (None = not listable)"""
+        if "product" in campaign:
+            # Old format (nested 'product' key)
+            product = campaign["product"]
+            try:
+                return {
+                    "filename": filename,
+                    "product_name": product["name"],
+                    "niche": product["niche"],
+                    "cost": product["cost"],
+                    "retail_price": product["retail_price"],
+                    "suggested_resale_price": product.get("suggested_resale_price", product["retail_price"] * 2.5),
+                    "margin": product["margin"],
+                    "source": product.get("source", "Amazon"),
+                    "source_url": product.get("source_url", ""),
+                    "image_url": product.get("image_url", ""),
+                    "shipping_time": product.get("shipping_time", "2-3 days"),
+                    "supplier_rating": product.get("supplier_rating", 4.5),
+                    "created_at": campaign["created_at"],
+                    "platforms": campaign["platforms"],
+                    "status": "ready_to_list"
+                }
+            except Exception:
+                return None     # Skip invalid files
+
+        # New format - return ALL fields from file (includes ASIN, supplier_link, etc.)
+        entry = campaign.copy()
+        entry["filename"] = filename
+        return entry
+
+    @staticmethod
+    def _is_campaign_file(name: str) -> bool:
+        return name.endswith('.json') and not name.startswith('.')
+
+    def _read_dir_mtime(self):
+        try:
+            return os.stat(self.campaigns_dir).st_mtime_ns
+        except OSError:
+            return None
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def save(self, filename: str, campaign: dict) -> str:
+        """Write a campaign file atomically and update the index in place"""
+        filename = os.path.basename(filename)
+        os.makedirs(self.campaigns_dir, exist_ok=True)
+        path = os.path.join(self.campaigns_dir, filename)
+        tmp_path = os.path.join(self.campaigns_dir, f".{filename}.tmp")
+
+        with self._lock:
+            with open(tmp_path, 'w') as f:
+                json.dump(campaign, f, indent=2)
+            os.replace(tmp_path, path)
+
+            if self._loaded:
+                self._index(filename, campaign, os.path.getmtime(path))
+                self._dir_mtime = self._read_dir_mtime()
+        return path
+
+    def delete(self, filename: str) -> bool:
+        """Delete a campaign file and drop it from the index"""
+        filename = os.path.basename(filename)
+        path = os.path.join(self.campaigns_dir, filename)
+        with self._lock:
+            try:
+                os.remove(path)
+                removed = True
+            except FileNotFoundError:
+                removed = False
+            self._unindex(filename)
+            if self._loaded:
+                self._dir_mtime = self._read_dir_mtime()
+        return removed
+
+    def clear(self) -> int:
+        """Delete every campaign file"""
+        with self._lock:
+            self._ensure_fresh()
+            filenames = list(self._products)
+            for filename in filenames:
+                self.delete(filename)
+            return len(filenames)
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def get(self, filename: str) -> Optional[dict]:
+        """Get the raw campaign dict for a filename"""
+        with self._lock:
+            self._ensure_fresh()
+            return self._products.get(os.path.basename(filename))
+
+    def list_recent(self, limit: int = 50, offset: int = 0, niche: Optional[str] = None) -> List[Dict]:
+        """Listing entries, most recently modified first"""
+        with self._lock:
+            self._ensure_fresh()
+            keys = self._by_niche.get(niche.lower(), []) if niche else self._by_mtime
+            end = len(keys) - offset
+            start = max(end - limit, 0)
+            if end <= 0:
+                return []
+            return [self._entries[f] for _, f in reversed(keys[start:end])]
+
+    def list_by_created(self, limit: Optional[int] = None, newest_first: bool = True) -> List[Dict]:
+        """Raw campaigns ordered by created_at"""
+        with self._lock:
+            self._ensure_fresh()
+            keys = reversed(self._by_created) if newest_first else iter(self._by_created)
+            result = []
+            for _, filename in keys:
+                if limit is not None and len(result) >= limit:
+                    break
+                result.append(self._products[filename])
+            return result
+
+    def filenames_by_created(self, newest_first: bool = True) -> List[str]:
+        """Filenames ordered by created_at"""
+        with self._lock:
+            self._ensure_fresh()
+            filenames = [f for _, f in self._by_created]
+            return filenames[::-1] if newest_first else filenames
+
+    def find_by_asin(self, asin: str) -> List[Dict]:
+        """Raw campaigns that reference an ASIN"""
+        with self._lock:
+            self._ensure_fresh()
+            return [self._products[f] for f in self._by_asin.get(asin, ())]
+
+    def has_asin(self, asin: str) -> bool:
+        with self._lock:
+            self._ensure_fresh()
+            return asin in self._by_asin
+
+    def items(self) -> List[tuple]:
+        """Snapshot of (filename, raw campaign) pairs"""
+        with self._lock:
+            self._ensure_fresh()
+            return list(self._products.items())
+
+    def count(self) -> int:
+        with self._lock:
+            self._ensure_fresh()
+            return len(self._products)
+
+    def stats(self) -> Dict:
+        """Totals used by /api/stats/live"""
+        with self._lock:
+            self._ensure_fresh()
+            return {
+                "total_campaigns": len(self._products),
+                "total_revenue": self._legacy_revenue,
+                "total_cost": self._legacy_cost,
+            }
+
+
+# Global catalog shared by the API server
+catalog_store = CatalogStore()
@@ -37,7 +37,7 @@ PRODUCT_COUNT=$(ls -1 campaigns/*.json 2>/dev/null | wc -l)
 echo "Products in store: $PRODUCT_COUNT"
 
 if [ -d "orders" ]; then
-    ORDER_COUNT=$(ls -1 orders/order_*.json 2>/dev/null | wc -l)
+    ORDER_COUNT=$(python3 -c "from order_store import order_store; print(order_store.count())" 2>/dev/null | tail -1)
     echo "Total orders: $ORDER_COUNT"
 fi
 
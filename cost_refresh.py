@@ -0,0 +1,396 @@
+"""
+Cost Refresh - Adaptive re-scrape schedule for supplier costs
+Every catalog product gets a refresh interval between min_interval (hot)
+and max_interval (long tail) from its sales velocity, recent cost volatility
+and age, and sits in a due-time heap. Workers pop due products, fetch the
+current supplier cost through the source's fetcher (which goes through the
+shared rate-limited scrape engine), and rewrite cost/profit/margin in the
+campaign only when the cost actually moved.
+
+Each product's last check and next due time are written to state_path
+every STATE_FLUSH_INTERVAL seconds (and on shutdown), so a restart resumes
+the schedule instead of re-scraping every product whose cost didn't move.
+"""
+
+import os
+import json
+import time
+import heapq
+import asyncio
+import threading
+from collections import deque
+from datetime import datetime
+from statistics import mean, pstdev
+from typing import Awaitable, Callable, Dict, Optional
+
+from catalog_store import CatalogStore, catalog_store
+from sales_aggregates import SalesAggregates, sales_aggregates
+from scaling_config import SCALING_CONFIG
+
+# fetch(campaign) -> current supplier cost, or None when it couldn't be read
+FetchFn = Callable[[dict], Awaitable[Optional[float]]]
+
+# Longest a worker sleeps before re-checking the heap (covers wakeups it missed)
+MAX_IDLE = 60
+
+# Seconds between writes of the schedule state (only when it changed)
+STATE_FLUSH_INTERVAL = 60
+
+# Interval tiers reported by status()
+TIERS = (("hourly", 2 * 3600), ("daily", 2 * 86400), ("weekly", None))
+
+
+def _product(campaign: dict) -> dict:
+    return campaign.get('product') if isinstance(campaign.get('product'), dict) else campaign
+
+
+def _to_float(value) -> float:
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _timestamp(value) -> Optional[float]:
+    try:
+        return datetime.fromisoformat(str(value)).timestamp()
+    except ValueError:
+        return None
+
+
+def _uses_gross_margin(product: dict, old_cost: float, resale: float) -> bool:
+    """True if the stored margin is profit over resale price rather than markup over cost
+
+    Products added from a URL store the gross margin, sourced ones the markup;
+    whichever the stored margin is closer to is kept.
+    """
+    if 'margin' not in product or old_cost <= 0 or resale <= 0:
+        return False
+    margin = _to_float(product.get('margin'))
+    gross = (resale - old_cost) / resale * 100
+    markup = (resale - old_cost) / old_cost * 100
+    return abs(margin - gross) < abs(margin - markup)
+
+
+def apply_cost(campaign: dict, cost: float, history_size: int = 8) -> dict:
+    """Copy of the campaign with a new supplier cost and the profit/margin that follow from it"""
+    updated = json.loads(json.dumps(campaign))
+    product = _product(updated)
+    now = datetime.now().isoformat()
+    old_cost = _to_float(product.get('cost'))
+    resale = _to_float(product.get('suggested_resale_price') or product.get('price'))
+
+    gross = _uses_gross_margin(product, old_cost, resale)
+
+    history = product.get('cost_history') or [[product.get('created_at') or now, old_cost]]
+    history.append([now, cost])
+    product['cost_history'] = history[-history_size:]
+    product['cost'] = cost
+    product['retail_price'] = cost
+    product['profit'] = round(resale - cost, 2)
+    # Keep the campaign's own margin convention
+    if gross:
+        product['margin'] = round((resale - cost) / resale * 100, 1) if resale > 0 else 0
+    else:
+        product['margin'] = round((resale - cost) / cost * 100, 1) if cost > 0 else 0
+    product['cost_refreshed_at'] = now
+    return updated
+
+
+class CostRefreshScheduler:
+    """Due-time heap of catalog products, drained by a small worker pool"""
+
+    def __init__(self, catalog: Optional[CatalogStore] = None, sales: Optional[SalesAggregates] = None,
+                 config: Optional[Dict] = None):
+        self.config = config or SCALING_CONFIG["background_tasks"]["cost_refresh"]
+        self.catalog = catalog or catalog_store
+        self.sales = sales or sales_aggregates
+
+        self._fetchers: Dict[str, FetchFn] = {}
+        self._lock = threading.Lock()   # catalog listeners run on the file-watcher thread too
+        self._heap = []             # (due, filename); entries not matching _due are stale
+        self._due = {}              # filename -> due timestamp
+        self._intervals = {}        # filename -> current interval
+        self._last = {}             # filename -> time of the last refresh attempt
+        self._in_flight = set()
+        self._unsupported = set()   # campaigns without a fetcher for their source
+        self._replaced = None       # (filename, due, last) of the entry an update just removed
+        self._saved = {}            # filename -> (due, last) from the state file, until planned
+        self._dirty = False
+        self._completed = deque()   # completion times within the last hour
+        self._wake = None
+        self._loop = None
+        self._tasks = []
+        self.counters = {"refreshed": 0, "changed": 0, "failed": 0, "fetch_seconds": 0.0}
+
+    def configure(self, fetchers: Dict[str, FetchFn]):
+        """Plug in cost fetchers by campaign source (e.g. {"Amazon": fetch_amazon_cost})"""
+        self._fetchers = dict(fetchers)
+
+    # ------------------------------------------------------------------
+    # Intervals
+    # ------------------------------------------------------------------
+
+    def interval(self, campaign: dict) -> float:
+        """Seconds between refreshes - geometric between max_interval (heat 0) and min_interval (heat 1+)"""
+        product = _product(campaign)
+        config = self.config
+        asin = product.get('asin') or campaign.get('asin')
+
+        heat = self.sales.velocity(asin, config["velocity_days"]) / config["hot_orders_per_day"] if asin else 0.0
+
+        costs = [_to_float(cost) for _, cost in product.get('cost_history') or []]
+        if len(costs) > 1 and mean(costs) > 0:
+            heat += pstdev(costs) / mean(costs) / config["hot_volatility"]
+
+        created = _timestamp(product.get('created_at'))
+        if created is not None:
+            age_days = (time.time() - created) / 86400
+            heat += config["new_product_heat"] * max(0.0, 1 - age_days / config["new_product_days"])
+
+        ratio = config["min_interval"] / config["max_interval"]
+        return config["max_interval"] * ratio ** min(1.0, heat)
+
+    # ------------------------------------------------------------------
+    # Schedule
+    # ------------------------------------------------------------------
+
+    def _schedule(self, filename: str, due: float, interval: float):
+        """Caller holds _lock"""
+        self._dirty = True
+        self._due[filename] = due
+        self._intervals[filename] = interval
+        heapq.heappush(self._heap, (due, filename))
+
+    def _unschedule(self, filename: str):
+        self._due.pop(filename, None)
+        self._intervals.pop(filename, None)
+        self._last.pop(filename, None)
+        self._unsupported.discard(filename)
+
+    def _plan(self, filename: str, campaign: dict, last: Optional[float] = None):
+        """(Re)schedule from the last refresh, falling back to the campaign's own timestamps;
+        an edit never pushes a product back past the time it was already due"""
+        product = _product(campaign)
+        if product.get('source', 'Amazon') not in self._fetchers or not (product.get('asin') or campaign.get('asin')):
+            with self._lock:
+                self._unschedule(filename)
+                self._unsupported.add(filename)
+            return
+        interval = self.interval(campaign)
+        with self._lock:
+            self._unsupported.discard(filename)
+            if filename in self._in_flight:
+                return
+            if last is not None:
+                due = last + interval
+            else:
+                # The catalog reports an update as remove + add - carry the removed entry over
+                previous = self._replaced[1:] if self._replaced and self._replaced[0] == filename else (None, None)
+                self._replaced = None
+                previous = self._saved.pop(filename, None) or previous
+                last = previous[1] or _timestamp(product.get('cost_refreshed_at') or product.get('created_at')) or 0
+                due = min(last + interval, previous[0] or float('inf'))
+            self._last[filename] = last
+            self._schedule(filename, due, interval)
+        self._notify()
+
+    def on_catalog_change(self, filename: str, old: Optional[dict], new: Optional[dict]):
+        if new is None:
+            with self._lock:
+                self._replaced = (filename, self._due.get(filename), self._last.get(filename))
+                self._unschedule(filename)
+        elif filename not in self._in_flight:
+            self._plan(filename, new)
+
+    def _notify(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def _pop_due(self) -> Optional[str]:
+        """Next due filename, or None; stale heap entries are dropped on the way"""
+        now = time.time()
+        with self._lock:
+            while self._heap:
+                due, filename = self._heap[0]
+                if self._due.get(filename) != due:
+                    heapq.heappop(self._heap)
+                    continue
+                if due > now:
+                    return None
+                heapq.heappop(self._heap)
+                del self._due[filename]
+                self._in_flight.add(filename)
+                return filename
+        return None
+
+    def _next_wait(self) -> float:
+        with self._lock:
+            if not self._heap:
+                return MAX_IDLE
+            return min(MAX_IDLE, max(0.0, self._heap[0][0] - time.time()))
+
+    # ------------------------------------------------------------------
+    # Refreshing
+    # ------------------------------------------------------------------
+
+    async def refresh(self, filename: str) -> Optional[float]:
+        """Fetch one product's cost and save it if it changed; returns the cost read (None on failure)"""
+        campaign = self.catalog.get(filename)
+        if campaign is None:
+            return None
+        product = _product(campaign)
+        fetch = self._fetchers.get(product.get('source', 'Amazon'))
+        if fetch is None:
+            return None
+
+        started = time.monotonic()
+        try:
+            cost = await fetch(campaign)
+        except Exception as e:
+            print(f"⚠️  Cost refresh failed for {filename}: {e}")
+            cost = None
+        self.counters["fetch_seconds"] += time.monotonic() - started
+
+        if cost is None or cost <= 0:
+            self.counters["failed"] += 1
+            return None
+
+        self.counters["refreshed"] += 1
+        self._completed.append(time.time())
+        if round(cost, 2) != round(_to_float(product.get('cost')), 2):
+            self.counters["changed"] += 1
+            updated = apply_cost(campaign, round(cost, 2), self.config["history_size"])
+            await asyncio.to_thread(self.catalog.save, filename, updated)
+            print(f"💲 Cost update: {filename} ${_to_float(product.get('cost'))} → ${round(cost, 2)}")
+        return cost
+
+    async def _worker(self):
+        while True:
+            filename = self._pop_due()
+            if filename is None:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self._next_wait())
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            cost = None
+            try:
+                cost = await self.refresh(filename)
+            finally:
+                with self._lock:
+                    self._in_flight.discard(filename)
+                campaign = self.catalog.get(filename)
+                if campaign is not None:
+                    if cost is None:
+                        # Retry failures sooner, but never more often than the product's own interval
+                        interval = min(self.interval(campaign), self.config["retry_interval"])
+                        with self._lock:
+                            self._last[filename] = time.time()
+                            self._schedule(filename, time.time() + interval, self._intervals.get(filename, interval))
+                    else:
+                        self._plan(filename, campaign, last=time.time())
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    async def start(self):
+        """Schedule the whole catalog, follow its changes and start the workers"""
+        if not self.config.get("enabled", True) or self._tasks:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._saved = await asyncio.to_thread(self._load_state)
+        for filename, campaign in await asyncio.to_thread(self.catalog.items):
+            self._plan(filename, campaign)
+        self._saved = {}
+        self.catalog.subscribe(self.on_catalog_change)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.config["workers"])]
+        self._tasks.append(asyncio.create_task(self._persist()))
+        print(f"🔁 Cost refresh started: {len(self._due)} products scheduled, {self.config['workers']} workers")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._tasks:
+            await asyncio.to_thread(self._save_state)
+        self._tasks = []
+
+    # ------------------------------------------------------------------
+    # Schedule state (survives restarts)
+    # ------------------------------------------------------------------
+
+    def _load_state(self) -> Dict[str, tuple]:
+        path = self.config.get("state_path")
+        if not path:
+            return {}
+        try:
+            with open(path, 'r') as f:
+                return {filename: tuple(entry) for filename, entry in json.load(f).items()}
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save_state(self):
+        path = self.config.get("state_path")
+        if not path:
+            return
+        with self._lock:
+            state = {filename: [due, self._last.get(filename)] for filename, due in self._due.items()}
+            # Products being refreshed right now keep their last known check
+            state.update({filename: [time.time(), self._last.get(filename)] for filename in self._in_flight})
+            # Cleared before the write so changes made meanwhile mark it dirty again
+            self._dirty = False
+        try:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(state, f, separators=(',', ':'))
+            os.replace(tmp_path, path)
+        except OSError:
+            with self._lock:
+                self._dirty = True
+            raise
+
+    async def _persist(self):
+        while True:
+            await asyncio.sleep(STATE_FLUSH_INTERVAL)
+            if self._dirty:
+                try:
+                    await asyncio.to_thread(self._save_state)
+                except OSError as e:
+                    print(f"⚠️  Could not save cost refresh state: {e}")
+
+    def status(self) -> Dict:
+        """Backlog (products past due) and throughput (refreshes in the last hour)"""
+        now = time.time()
+        while self._completed and self._completed[0] < now - 3600:
+            self._completed.popleft()
+        with self._lock:
+            overdue = [now - due for due in self._due.values() if due <= now]
+            upcoming = [due for due in self._due.values() if due > now]
+            tiers = dict.fromkeys((name for name, _ in TIERS), 0)
+            for interval in self._intervals.values():
+                tiers[next(name for name, limit in TIERS if limit is None or interval <= limit)] += 1
+            attempts = self.counters["refreshed"] + self.counters["failed"]
+            return dict(
+                self.counters,
+                fetch_seconds=round(self.counters["fetch_seconds"], 1),
+                running=bool(self._tasks),
+                scheduled=len(self._due),
+                in_flight=len(self._in_flight),
+                unsupported=len(self._unsupported),
+                backlog=len(overdue),
+                oldest_overdue_seconds=round(max(overdue)) if overdue else 0,
+                next_due_in_seconds=round(min(upcoming) - now) if upcoming else None,
+                by_interval=tiers,
+                refreshes_last_hour=len(self._completed),
+                avg_fetch_seconds=round(self.counters["fetch_seconds"] / attempts, 2) if attempts else 0,
+            )
+
+
+# Global scheduler shared by the API server
+cost_refresh = CostRefreshScheduler()
@@ -0,0 +1,235 @@
+"""
+Filesystem Watcher - Change feed for campaigns/ and the orders/ log
+Turns create/modify/delete events into incremental index updates.
+Uses Linux inotify when available and falls back to polling elsewhere.
+"""
+
+import os
+import sys
+import time
+import ctypes
+import ctypes.util
+import select
+import struct
+import threading
+from typing import Dict, Optional
+
+# inotify event masks (see <sys/inotify.h>)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct('iIII')
+
+CHANGED = 'changed'
+REMOVED = 'removed'
+
+
+def _load_libc():
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.inotify_init1  # noqa: B018 - probe for symbol
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+class DirectoryWatcher:
+    """Watch directories and push debounced batches of changes to their sinks
+
+    A sink is any object with:
+        apply_changes(changed: set, removed: set)  - filenames relative to the directory
+        resync()                                   - reconcile with the directory after missed events
+    """
+
+    def __init__(self, debounce: float = 0.25, max_delay: float = 2.0,
+                 poll_interval: float = 2.0, suffix: str = '.json'):
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.suffix = suffix
+
+        self._sinks = {}            # directory -> sink
+        self._suffixes = {}         # directory -> file suffix to watch
+        self._pending = {}          # directory -> {filename: CHANGED | REMOVED}
+        self._first_event = None
+        self._last_event = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._libc = _load_libc()
+        self.mode = 'inotify' if self._libc else 'polling'
+
+    def watch(self, directory: str, sink, suffix: Optional[str] = None):
+        """Register a directory and the index that should follow it"""
+        directory = os.path.abspath(directory)
+        os.makedirs(directory, exist_ok=True)
+        self._sinks[directory] = sink
+        self._suffixes[directory] = suffix or self.suffix
+
+    def start(self):
+        """Start the watcher thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        target = self._run_inotify if self._libc else self._run_polling
+        self._thread = threading.Thread(target=target, name='fs-watcher', daemon=True)
+        self._thread.start()
+        for sink in self._sinks.values():
+            sink.watched = True
+        print(f"👀 Watching {len(self._sinks)} directories ({self.mode})")
+
+    def stop(self):
+        """Stop the watcher thread and flush pending events"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        for sink in self._sinks.values():
+            sink.watched = False
+
+    # ------------------------------------------------------------------
+    # Event batching
+    # ------------------------------------------------------------------
+
+    def _record(self, directory: str, name: str, kind: str):
+        if not name.endswith(self._suffixes[directory]) or name.startswith('.'):
+            return
+        now = time.monotonic()
+        self._pending.setdefault(directory, {})[name] = kind
+        self._last_event = now
+        if self._first_event is None:
+            self._first_event = now
+
+    def _flush_due(self) -> bool:
+        if self._last_event is None:
+            return False
+        now = time.monotonic()
+        return (now - self._last_event >= self.debounce or
+                now - self._first_event >= self.max_delay)
+
+    def _flush(self):
+        pending, self._pending = self._pending, {}
+        self._first_event = self._last_event = None
+        for directory, events in pending.items():
+            changed = {name for name, kind in events.items() if kind == CHANGED}
+            removed = {name for name, kind in events.items() if kind == REMOVED}
+            try:
+                self._sinks[directory].apply_changes(changed, removed)
+            except Exception as e:
+                print(f"⚠️  Watcher update failed for {directory}: {e}")
+
+    def _resync(self, directory: Optional[str] = None):
+        targets = [directory] if directory else list(self._sinks)
+        for path in targets:
+            self._pending.pop(path, None)
+            try:
+                self._sinks[path].resync()
+            except Exception as e:
+                print(f"⚠️  Watcher resync failed for {path}: {e}")
+
+    # ------------------------------------------------------------------
+    # inotify backend
+    # ------------------------------------------------------------------
+
+    def _run_inotify(self):
+        fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            print(f"⚠️  inotify unavailable (errno {ctypes.get_errno()}), polling instead")
+            self.mode = 'polling'
+            return self._run_polling()
+
+        wds = {}
+        try:
+            for directory in self._sinks:
+                wd = self._libc.inotify_add_watch(fd, directory.encode(), WATCH_MASK)
+                if wd < 0:
+                    raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+                wds[wd] = directory
+            # Files written between the initial index load and the watch setup
+            self._resync()
+
+            while not self._stop.is_set():
+                timeout = self.debounce if self._last_event is not None else 1.0
+                readable, _, _ = select.select([fd], [], [], timeout)
+                if readable:
+                    self._read_inotify(fd, wds)
+                if self._flush_due():
+                    self._flush()
+            if self._pending:
+                self._flush()
+        except Exception as e:
+            print(f"⚠️  inotify watcher error: {e}, polling instead")
+            self.mode = 'polling'
+            os.close(fd)
+            fd = None
+            return self._run_polling()
+        finally:
+            if fd is not None:
+                os.close(fd)
+
+    def _read_inotify(self, fd: int, wds: Dict[int, str]):
+        try:
+            buf = os.read(fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(buf):
+            wd, mask, _cookie, length = EVENT_HEADER.unpack_from(buf, offset)
+            offset += EVENT_HEADER.size
+            name = buf[offset:offset + length].rstrip(b'\0').decode(errors='replace')
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                self._resync()
+                continue
+            directory = wds.get(wd)
+            if directory is None or mask & IN_IGNORED:
+                continue
+            if mask & IN_DELETE_SELF:
+                self._resync(directory)
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                self._record(directory, name, REMOVED)
+            elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                self._record(directory, name, CHANGED)
+
+    # ------------------------------------------------------------------
+    # Polling backend
+    # ------------------------------------------------------------------
+
+    def _snapshot(self, directory: str) -> Dict[str, tuple]:
+        snapshot = {}
+        try:
+            for entry in os.scandir(directory):
+                if entry.name.endswith(self._suffixes[directory]) and not entry.name.startswith('.'):
+                    try:
+                        st = entry.stat()
+                        snapshot[entry.name] = (st.st_mtime_ns, st.st_size)
+                    except FileNotFoundError:
+                        continue
+        except FileNotFoundError:
+            pass
+        return snapshot
+
+    def _run_polling(self):
+        snapshots = {directory: self._snapshot(directory) for directory in self._sinks}
+        self._resync()
+
+        while not self._stop.wait(self.poll_interval):
+            for directory, previous in snapshots.items():
+                current = self._snapshot(directory)
+                for name, sig in current.items():
+                    if previous.get(name) != sig:
+                        self._record(directory, name, CHANGED)
+                for name in previous.keys() - current.keys():
+                    self._record(directory, name, REMOVED)
+                snapshots[directory] = current
+            if self._pending:
+                self._flush()
@@ -0,0 +1,328 @@
+"""
+Image Cache - Persistent content-addressed cache for proxied product images
+Blobs are stored once per content hash; source URLs and ASINs point at them.
+The URL/ASIN index is written in the background every INDEX_FLUSH_INTERVAL
+seconds when it changed (and on close), not on every cache miss.
+"""
+
+import os
+import io
+import json
+import time
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+# resolver(asin) -> candidate image URLs, fetcher(url) -> (bytes, content_type) or None
+Resolver = Callable[[str], Awaitable[List[str]]]
+Fetcher = Callable[[str], Awaitable[Optional[Tuple[bytes, str]]]]
+
+# Seconds between background index writes
+INDEX_FLUSH_INTERVAL = 30
+
+
+class CachedImage:
+    """A cached image blob"""
+
+    __slots__ = ('digest', 'content_type', 'path', 'size')
+
+    def __init__(self, digest: str, content_type: str, path: str, size: int):
+        self.digest = digest
+        self.content_type = content_type
+        self.path = path
+        self.size = size
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.digest[:32]}"'
+
+    def read(self) -> bytes:
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+
+class ImageCache:
+    """Disk-backed image cache with an LRU size cap and an ASIN -> image URL map"""
+
+    def __init__(self, cache_dir: str = "image_cache", max_bytes: int = 512 * 1024 * 1024,
+                 url_ttl: int = 7 * 86400, miss_ttl: int = 600):
+        self.cache_dir = cache_dir
+        self.blob_dir = os.path.join(cache_dir, "blobs")
+        self.index_file = os.path.join(cache_dir, "index.json")
+        self.max_bytes = max_bytes
+        self.url_ttl = url_ttl          # how long a scraped ASIN -> URL mapping stays valid
+        self.miss_ttl = miss_ttl        # how long to remember that an ASIN had no image
+
+        self._lock = threading.RLock()
+        self._urls = OrderedDict()      # source_url -> {"digest", "content_type", "size"} (LRU order)
+        self._asins = {}                # asin -> {"urls": [...], "resolved_at": ts}
+        self._refcounts = {}            # digest -> number of URLs pointing at the blob
+        self._total_bytes = 0
+        self._inflight = {}             # asin -> asyncio.Task (single-flight)
+        self._loaded = False
+        self._dirty = False             # index changed since it was last written
+        self._flusher = None
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def load(self):
+        """Load the cache index from disk"""
+        with self._lock:
+            if self._loaded:
+                return
+            os.makedirs(self.blob_dir, exist_ok=True)
+            try:
+                with open(self.index_file, 'r') as f:
+                    data = json.load(f)
+            except (FileNotFoundError, ValueError):
+                data = {}
+            for url, meta in data.get("urls", []):
+                if os.path.exists(self._blob_path(meta["digest"])):
+                    self._add_url(url, meta)
+            self._asins = data.get("asins", {})
+            self._remove_orphans()
+            self._loaded = True
+
+    def _remove_orphans(self):
+        """Delete blobs the index doesn't know (stored after the last index write before a crash)"""
+        for root, _, files in os.walk(self.blob_dir):
+            for name in files:
+                if name not in self._refcounts:
+                    try:
+                        os.remove(os.path.join(root, name))
+                    except OSError:
+                        pass
+
+    def flush(self):
+        """Write the index if it changed"""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {"urls": list(self._urls.items()), "asins": dict(self._asins)}
+            # Cleared before the write so entries added meanwhile mark it dirty again
+            self._dirty = False
+        try:
+            tmp_path = f"{self.index_file}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.index_file)
+        except OSError:
+            with self._lock:
+                self._dirty = True
+            raise
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(INDEX_FLUSH_INTERVAL)
+            try:
+                await asyncio.to_thread(self.flush)
+            except OSError as e:
+                print(f"⚠️  Image cache index write failed: {e}")
+
+    def start(self):
+        """Load the index and start the background index writer"""
+        self.load()
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def close(self):
+        if self._flusher is not None:
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+            self._flusher = None
+        await asyncio.to_thread(self.flush)
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.blob_dir, digest[:2], digest)
+
+    # ------------------------------------------------------------------
+    # Blob index
+    # ------------------------------------------------------------------
+
+    def _add_url(self, url: str, meta: dict):
+        self._urls[url] = meta
+        count = self._refcounts.get(meta["digest"], 0)
+        if count == 0:
+            self._total_bytes += meta["size"]
+        self._refcounts[meta["digest"]] = count + 1
+
+    def _drop_url(self, url: str):
+        meta = self._urls.pop(url, None)
+        if meta is None:
+            return
+        digest = meta["digest"]
+        self._refcounts[digest] -= 1
+        if self._refcounts[digest] <= 0:
+            del self._refcounts[digest]
+            self._total_bytes -= meta["size"]
+            try:
+                os.remove(self._blob_path(digest))
+            except FileNotFoundError:
+                pass
+
+    def _evict(self):
+        """Drop least recently used URLs until the cache fits its size cap"""
+        while self._total_bytes > self.max_bytes and len(self._urls) > 1:
+            oldest_url = next(iter(self._urls))
+            self._drop_url(oldest_url)
+
+    def get_url(self, url: str) -> Optional[CachedImage]:
+        """Look up a cached image by source URL (marks it as recently used)"""
+        with self._lock:
+            self.load()
+            meta = self._urls.get(url)
+            if meta is None:
+                return None
+            self._urls.move_to_end(url)
+            path = self._blob_path(meta["digest"])
+            return CachedImage(meta["digest"], meta["content_type"], path, meta["size"])
+
+    def put_url(self, url: str, data: bytes, content_type: str = "image/jpeg") -> CachedImage:
+        """Store image bytes for a source URL"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest)
+        with self._lock:
+            self.load()
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            self._drop_url(url)
+            self._add_url(url, {"digest": digest, "content_type": content_type, "size": len(data)})
+            self._evict()
+            self._dirty = True
+        return CachedImage(digest, content_type, path, len(data))
+
+    # ------------------------------------------------------------------
+    # ASIN -> image URL map
+    # ------------------------------------------------------------------
+
+    def get_asin_urls(self, asin: str) -> Optional[List[str]]:
+        """Image URLs scraped for an ASIN, or None if unknown/expired"""
+        with self._lock:
+            self.load()
+            entry = self._asins.get(asin)
+            if not entry:
+                return None
+            ttl = self.url_ttl if entry["urls"] else self.miss_ttl
+            if time.time() - entry["resolved_at"] > ttl:
+                return None
+            return entry["urls"]
+
+    def set_asin_urls(self, asin: str, urls: List[str]):
+        with self._lock:
+            self.load()
+            self._asins[asin] = {"urls": urls, "resolved_at": time.time()}
+            self._dirty = True
+
+    async def get_asin_image(self, asin: str, resolver: Resolver, fetcher: Fetcher) -> Optional[CachedImage]:
+        """Return the cached image for an ASIN, scraping/fetching at most once per miss
+
+        Concurrent misses for the same ASIN share one in-flight lookup.
+        """
+        cached = self._lookup_asin(asin)
+        if cached is not None:
+            return cached
+
+        task = self._inflight.get(asin)
+        if task is None:
+            task = asyncio.ensure_future(self._fill_asin(asin, resolver, fetcher))
+            self._inflight[asin] = task
+            task.add_done_callback(lambda _: self._inflight.pop(asin, None))
+        return await asyncio.shield(task)
+
+    def _lookup_asin(self, asin: str) -> Optional[CachedImage]:
+        urls = self.get_asin_urls(asin)
+        for url in urls or ():
+            image = self.get_url(url)
+            if image is not None:
+                return image
+        return None
+
+    async def _fill_asin(self, asin: str, resolver: Resolver, fetcher: Fetcher) -> Optional[CachedImage]:
+        urls = self.get_asin_urls(asin)
+        if urls is None:
+            try:
+                urls = await resolver(asin)
+            except Exception as e:
+                print(f"Image resolve error for {asin}: {e}")
+                urls = []
+            self.set_asin_urls(asin, urls)
+
+        for url in urls:
+            image = self.get_url(url)
+            if image is not None:
+                return image
+            try:
+                result = await fetcher(url)
+            except Exception:
+                continue
+            if result:
+                data, content_type = result
+                # Hashing and the blob write stay off the event loop
+                return await asyncio.to_thread(self.put_url, url, data, content_type)
+        return None
+
+    def stats(self) -> Dict:
+        with self._lock:
+            self.load()
+            return {
+                "images": len(self._refcounts),
+                "urls": len(self._urls),
+                "asins": len(self._asins),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header (possibly a list / weak tags) against an ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(',')]
+    return any(tag[2:] == etag if tag.startswith('W/') else tag == etag for tag in candidates)
+
+
+@lru_cache(maxsize=1024)
+def placeholder_png(asin: str) -> bytes:
+    """Render the 'image loading' placeholder for an ASIN once and keep it in memory"""
+    from PIL import Image, ImageDraw, ImageFont
+
+    img = Image.new('RGB', (500, 500), color='#90EE90')
+    draw = ImageDraw.Draw(img)
+    text = f"Amazon\n{asin}\nImage Loading..."
+
+    # Try to use a font, fall back to default
+    try:
+        font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 32)
+    except Exception:
+        font = ImageFont.load_default()
+
+    # Center the text
+    bbox = draw.multiline_textbbox((0, 0), text, font=font, align='center')
+    text_width = bbox[2] - bbox[0]
+    text_height = bbox[3] - bbox[1]
+    position = ((500 - text_width) // 2, (500 - text_height) // 2)
+    draw.multiline_text(position, text, fill='#333333', font=font, align='center')
+
+    img_byte_arr = io.BytesIO()
+    img.save(img_byte_arr, format='PNG')
+    return img_byte_arr.getvalue()
+
+
+@lru_cache(maxsize=1024)
+def placeholder_etag(asin: str) -> str:
+    return f'"ph-{hashlib.sha256(placeholder_png(asin)).hexdigest()[:24]}"'
+
+
+# Global image cache shared by the API server
+image_cache = ImageCache()
@@ -1,7 +1,7 @@
-import json
 import os
 from datetime import datetime
 from cj_api import CJDropshippingAPI
+from order_store import new_order_id, order_store
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -14,14 +14,6 @@ class OrderFulfillment:
             email=os.getenv('CJ_EMAIL'),
             api_key=os.getenv('CJ_API_KEY')
         )
-        self.orders_file = 'orders.json'
-        self._ensure_orders_file()
-    
-    def _ensure_orders_file(self):
-        """Create orders file if it doesn't exist"""
-        if not os.path.exists(self.orders_file):
-            with open(self.orders_file, 'w') as f:
-                json.dump([], f)
     
     def create_order(self, payment_data: dict, product_data: dict, customer_data: dict):
         """
@@ -42,7 +34,8 @@ class OrderFulfillment:
             Order confirmation
         """
         order = {
-            'order_id': f"ORD-{datetime.now().strftime('%Y%m%d%H%M%S')}",
+            'order_id': new_order_id(),
+            'status': 'pending',
             'created_at': datetime.now().isoformat(),
             'customer': customer_data,
             'product': product_data,
@@ -60,11 +53,7 @@ class OrderFulfillment:
         }
         
         # Save order
-        orders = self._load_orders()
-        orders.append(order)
-        self._save_orders(orders)
-        
-        return order
+        return order_store.create(order)
     
     def process_cj_order(self, order_id: str):
         """
@@ -79,16 +68,15 @@ class OrderFulfillment:
         Returns:
             CJ order confirmation
         """
-        orders = self._load_orders()
-        order = next((o for o in orders if o['order_id'] == order_id), None)
+        order = order_store.get(order_id)
         
         if not order:
             return {'error': 'Order not found'}
         
         # TODO: Implement CJ API order placement
         # For now, mark as ready for manual processing
-        order['fulfillment']['status'] = 'ready_for_cj'
-        order['fulfillment']['notes'] = (
+        fulfillment = dict(order['fulfillment'], status='ready_for_cj')
+        fulfillment['notes'] = (
             f"READY TO ORDER FROM CJ:\n"
             f"Product: {order['product']['name']}\n"
             f"CJ URL: {order['product'].get('supplier_url')}\n"
@@ -99,33 +87,15 @@ class OrderFulfillment:
             f"Your profit: ${order['profit']}"
         )
         
-        self._save_orders(orders)
-        return order
+        return order_store.transition(order_id, 'ready_for_cj', fulfillment=fulfillment)
     
     def get_order(self, order_id: str):
         """Get order details"""
-        orders = self._load_orders()
-        return next((o for o in orders if o['order_id'] == order_id), None)
+        return order_store.get(order_id)
     
     def list_orders(self, status: str = None):
         """List all orders, optionally filtered by status"""
-        orders = self._load_orders()
-        if status:
-            return [o for o in orders if o['fulfillment']['status'] == status]
-        return orders
-    
-    def _load_orders(self):
-        """Load orders from file"""
-        try:
-            with open(self.orders_file, 'r') as f:
-                return json.load(f)
-        except:
-            return []
-    
-    def _save_orders(self, orders):
-        """Save orders to file"""
-        with open(self.orders_file, 'w') as f:
-            json.dump(orders, f, indent=2)
+        return order_store.list(status)
 
 # Initialize global fulfillment handler
 order_fulfillment = OrderFulfillment()
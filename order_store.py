@@ -0,0 +1,449 @@
+"""
+Order Store - Append-only order log with in-memory indexes
+Every order write (API, fulfillment, auto-purchase bot) is one fsync'd JSON
+line in orders/orders.jsonl. The log is replayed once at startup, tailed
+for writes from other processes, and compacted once it is mostly history.
+"""
+
+import os
+import json
+import uuid
+import bisect
+import threading
+from contextlib import contextmanager
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:     # Windows - the lock is then process-local only
+    fcntl = None
+
+
+def new_order_id() -> str:
+    """ORD-<timestamp>-<random suffix> - unique even for orders placed in the same second"""
+    return f"ORD-{datetime.now().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+
+class InvalidTransition(ValueError):
+    """The order is not in a status the requested transition starts from"""
+
+
+class OrderStore:
+    """Process-wide order index backed by an append-only JSONL log"""
+
+    def __init__(self, orders_dir: str = "orders", log_name: str = "orders.jsonl",
+                 legacy_files: Iterable[str] = ("orders.json",), fsync: bool = True,
+                 compact_min_records: int = 1000, compact_ratio: float = 2.0):
+        self.orders_dir = orders_dir
+        self.log_name = log_name
+        self.log_path = os.path.join(orders_dir, log_name)
+        self.lock_path = os.path.join(orders_dir, f".{log_name}.lock")
+        self.legacy_files = legacy_files
+        self.fsync = fsync
+        self.compact_min_records = compact_min_records
+        self.compact_ratio = compact_ratio      # compact when records > ratio * live orders
+        self.watched = False    # set by fs_watcher while it tails the log for us
+
+        self._lock = threading.RLock()
+        self._lock_fd = None
+        self._lock_depth = 0
+        self._loaded = False
+        self._inode = None
+        self._offset = 0        # bytes of the log applied to the indexes
+        self._records = 0       # records in the log (live + superseded)
+
+        self._orders = {}       # order_id -> order dict
+        self._by_status = defaultdict(set)
+        self._by_created = []   # sorted [(created_at, order_id)]
+        self._by_session = {}   # stripe_session_id -> order_id
+        self._listeners = []    # callables(order_id, old_order, new_order)
+
+    # ------------------------------------------------------------------
+    # Locking
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def _exclusive(self):
+        """Hold the cross-process log lock (re-entrant within this process)"""
+        with self._lock:
+            if self._lock_depth == 0:
+                os.makedirs(self.orders_dir, exist_ok=True)
+                self._lock_fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+                if fcntl is not None:
+                    fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0:
+                    if fcntl is not None:
+                        fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+                    os.close(self._lock_fd)
+                    self._lock_fd = None
+
+    # ------------------------------------------------------------------
+    # Loading / tailing
+    # ------------------------------------------------------------------
+
+    def load(self, force: bool = False):
+        """Replay the log once (importing legacy order files on first run)"""
+        with self._exclusive():
+            if self._loaded and not force:
+                return
+            if not os.path.exists(self.log_path):
+                self._import_legacy()
+            self._reset()
+            self._catch_up()
+            self._loaded = True
+            print(f"📦 Orders loaded: {len(self._orders)} orders ({self._records} log records)")
+
+    def _reset(self):
+        for order_id, order in list(self._orders.items()):
+            self._notify(order_id, order, None)
+        self._orders.clear()
+        self._by_status.clear()
+        self._by_created = []
+        self._by_session.clear()
+        self._inode = None
+        self._offset = 0
+        self._records = 0
+
+    def _catch_up(self):
+        """Apply records appended since the last read (by any process)"""
+        try:
+            st = os.stat(self.log_path)
+        except FileNotFoundError:
+            if self._inode is not None:
+                self._reset()
+            return
+        if st.st_ino != self._inode or st.st_size < self._offset:
+            # First read, or another process compacted the log
+            self._reset()
+            self._inode = st.st_ino
+        if st.st_size == self._offset:
+            return
+
+        with open(self.log_path, 'rb') as f:
+            f.seek(self._offset)
+            data = f.read(st.st_size - self._offset)
+        end = data.rfind(b'\n') + 1     # leave a torn final line for later
+        for line in data[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                print(f"⚠️  Skipping corrupt order log record: {line[:80]!r}")
+                continue
+            self._apply(record)
+            self._records += 1
+        self._offset += end
+
+    def _ensure_fresh(self):
+        if not self._loaded:
+            self.load()
+        elif not self.watched:
+            with self._lock:
+                self._catch_up()
+
+    # ------------------------------------------------------------------
+    # Indexes
+    # ------------------------------------------------------------------
+
+    def _apply(self, record: dict):
+        op = record.get("op")
+        if op == "put":
+            order = record["order"]
+            self._unindex(order["order_id"])
+            self._index(order)
+        elif op == "patch":
+            order = self._orders.get(record["id"])
+            if order is not None:
+                self._unindex(record["id"])
+                self._index(dict(order, **record["fields"]))
+        elif op == "del":
+            self._unindex(record["id"])
+
+    def _index(self, order: dict):
+        order_id = order["order_id"]
+        self._orders[order_id] = order
+        bisect.insort(self._by_created, (self._created_key(order), order_id))
+        if order.get("status"):
+            self._by_status[order["status"]].add(order_id)
+        if order.get("stripe_session_id"):
+            self._by_session[order["stripe_session_id"]] = order_id
+        self._notify(order_id, None, order)
+
+    def _unindex(self, order_id: str):
+        order = self._orders.pop(order_id, None)
+        if order is None:
+            return
+        key = (self._created_key(order), order_id)
+        idx = bisect.bisect_left(self._by_created, key)
+        if idx < len(self._by_created) and self._by_created[idx] == key:
+            del self._by_created[idx]
+        status = order.get("status")
+        if status:
+            bucket = self._by_status.get(status)
+            if bucket is not None:
+                bucket.discard(order_id)
+                if not bucket:
+                    del self._by_status[status]
+        if self._by_session.get(order.get("stripe_session_id")) == order_id:
+            del self._by_session[order["stripe_session_id"]]
+        self._notify(order_id, order, None)
+
+    def subscribe(self, listener):
+        """Call listener(order_id, old, new) on every index change (None = absent)"""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def _notify(self, order_id: str, old: Optional[dict], new: Optional[dict]):
+        for listener in self._listeners:
+            try:
+                listener(order_id, old, new)
+            except Exception as e:
+                print(f"⚠️  Order listener failed for {order_id}: {e}")
+
+    @staticmethod
+    def _created_key(order: dict) -> str:
+        return str(order.get("created_at") or '')
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def _write(self, records: List[dict]):
+        """Append records to the log (caller holds the exclusive lock and has caught up)"""
+        data = ''.join(json.dumps(r, separators=(',', ':')) + '\n' for r in records).encode()
+        fd = os.open(self.log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size > self._offset:
+                data = b'\n' + data     # terminate a torn line left by a crashed writer
+            os.write(fd, data)
+            if self.fsync:
+                os.fsync(fd)
+            if self._inode is None:
+                self._inode = os.fstat(fd).st_ino
+            self._offset = os.fstat(fd).st_size
+        finally:
+            os.close(fd)
+        for record in records:
+            self._apply(record)
+        self._records += len(records)
+        self._maybe_compact()
+
+    def _append(self, records: List[dict]):
+        with self._exclusive():
+            if not self._loaded:
+                self.load()
+            self._catch_up()
+            self._write(records)
+
+    def create(self, order: dict) -> dict:
+        """Add a new order (O(1) - one appended log line)"""
+        with self._exclusive():
+            if not self._loaded:
+                self.load()
+            self._catch_up()
+            if order["order_id"] in self._orders:
+                raise ValueError(f"Order {order['order_id']} already exists")
+            self._write([{"op": "put", "order": order}])
+            return self._orders[order["order_id"]]
+
+    def create_for_session(self, order: dict) -> Tuple[dict, bool]:
+        """Create the order for a Stripe checkout session once -> (order, created)
+
+        A repeat call for the same stripe_session_id (page reload, retried
+        verification) returns the order already recorded for it.
+        """
+        with self._exclusive():
+            if not self._loaded:
+                self.load()
+            self._catch_up()
+            existing = self._by_session.get(order["stripe_session_id"])
+            if existing is not None:
+                return self._orders[existing], False
+            if order["order_id"] in self._orders:
+                raise ValueError(f"Order {order['order_id']} already exists")
+            self._write([{"op": "put", "order": order}])
+            return self._orders[order["order_id"]], True
+
+    def save(self, order: dict) -> dict:
+        """Insert or replace an order"""
+        self._append([{"op": "put", "order": order}])
+        return self._orders[order["order_id"]]
+
+    def update(self, order_id: str, fields: dict, expect_status: Optional[Iterable[str]] = None) -> dict:
+        """Merge top-level fields into an order, atomically across processes
+
+        With expect_status the update only applies if the order is currently
+        in one of those statuses (compare-and-set), else InvalidTransition.
+        """
+        with self._exclusive():
+            if not self._loaded:
+                self.load()
+            self._catch_up()
+            order = self._orders.get(order_id)
+            if order is None:
+                raise KeyError(order_id)
+            if expect_status is not None and order.get("status") not in expect_status:
+                raise InvalidTransition(
+                    f"Order {order_id} is '{order.get('status')}', expected one of {list(expect_status)}"
+                )
+            self._write([{"op": "patch", "id": order_id,
+                          "fields": dict(fields, updated_at=datetime.now().isoformat())}])
+            return self._orders[order_id]
+
+    def transition(self, order_id: str, status: str, expect: Optional[Iterable[str]] = None,
+                   **fields) -> dict:
+        """Move an order to a new status (optionally only from the expected ones)"""
+        return self.update(order_id, dict(fields, status=status), expect_status=expect)
+
+    def delete(self, order_id: str) -> bool:
+        with self._exclusive():
+            if not self._loaded:
+                self.load()
+            self._catch_up()
+            if order_id not in self._orders:
+                return False
+            self._write([{"op": "del", "id": order_id}])
+            return True
+
+    # ------------------------------------------------------------------
+    # Compaction
+    # ------------------------------------------------------------------
+
+    def _maybe_compact(self):
+        if (self._records >= self.compact_min_records and
+                self._records > self.compact_ratio * max(len(self._orders), 1)):
+            self.compact()
+
+    def compact(self):
+        """Rewrite the log as one put per live order"""
+        with self._exclusive():
+            self._catch_up()
+            tmp_path = os.path.join(self.orders_dir, f".{self.log_name}.tmp")
+            with open(tmp_path, 'wb') as f:
+                for _, order_id in self._by_created:
+                    record = {"op": "put", "order": self._orders[order_id]}
+                    f.write(json.dumps(record, separators=(',', ':')).encode() + b'\n')
+                f.flush()
+                os.fsync(f.fileno())
+            before = self._records
+            os.replace(tmp_path, self.log_path)
+            self._fsync_dir()
+            st = os.stat(self.log_path)
+            self._inode, self._offset, self._records = st.st_ino, st.st_size, len(self._orders)
+            print(f"🗜️  Order log compacted: {before} → {self._records} records")
+
+    def _fsync_dir(self):
+        if not self.fsync or not hasattr(os, 'O_DIRECTORY'):
+            return
+        fd = os.open(self.orders_dir, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    # ------------------------------------------------------------------
+    # Legacy import
+    # ------------------------------------------------------------------
+
+    def _import_legacy(self):
+        """Fold orders/*.json files and orders.json arrays into a new log"""
+        orders, purchases = [], {}
+        if os.path.isdir(self.orders_dir):
+            for entry in sorted(os.scandir(self.orders_dir), key=lambda e: e.name):
+                if not entry.name.endswith('.json') or entry.name.startswith('.'):
+                    continue
+                data = self._read_json(entry.path)
+                if not isinstance(data, dict) or not data.get("order_id"):
+                    continue
+                # purchase_*.json are fulfillment instructions that reuse the order's id
+                if entry.name.startswith('purchase_'):
+                    purchases[data["order_id"]] = data
+                else:
+                    orders.append(data)
+        for path in self.legacy_files:
+            data = self._read_json(path)
+            if isinstance(data, list):
+                orders.extend(o for o in data if isinstance(o, dict) and o.get("order_id"))
+
+        records = []
+        for order in orders:
+            if "status" not in order and isinstance(order.get("fulfillment"), dict):
+                order["status"] = order["fulfillment"].get("status")
+            if order["order_id"] in purchases:
+                order["purchase_instruction"] = purchases[order["order_id"]]
+            records.append({"op": "put", "order": order})
+        if records:
+            self._write(records)
+            print(f"📥 Imported {len(records)} legacy orders into {self.log_path}")
+
+    @staticmethod
+    def _read_json(path: str):
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    # ------------------------------------------------------------------
+    # Watcher hooks
+    # ------------------------------------------------------------------
+
+    def apply_changes(self, changed: set, removed: set):
+        """Tail the log after a filesystem event (called by fs_watcher)"""
+        with self._lock:
+            if self._loaded and self.log_name in (changed | removed):
+                self._catch_up()
+
+    def resync(self):
+        """Reconcile with the log after missed events"""
+        with self._lock:
+            if not self._loaded:
+                self.load()
+            else:
+                self._catch_up()
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def get(self, order_id: str) -> Optional[dict]:
+        """Get an order by its order_id"""
+        with self._lock:
+            self._ensure_fresh()
+            return self._orders.get(order_id)
+
+    def list(self, status: Optional[str] = None) -> List[Dict]:
+        """Orders, newest first"""
+        with self._lock:
+            self._ensure_fresh()
+            if status:
+                ids = self._by_status.get(status, ())
+                return sorted((self._orders[i] for i in ids), key=self._created_key, reverse=True)
+            return [self._orders[i] for _, i in reversed(self._by_created)]
+
+    def count(self) -> int:
+        with self._lock:
+            self._ensure_fresh()
+            return len(self._orders)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            self._ensure_fresh()
+            return {
+                "orders": len(self._orders),
+                "log_records": self._records,
+                "log_bytes": self._offset,
+                "by_status": {status: len(ids) for status, ids in self._by_status.items()},
+            }
+
+
+# Global order log shared by the API server, fulfillment and the auto-purchase bot
+order_store = OrderStore()
@@ -7,7 +7,18 @@ Bypasses anti-bot protection to get ACTUAL working product links
 import asyncio
 import random
 import re
-from playwright.async_api import async_playwright
+
+from browser_pool import browser_pool, extract_cards, wait_for_any
+
+CARD_SELECTORS = ['[class*="product-card"]', '[class*="search-card-item"]']
+
+# Read from every card in one page.evaluate
+CARD_FIELDS = {
+    'url': ('a[href*="/item/"]', ['href']),
+    'title': (['[class*="title"]', 'h1, h2, h3'], None),
+    'price': ('[class*="price"]', None),
+    'image': ('img', ['src']),
+}
 
 async def scrape_aliexpress_real():
     """Scrape REAL products from AliExpress using browser automation"""
@@ -26,24 +37,8 @@ async def scrape_aliexpress_real():
     
     products = []
     
-    async with async_playwright() as p:
-        # Launch browser with stealth mode
-        browser = await p.chromium.launch(
-            headless=True,
-            args=[
-                '--disable-blink-features=AutomationControlled',
-                '--disable-dev-shm-usage',
-                '--no-sandbox'
-            ]
-        )
-        
-        context = await browser.new_context(
-            viewport={'width': 1920, 'height': 1080},
-            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        )
-        
-        page = await context.new_page()
-        
+    # Leased tab in a warm, shared browser - no browser launch per scrape
+    async with browser_pool.page() as page:
         # Pick a random search
         search_term = random.choice(searches)
         url = f"https://www.aliexpress.us/w/wholesale-{search_term.replace(' ', '-')}.html?spm=a2g0o.home.search.0"
@@ -51,41 +46,26 @@ async def scrape_aliexpress_real():
         print(f"🔍 Searching AliExpress for: {search_term}")
         
         try:
-            await page.goto(url, wait_until='networkidle', timeout=30000)
-            await page.wait_for_timeout(3000)  # Wait for JS to load
-            
-            # Find product cards
-            product_cards = await page.query_selector_all('[class*="product-card"]')
+            await page.goto(url, wait_until='domcontentloaded', timeout=30000)
+            await wait_for_any(page, CARD_SELECTORS)  # cards rendered - no fixed sleep
             
-            if not product_cards:
-                # Try alternative selectors
-                product_cards = await page.query_selector_all('[class*="search-card-item"]')
+            # Up to 10 product cards, all fields in one round trip
+            _, product_cards = await extract_cards(page, CARD_SELECTORS, CARD_FIELDS, limit=10)
             
             print(f"📦 Found {len(product_cards)} product cards")
             
-            # Extract up to 10 products
-            for card in product_cards[:10]:
+            for card in product_cards:
                 try:
                     # Get product link
-                    link_elem = await card.query_selector('a[href*="/item/"]')
-                    if not link_elem:
+                    product_url = card['url']
+                    if not product_url:
                         continue
                     
-                    product_url = await link_elem.get_attribute('href')
                     if not product_url.startswith('http'):
                         product_url = 'https:' + product_url if product_url.startswith('//') else 'https://www.aliexpress.us' + product_url
                     
-                    # Get title
-                    title_elem = await card.query_selector('[class*="title"]')
-                    if not title_elem:
-                        title_elem = await card.query_selector('h1, h2, h3')
-                    
-                    title = await title_elem.inner_text() if title_elem else "Product"
-                    title = title.strip()[:80]  # Limit length
-                    
-                    # Get price
-                    price_elem = await card.query_selector('[class*="price"]')
-                    price_text = await price_elem.inner_text() if price_elem else "$9.99"
+                    title = (card['title'] or "Product").strip()[:80]  # Limit length
+                    price_text = card['price'] or "$9.99"
                     
                     # Extract numeric price
                     price_match = re.search(r'[\$]?([\d,]+\.?\d*)', price_text)
@@ -97,9 +77,7 @@ async def scrape_aliexpress_real():
                     # Calculate cost (estimate 30-40% of retail price for wholesale)
                     cost = round(price * random.uniform(0.30, 0.40), 2)
                     
-                    # Get image
-                    img_elem = await card.query_selector('img')
-                    img_url = await img_elem.get_attribute('src') if img_elem else ""
+                    img_url = card['image'] or ""
                     if img_url and not img_url.startswith('http'):
                         img_url = 'https:' + img_url
                     
@@ -120,16 +98,16 @@ async def scrape_aliexpress_real():
             
         except Exception as e:
             print(f"❌ Error loading page: {e}")
-        
-        finally:
-            await browser.close()
     
     return products
 
 
 async def main():
     """Test the scraper"""
-    products = await scrape_aliexpress_real()
+    try:
+        products = await scrape_aliexpress_real()
+    finally:
+        await browser_pool.close()
     
     print(f"\n🎉 Successfully scraped {len(products)} REAL products!")
     print("\nSample products:")
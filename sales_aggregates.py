@@ -0,0 +1,269 @@
+"""
+Sales Aggregates - Running revenue/profit totals kept in step with the stores
+Subscribes to order_store and catalog_store change events and keeps totals,
+per-status counts and hourly/daily buckets per product and niche, so stats
+endpoints never walk the orders or the catalog.
+"""
+
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+# Hourly buckets older than this are dropped (daily buckets are kept)
+HOURLY_RETENTION = timedelta(days=14)
+
+
+def order_revenue(order: dict) -> float:
+    """Money received for an order, whichever flow created it"""
+    for value in (order.get('amount_paid'), order.get('your_revenue'),
+                  (order.get('payment') or {}).get('amount_received')):
+        if value is not None:
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                return 0.0
+    return 0.0
+
+
+def _to_float(value) -> float:
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _new_bucket() -> List[float]:
+    return [0, 0.0, 0.0]    # orders, revenue, profit
+
+
+def _bucket_dict(bucket: List[float]) -> Dict:
+    return {"orders": bucket[0], "revenue": round(bucket[1], 2), "profit": round(bucket[2], 2)}
+
+
+class SalesAggregates:
+    """Incrementally maintained order and catalog aggregates"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self._totals = _new_bucket()
+        self._by_status = {}        # status -> bucket
+        self._series = {"hour": {}, "day": {}}                 # period -> {bucket_key: bucket}
+        self._by_product = {}       # product -> {"total": bucket, "hour": {...}, "day": {...}}
+        self._by_niche = {}         # niche -> same shape
+        self._order_keys = {}       # order_id -> (revenue, profit, status, hour, day, product, niche)
+
+        self._asin_niche = {}       # asin -> niche (from the catalog)
+        self._catalog = {"products": 0, "potential_revenue": 0.0, "cost": 0.0}
+        self._catalog_niches = {}   # niche -> {"products", "potential_revenue", "cost"}
+        self._catalog_keys = {}     # filename -> (asin, niche, price, cost)
+
+    def attach(self, catalog_store, order_store):
+        """Follow both stores and rebuild from whatever they already hold"""
+        catalog_store.subscribe(self.on_catalog_change)
+        order_store.subscribe(self.on_order_change)
+        self.rebuild(catalog_store, order_store)
+
+    def rebuild(self, catalog_store, order_store):
+        """Recompute every aggregate from the stores"""
+        with self._lock:
+            self._reset()
+            for filename, campaign in catalog_store.items():
+                self.on_catalog_change(filename, None, campaign)
+            for order in order_store.list():
+                self.on_order_change(order.get('order_id'), None, order)
+
+    # ------------------------------------------------------------------
+    # Orders
+    # ------------------------------------------------------------------
+
+    def on_order_change(self, order_id: str, old: Optional[dict], new: Optional[dict]):
+        with self._lock:
+            # Drop whatever is recorded for the id, not just when old is given: a change
+            # that raced with rebuild() may already be counted
+            self._remove_order(order_id)
+            if new is not None:
+                self._add_order(order_id, new)
+
+    def _order_key(self, order: dict) -> tuple:
+        product = order.get('product') if isinstance(order.get('product'), dict) else {}
+        asin = order.get('asin') or product.get('asin')
+        product_key = (asin or order.get('product_id') or order.get('product_name')
+                       or product.get('product_name') or product.get('name') or 'unknown')
+        niche = (order.get('niche') or product.get('niche') or self._asin_niche.get(asin) or 'Unknown')
+        try:
+            created = datetime.fromisoformat(str(order.get('created_at')))
+            hour, day = created.strftime('%Y-%m-%dT%H:00'), created.strftime('%Y-%m-%d')
+        except ValueError:
+            hour = day = None
+        return (order_revenue(order), _to_float(order.get('profit')), order.get('status'),
+                hour, day, str(product_key), str(niche).title())
+
+    def _add_order(self, order_id: str, order: dict):
+        key = self._order_key(order)
+        self._order_keys[order_id] = key
+        self._apply(key, 1)
+
+    def _remove_order(self, order_id: str):
+        key = self._order_keys.pop(order_id, None)
+        if key is not None:
+            self._apply(key, -1)
+
+    def _apply(self, key: tuple, sign: int):
+        revenue, profit, status, hour, day, product, niche = key
+        delta = (sign, sign * revenue, sign * profit)
+
+        targets = [self._totals, self._by_status.setdefault(status or 'unknown', _new_bucket())]
+        for group, name in ((self._by_product, product), (self._by_niche, niche)):
+            entry = group.setdefault(name, {"total": _new_bucket(), "hour": {}, "day": {}})
+            targets.append(entry["total"])
+            targets.extend(self._period_buckets(entry, hour, day, sign))
+        targets.extend(self._period_buckets(self._series, hour, day, sign))
+
+        for bucket in targets:
+            bucket[0] += delta[0]
+            bucket[1] += delta[1]
+            bucket[2] += delta[2]
+
+        if sign < 0:
+            self._prune(status, hour, day, product, niche)
+
+    def _period_buckets(self, series: dict, hour: Optional[str], day: Optional[str], sign: int) -> list:
+        buckets = []
+        if day is not None:
+            buckets.append(series["day"].setdefault(day, _new_bucket()))
+        if hour is not None and (sign > 0 or hour in series["hour"]):
+            if sign > 0 and hour < self._hourly_cutoff():
+                return buckets      # too old for hourly resolution
+            buckets.append(series["hour"].setdefault(hour, _new_bucket()))
+            if len(series["hour"]) > HOURLY_RETENTION.days * 24 + 24:
+                cutoff = self._hourly_cutoff()
+                for stale in [h for h in series["hour"] if h < cutoff]:
+                    del series["hour"][stale]
+        return buckets
+
+    @staticmethod
+    def _hourly_cutoff() -> str:
+        return (datetime.now() - HOURLY_RETENTION).strftime('%Y-%m-%dT%H:00')
+
+    def _prune(self, status, hour, day, product, niche):
+        """Drop groups and buckets that no longer have any orders"""
+        if self._by_status.get(status or 'unknown', [1])[0] == 0:
+            del self._by_status[status or 'unknown']
+        series = [self._series]
+        for group, name in ((self._by_product, product), (self._by_niche, niche)):
+            if group[name]["total"][0] == 0:
+                del group[name]
+            else:
+                series.append(group[name])
+        for entry in series:
+            for period, bucket_key in (("hour", hour), ("day", day)):
+                if entry[period].get(bucket_key, [1])[0] == 0:
+                    del entry[period][bucket_key]
+
+    # ------------------------------------------------------------------
+    # Catalog
+    # ------------------------------------------------------------------
+
+    def on_catalog_change(self, filename: str, old: Optional[dict], new: Optional[dict]):
+        with self._lock:
+            # Same as orders: an add for a file rebuild() already counted replaces it
+            self._apply_catalog(self._catalog_keys.pop(filename, None), -1)
+            if new is not None:
+                key = self._catalog_key(new)
+                self._catalog_keys[filename] = key
+                self._apply_catalog(key, 1)
+
+    @staticmethod
+    def _catalog_key(campaign: dict) -> tuple:
+        product = campaign.get('product') if isinstance(campaign.get('product'), dict) else campaign
+        price = product.get('suggested_resale_price') or product.get('price') or product.get('retail_price')
+        return (product.get('asin') or campaign.get('asin'), str(product.get('niche') or 'Unknown').title(),
+                _to_float(price), _to_float(product.get('cost')))
+
+    def _apply_catalog(self, key: Optional[tuple], sign: int):
+        if key is None:
+            return
+        asin, niche, price, cost = key
+        niche_totals = self._catalog_niches.setdefault(niche, {"products": 0, "potential_revenue": 0.0, "cost": 0.0})
+        for totals in (self._catalog, niche_totals):
+            totals["products"] += sign
+            totals["potential_revenue"] += sign * price
+            totals["cost"] += sign * cost
+        if niche_totals["products"] == 0:
+            del self._catalog_niches[niche]
+        if asin:
+            if sign > 0:
+                self._asin_niche[asin] = niche
+            elif self._asin_niche.get(asin) == niche:
+                del self._asin_niche[asin]
+
+    # ------------------------------------------------------------------
+    # Reads (constant time in the number of orders/products)
+    # ------------------------------------------------------------------
+
+    def totals(self) -> Dict:
+        with self._lock:
+            orders, revenue, profit = self._totals
+            return {
+                "orders": orders,
+                "revenue": round(revenue, 2),
+                "profit": round(profit, 2),
+                "avg_order_value": round(revenue / orders, 2) if orders else 0,
+                "avg_profit_per_order": round(profit / orders, 2) if orders else 0,
+                "by_status": {status: bucket[0] for status, bucket in self._by_status.items()},
+            }
+
+    def catalog(self) -> Dict:
+        with self._lock:
+            return {
+                "products": self._catalog["products"],
+                "potential_revenue": round(self._catalog["potential_revenue"], 2),
+                "cost": round(self._catalog["cost"], 2),
+                "niches": {
+                    niche: {"products": t["products"], "potential_revenue": round(t["potential_revenue"], 2),
+                            "cost": round(t["cost"], 2)}
+                    for niche, t in self._catalog_niches.items()
+                },
+            }
+
+    def series(self, period: str = "day", dimension: Optional[str] = None, key: Optional[str] = None,
+               limit: int = 30) -> List[Dict]:
+        """Most recent buckets for all orders, or for one product/niche"""
+        if period not in ("hour", "day"):
+            raise ValueError("period must be 'hour' or 'day'")
+        with self._lock:
+            if dimension is None:
+                buckets = self._series[period]
+            else:
+                group = {"product": self._by_product, "niche": self._by_niche}.get(dimension)
+                if group is None:
+                    raise ValueError("dimension must be 'product' or 'niche'")
+                entry = group.get(key if dimension == "product" else str(key).title())
+                buckets = entry[period] if entry else {}
+            recent = sorted(buckets)[-limit:]
+            return [dict(_bucket_dict(buckets[k]), bucket=k) for k in recent]
+
+    def velocity(self, product: str, days: int = 7) -> float:
+        """Orders per day for a product over the last days days"""
+        cutoff = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+        with self._lock:
+            entry = self._by_product.get(product)
+            if entry is None:
+                return 0.0
+            return sum(bucket[0] for day, bucket in entry["day"].items() if day > cutoff) / days
+
+    def top(self, dimension: str = "product", limit: int = 10) -> List[Dict]:
+        """Products or niches ranked by profit"""
+        group = {"product": self._by_product, "niche": self._by_niche}.get(dimension)
+        if group is None:
+            raise ValueError("dimension must be 'product' or 'niche'")
+        with self._lock:
+            ranked = sorted(group.items(), key=lambda item: item[1]["total"][2], reverse=True)[:limit]
+            return [dict(_bucket_dict(entry["total"]), key=name) for name, entry in ranked]
+
+
+# Global aggregates shared by the API server
+sales_aggregates = SalesAggregates()
@@ -60,6 +60,20 @@ SCALING_CONFIG = {
         "health_check_interval": 30,
     },
     
+    # Warm Playwright browsers for supplier scraping (browser_pool.py)
+    "browser_pool": {
+        "browsers": None,  # None = sized from CPU count and free RAM
+        "max_browsers": 4,
+        "pages_per_browser": 4,  # concurrent pages (tabs) per browser
+        "ram_per_browser_mb": 600,  # budget used when sizing the pool
+        "max_pages_per_browser": 200,  # restart a browser after serving this many pages
+        "max_rss_mb": 1500,  # ... or once its processes use this much memory
+        "context_max_pages": 25,  # fresh context (cookies/cache) after this many pages
+        "lease_timeout": 60,  # seconds to wait for a free page slot
+        "block_resources": ["image", "media", "font"],  # request types aborted in pooled pages
+        "block_trackers": True,  # abort analytics/ad requests (TRACKER_HOSTS)
+    },
+    
     # Rate limiting
     "rate_limiting": {
         "enabled": True,
@@ -70,7 +84,7 @@ SCALING_CONFIG = {
             "/api/checkout": "100/minute",
         },
         "burst_limit": 1.5,  # Allow 50% burst
-        "strategy": "sliding_window",
+        "strategy": "gcra",  # Token bucket shared across workers via Redis (backend/middleware/rate_limit.py)
     },
     
     # Caching strategy
@@ -93,6 +107,13 @@ SCALING_CONFIG = {
                 "strategy": "LRU",
                 "max_size": 10000,
             },
+            "scrape_pages": {
+                "ttl": 21600,  # 6 hours fresh
+                "stale_ttl": 86400,  # then served stale + refreshed for 24 hours
+                "error_ttl": 120,  # remember blocked/404/unparseable pages for 2 minutes
+                "strategy": "LRU",
+                "max_size": 200,  # pages held in memory (the rest stay in SQLite)
+            },
         },
     },
     
@@ -166,6 +187,49 @@ SCALING_CONFIG = {
             "workers": 1,
             "interval": 600,  # 10 minutes
         },
+        "price_scanning": {
+            "enabled": True,
+            "interval": 3600,  # seconds between catalog-wide scans
+            "batch_size": 5000,  # tracked products per HSCAN batch
+            "time_budget": 120,  # seconds per run; a longer scan resumes where it stopped
+            "drop_percent": 10,  # supplier price drop that raises an alert
+            "min_margin_percent": 20,  # resale margin floor
+            "margin_erosion_points": 10,  # margin lost since the campaign was priced
+            "alert_ttl": 86400,  # an alert is not re-raised while its key lives
+        },
+        "cost_refresh": {
+            "enabled": True,
+            "workers": 4,  # concurrent refreshes (the scrape engine still paces each host)
+            "min_interval": 3600,  # hottest products: hourly
+            "max_interval": 604800,  # long tail: weekly
+            "velocity_days": 7,  # sales window for orders/day
+            "hot_orders_per_day": 5,  # this many orders/day alone makes a product hourly
+            "hot_volatility": 0.1,  # ... as does a 10% relative std dev in recent costs
+            "new_product_days": 14,  # products younger than this get extra heat, fading with age
+            "new_product_heat": 0.5,
+            "history_size": 8,  # cost changes kept per campaign (cost_history)
+            "retry_interval": 1800,  # failed fetch: try again after
+            "state_path": "cost_refresh/schedule.json",  # last check + next due per product, kept across restarts
+        },
+        "analytics_events": {
+            "enabled": True,
+            "queue_size": 50000,  # buffered events before the beacon endpoint pushes back
+            "batch_size": 5000,  # flush as soon as this many events are waiting
+            "flush_interval": 2,  # seconds - flush whatever is waiting at least this often
+            "max_request_events": 500,
+            "spool_path": "analytics_spool/events.jsonl",  # accepted-but-unflushed events survive restarts
+            "spool_max_bytes": 16777216,  # compact the spool once fully flushed and past 16MB
+            "max_flush_attempts": 5,  # then retry request by request and dead-letter the one that fails
+        },
+        "product_sourcing": {
+            "enabled": True,
+            "workers": 2,
+            "item_concurrency": 4,  # detail pages in flight per job
+            "search_concurrency": 4,  # search pages in flight per job
+            "queue_size": 1000,
+            "seen_ttl": 2592000,  # imported ASINs stay out of new runs for 30 days
+            "skipped_ttl": 259200,  # rejected ASINs are retried after 3 days
+        },
     },
     
     # Security settings
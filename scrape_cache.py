@@ -0,0 +1,250 @@
+"""
+Scrape Cache - Shared cache of Amazon product pages keyed by ASIN
+A memory LRU sits in front of a SQLite tier holding the raw HTML (compressed)
+and the parsed product dict. Entries are served fresh within the TTL, served
+stale and refreshed in the background within the stale window, and
+revalidated with If-None-Match / If-Modified-Since when the server supports it.
+"""
+
+import os
+import json
+import time
+import zlib
+import sqlite3
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional
+
+from scaling_config import SCALING_CONFIG
+
+# loader(asin, validators) -> {"status", "html", "product", "etag", "last_modified"}
+Loader = Callable[[str, Dict[str, str]], Awaitable[dict]]
+
+
+class PageEntry:
+    """A cached product page"""
+
+    __slots__ = ('asin', 'status', 'fetched_at', 'compressed', 'product', 'etag', 'last_modified')
+
+    def __init__(self, asin: str, status: int, fetched_at: float, compressed: bytes,
+                 product: Optional[dict], etag: Optional[str] = None, last_modified: Optional[str] = None):
+        self.asin = asin
+        self.status = status
+        self.fetched_at = fetched_at
+        self.compressed = compressed
+        self.product = product
+        self.etag = etag
+        self.last_modified = last_modified
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+    @property
+    def ok(self) -> bool:
+        """A real product page - not an error, captcha/robot check or unparseable page"""
+        return self.status == 200 and self.product is not None and bool(self.product.get('success'))
+
+    @property
+    def html(self) -> bytes:
+        return zlib.decompress(self.compressed) if self.compressed else b''
+
+    @property
+    def text(self) -> str:
+        return self.html.decode('utf-8', errors='replace')
+
+
+class ScrapeCache:
+    """Two-tier (memory LRU + SQLite) product page cache with stale-while-revalidate"""
+
+    def __init__(self, db_path: str = "scrape_cache/pages.db", ttl: Optional[int] = None,
+                 stale_ttl: Optional[int] = None, error_ttl: Optional[int] = None,
+                 max_entries: Optional[int] = None):
+        config = SCALING_CONFIG["caching"]["cache_types"]["scrape_pages"]
+        self.db_path = db_path
+        self.ttl = ttl if ttl is not None else config["ttl"]                    # served as fresh
+        self.stale_ttl = stale_ttl if stale_ttl is not None else config["stale_ttl"]  # served stale + refreshed
+        self.error_ttl = error_ttl if error_ttl is not None else config["error_ttl"]  # remember blocked pages
+        self.max_entries = max_entries or config["max_size"]
+
+        self._lock = threading.RLock()
+        self._db = None
+        self._memory = OrderedDict()    # asin -> PageEntry (LRU order)
+        self._inflight = {}             # asin -> asyncio.Task (single-flight)
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "stale_hits": 0, "misses": 0,
+                         "fetches": 0, "not_modified": 0, "errors": 0}
+
+    # ------------------------------------------------------------------
+    # SQLite tier
+    # ------------------------------------------------------------------
+
+    def load(self):
+        """Open the SQLite tier and drop entries past their stale window"""
+        with self._lock:
+            if self._db is not None:
+                return
+            os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                " asin TEXT PRIMARY KEY, status INTEGER, fetched_at REAL,"
+                " etag TEXT, last_modified TEXT, html BLOB, product TEXT)"
+            )
+            expired = self._db.execute(
+                "DELETE FROM pages WHERE fetched_at < ?", (time.time() - self.ttl - self.stale_ttl,)
+            ).rowcount
+            self._db.commit()
+            total = self._db.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+            print(f"🗄️  Scrape cache loaded: {total} pages ({expired} expired)")
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _disk_get(self, asin: str) -> Optional[PageEntry]:
+        with self._lock:
+            self.load()
+            row = self._db.execute(
+                "SELECT status, fetched_at, etag, last_modified, html, product FROM pages WHERE asin = ?",
+                (asin,)
+            ).fetchone()
+        if row is None:
+            return None
+        status, fetched_at, etag, last_modified, html, product = row
+        return PageEntry(asin, status, fetched_at, html, json.loads(product) if product else None,
+                         etag, last_modified)
+
+    def _disk_put(self, entry: PageEntry):
+        with self._lock:
+            self.load()
+            self._db.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (entry.asin, entry.status, entry.fetched_at, entry.etag, entry.last_modified,
+                 entry.compressed, json.dumps(entry.product) if entry.product is not None else None)
+            )
+            self._db.commit()
+
+    # ------------------------------------------------------------------
+    # Memory tier
+    # ------------------------------------------------------------------
+
+    def _remember(self, entry: PageEntry):
+        with self._lock:
+            self._memory[entry.asin] = entry
+            self._memory.move_to_end(entry.asin)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _memory_get(self, asin: str) -> Optional[PageEntry]:
+        with self._lock:
+            entry = self._memory.get(asin)
+            if entry is not None:
+                self._memory.move_to_end(asin)
+            return entry
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def _fresh_for(self, entry: PageEntry) -> int:
+        return self.ttl if entry.ok else self.error_ttl
+
+    async def get(self, asin: str, loader: Loader) -> PageEntry:
+        """Return the page for an ASIN, fetching at most once per miss
+
+        Fresh entries are returned as-is; stale entries are returned immediately
+        while a single background refresh revalidates them.
+        """
+        entry = self._memory_get(asin)
+        if entry is not None:
+            self.counters["memory_hits"] += 1
+        else:
+            entry = await asyncio.to_thread(self._disk_get, asin)
+            if entry is not None:
+                self.counters["disk_hits"] += 1
+                self._remember(entry)
+
+        if entry is not None:
+            age = entry.age
+            if age < self._fresh_for(entry):
+                return entry
+            if entry.ok and age < self.ttl + self.stale_ttl:
+                self.counters["stale_hits"] += 1
+                self._refresh(asin, loader, entry)
+                return entry
+        else:
+            self.counters["misses"] += 1
+
+        return await asyncio.shield(self._refresh(asin, loader, entry))
+
+    async def revalidate(self, asin: str, loader: Loader) -> PageEntry:
+        """Fetch the page now whatever its age (a conditional GET when it's cached)"""
+        previous = self._memory_get(asin) or await asyncio.to_thread(self._disk_get, asin)
+        return await asyncio.shield(self._refresh(asin, loader, previous))
+
+    def peek(self, asin: str) -> Optional[PageEntry]:
+        """Cached page (fresh or not) without fetching"""
+        return self._memory_get(asin) or self._disk_get(asin)
+
+    def invalidate(self, asin: str):
+        with self._lock:
+            self._memory.pop(asin, None)
+            self.load()
+            self._db.execute("DELETE FROM pages WHERE asin = ?", (asin,))
+            self._db.commit()
+
+    def _refresh(self, asin: str, loader: Loader, previous: Optional[PageEntry]) -> asyncio.Task:
+        task = self._inflight.get(asin)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(asin, loader, previous))
+            self._inflight[asin] = task
+            task.add_done_callback(lambda t: self._finish(asin, t))
+        return task
+
+    def _finish(self, asin: str, task: asyncio.Task):
+        self._inflight.pop(asin, None)
+        if not task.cancelled() and task.exception() is not None:
+            self.counters["errors"] += 1
+
+    async def _fetch(self, asin: str, loader: Loader, previous: Optional[PageEntry]) -> PageEntry:
+        validators = {}
+        # Never revalidate a failed page - a 304 would keep serving it
+        if previous is not None and previous.ok:
+            if previous.etag:
+                validators['If-None-Match'] = previous.etag
+            if previous.last_modified:
+                validators['If-Modified-Since'] = previous.last_modified
+
+        self.counters["fetches"] += 1
+        result = await loader(asin, validators)
+
+        if result["status"] == 304 and previous is not None:
+            self.counters["not_modified"] += 1
+            entry = PageEntry(asin, previous.status, time.time(), previous.compressed, previous.product,
+                              result.get("etag") or previous.etag,
+                              result.get("last_modified") or previous.last_modified)
+        else:
+            html = result.get("html") or b''
+            compressed = await asyncio.to_thread(zlib.compress, html, 6) if html else b''
+            entry = PageEntry(asin, result["status"], time.time(), compressed, result.get("product"),
+                              result.get("etag"), result.get("last_modified"))
+
+        self._remember(entry)
+        await asyncio.to_thread(self._disk_put, entry)
+        return entry
+
+    def stats(self) -> Dict:
+        with self._lock:
+            self.load()
+            pages = self._db.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+            return dict(self.counters, pages=pages, in_memory=len(self._memory),
+                        refreshing=len(self._inflight))
+
+
+# Global scrape cache shared by the API server
+scrape_cache = ScrapeCache()
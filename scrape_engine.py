@@ -0,0 +1,124 @@
+"""
+Scrape Engine - Shared async HTTP client for supplier scraping
+One pooled httpx.AsyncClient with per-host concurrency limits and
+token-bucket pacing, so scraping never blocks the API event loop
+"""
+
+import asyncio
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+try:
+    import h2  # noqa: F401 - enables HTTP/2 in httpx
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+BROWSER_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept-Encoding': 'gzip, deflate',
+    'Upgrade-Insecure-Requests': '1',
+    'Sec-Fetch-Dest': 'document',
+    'Sec-Fetch-Mode': 'navigate',
+    'Sec-Fetch-Site': 'none'
+}
+
+# Politeness budget per host: (requests per second, burst, max concurrent requests)
+HOST_LIMITS = {
+    'www.amazon.com': (0.5, 2, 4),
+    'm.media-amazon.com': (10.0, 20, 8),
+    'images-na.ssl-images-amazon.com': (10.0, 20, 8),
+}
+DEFAULT_HOST_LIMIT = (2.0, 4, 4)
+
+
+class TokenBucket:
+    """Async token bucket - callers sleep until a token is available"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class ScrapeEngine:
+    """Pooled, rate-limited async fetcher shared by all scrapers in the process"""
+
+    def __init__(self, host_limits: Optional[Dict[str, tuple]] = None, max_connections: int = 50,
+                 max_keepalive: int = 20, timeout: float = 15.0):
+        self.host_limits = dict(HOST_LIMITS, **(host_limits or {}))
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self.timeout = timeout
+
+        self._client = None
+        self._buckets = {}      # host -> TokenBucket
+        self._semaphores = {}   # host -> asyncio.Semaphore
+        self.stats = {"requests": 0, "errors": 0, "throttled_seconds": 0.0}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                headers=BROWSER_HEADERS,
+                http2=HTTP2_AVAILABLE,
+                timeout=self.timeout,
+                follow_redirects=True,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive,
+                    keepalive_expiry=60,
+                ),
+            )
+        return self._client
+
+    def _limits_for(self, host: str):
+        if host not in self._buckets:
+            rate, burst, concurrency = self.host_limits.get(host, DEFAULT_HOST_LIMIT)
+            self._buckets[host] = TokenBucket(rate, burst)
+            self._semaphores[host] = asyncio.Semaphore(concurrency)
+        return self._buckets[host], self._semaphores[host]
+
+    async def fetch(self, url: str, headers: Optional[Dict[str, str]] = None,
+                    timeout: Optional[float] = None) -> httpx.Response:
+        """GET a URL within the host's concurrency limit and rate budget"""
+        host = urlsplit(url).hostname or ''
+        bucket, semaphore = self._limits_for(host)
+
+        async with semaphore:
+            started = time.monotonic()
+            await bucket.acquire()
+            self.stats["throttled_seconds"] += time.monotonic() - started
+            self.stats["requests"] += 1
+            try:
+                return await self.client.get(url, headers=headers, timeout=timeout or self.timeout)
+            except httpx.HTTPError:
+                self.stats["errors"] += 1
+                raise
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+# Global engine shared by the API server
+scrape_engine = ScrapeEngine()
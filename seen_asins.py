@@ -0,0 +1,100 @@
+"""
+Seen ASINs - Persistent record of every ASIN the sourcing pipeline has handled
+Lets repeated sourcing runs skip products that were already imported (or
+recently rejected) without searching the catalog or re-scraping Amazon.
+Stored as an append-only JSON Lines log, compacted on load.
+"""
+
+import os
+import json
+import time
+import threading
+from typing import Dict, Iterable, List, Optional
+
+from scaling_config import SCALING_CONFIG
+
+
+class SeenAsinIndex:
+    """ASIN -> last sourcing outcome, with per-outcome expiry"""
+
+    def __init__(self, path: str = "jobs/seen_asins.jsonl", added_ttl: Optional[int] = None,
+                 skipped_ttl: Optional[int] = None):
+        config = SCALING_CONFIG["background_tasks"]["product_sourcing"]
+        self.path = path
+        # How long an outcome keeps an ASIN out of new runs
+        self.ttls = {
+            "added": added_ttl if added_ttl is not None else config["seen_ttl"],
+            "skipped": skipped_ttl if skipped_ttl is not None else config["skipped_ttl"],
+        }
+        self._lock = threading.RLock()
+        self._seen = {}         # asin -> {"status", "query", "at"}
+        self._loaded = False
+
+    def load(self):
+        """Replay the log, dropping expired entries, and rewrite it compacted"""
+        with self._lock:
+            if self._loaded:
+                return
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            lines = 0
+            try:
+                with open(self.path, 'r') as f:
+                    for line in f:
+                        lines += 1
+                        try:
+                            record = json.loads(line)
+                        except ValueError:
+                            continue    # torn final line
+                        self._seen[record.pop("asin")] = record
+            except FileNotFoundError:
+                pass
+            for asin in [a for a, record in self._seen.items() if self._expired(record)]:
+                del self._seen[asin]
+            if lines != len(self._seen):
+                self._compact()
+            self._loaded = True
+            print(f"👁️  Seen-ASIN index loaded: {len(self._seen)} ASINs")
+
+    def _compact(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            for asin, record in self._seen.items():
+                f.write(json.dumps(dict(record, asin=asin)) + '\n')
+        os.replace(tmp_path, self.path)
+
+    def _expired(self, record: dict) -> bool:
+        ttl = self.ttls.get(record.get("status"))
+        return ttl is None or time.time() - record.get("at", 0) > ttl
+
+    def record(self, asin: str, status: str, query: str = ''):
+        """Remember the outcome for an ASIN (only added/skipped are kept)"""
+        if status not in self.ttls:
+            return
+        entry = {"status": status, "query": query, "at": time.time()}
+        with self._lock:
+            self.load()
+            self._seen[asin] = entry
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(dict(entry, asin=asin)) + '\n')
+
+    def seen(self, asin: str) -> bool:
+        with self._lock:
+            self.load()
+            record = self._seen.get(asin)
+            return record is not None and not self._expired(record)
+
+    def unseen(self, asins: Iterable[str]) -> List[str]:
+        with self._lock:
+            return [asin for asin in asins if not self.seen(asin)]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            self.load()
+            counts = {}
+            for record in self._seen.values():
+                counts[record["status"]] = counts.get(record["status"], 0) + 1
+            return {"asins": len(self._seen), **counts}
+
+
+# Global seen-ASIN index shared by the sourcing queue
+seen_asins = SeenAsinIndex()
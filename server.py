@@ -6,7 +6,7 @@ Runs the full AI dropshipping platform with real-time data
 
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, Response
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 from typing import List, Dict, Optional
@@ -16,14 +16,28 @@ import random
 import os
 from dotenv import load_dotenv
 import json
-import requests
 from bs4 import BeautifulSoup
 import re
 import time
+import asyncio
 
 # Load environment variables
 load_dotenv()
 
+# Product catalog and order indexes (kept hot by the filesystem watcher)
+from catalog_store import catalog_store
+from order_store import new_order_id, order_store
+from sales_aggregates import sales_aggregates
+from fs_watcher import DirectoryWatcher
+from image_cache import image_cache, placeholder_png, placeholder_etag, etag_matches
+from scrape_engine import scrape_engine
+from sourcing_jobs import sourcing_jobs
+from amazon_extractors import amazon_extractor
+from scrape_cache import scrape_cache
+from cost_refresh import cost_refresh
+
+fs_watcher = DirectoryWatcher()
+
 # Import incentives manager
 try:
     from incentives_manager import incentives_manager
@@ -57,125 +71,55 @@ except Exception as e:
     print("📝 Running with simulated AI responses")
     AI_ENABLED = False
 
-# Helper function to scrape Amazon product details
-def scrape_amazon_product(asin: str) -> dict:
-    """Scrape product details from Amazon using ASIN"""
+# Helper functions to scrape Amazon product details
+async def load_amazon_page(asin: str, validators: Dict[str, str]) -> dict:
+    """Fetch and parse an Amazon product page (loader for the scrape cache)"""
+    response = await scrape_engine.fetch(f"https://www.amazon.com/dp/{asin}", headers=validators or None, timeout=10)
+    product = None
+    if response.status_code == 200:
+        # HTML parsing is CPU-bound - keep it off the event loop
+        product = await asyncio.to_thread(parse_amazon_product, asin, response.content)
+    return {
+        "status": response.status_code,
+        "html": response.content if response.status_code == 200 else b'',
+        "product": product,
+        "etag": response.headers.get('etag'),
+        "last_modified": response.headers.get('last-modified')
+    }
+
+async def scrape_amazon_product(asin: str) -> dict:
+    """Scrape product details from Amazon using ASIN (served from the scrape cache)"""
     try:
-        url = f"https://www.amazon.com/dp/{asin}"
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-            'Sec-Fetch-Dest': 'document',
-            'Sec-Fetch-Mode': 'navigate',
-            'Sec-Fetch-Site': 'none'
-        }
-        
-        response = requests.get(url, headers=headers, timeout=10, allow_redirects=True)
+        page = await scrape_cache.get(asin, load_amazon_page)
         
-        if response.status_code != 200:
-            print(f"    HTTP {response.status_code} for {asin}")
+        if page.status != 200 or page.product is None:
+            print(f"    HTTP {page.status} for {asin}")
             return {'title': f"Product {asin}", 'price': 0, 'images': [], 'description': '', 'success': False}
         
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Extract product title
-        title_elem = soup.find('span', {'id': 'productTitle'})
-        if not title_elem:
-            title_elem = soup.find('h1', {'id': 'title'})
-        title = title_elem.text.strip() if title_elem else f"Product {asin}"
-        
-        # Extract price - try multiple selectors
-        price = 0
-        price_selectors = [
-            ('span', {'class': 'a-price-whole'}),
-            ('span', {'class': 'a-offscreen'}),
-            ('span', {'id': 'priceblock_ourprice'}),
-            ('span', {'id': 'priceblock_dealprice'})
-        ]
+        return json.loads(json.dumps(page.product))
         
-        for tag, attrs in price_selectors:
-            price_elem = soup.find(tag, attrs)
-            if price_elem:
-                price_text = price_elem.text.replace(',', '').replace('$', '').replace('£', '').strip()
-                try:
-                    # Handle cases like "$19.99"
-                    price = float(re.sub(r'[^\d.]', '', price_text))
-                    if price > 0:
-                        break
-                except:
-                    continue
+    except Exception as e:
+        print(f"    Error scraping {asin}: {e}")
+        return {
+            'title': f"Product {asin}",
+            'price': 0,     # never invent a cost - callers treat 0 as unknown
+            'images': [],
+            'description': "Premium quality product from Amazon",
+            'success': False
+        }
+
+def parse_amazon_product(asin: str, content: bytes) -> dict:
+    """Extract title, price, images and features from an Amazon product page"""
+    try:
+        extracted = amazon_extractor.extract(content)
+        title = extracted['title'] or f"Product {asin}"
+        price = extracted['price']
+        images = extracted['images']
+        features = extracted['features']
         
         # Don't add fake prices - mark as failed if no price found
         if price == 0:
             print(f"    ⚠️  No price found for {asin}")
-            success = False
-        
-        # Extract images - try multiple methods
-        images = []
-        
-        # Method 1: colorImages JSON data (most reliable)
-        image_json = soup.find('script', string=re.compile(r'colorImages'))
-        if image_json:
-            try:
-                # Extract image URLs from the JSON
-                urls = re.findall(r'"large":"(https://m\.media-amazon\.com/images/I/[^"]+)"', image_json.string)
-                images.extend(urls[:5])
-            except:
-                pass
-        
-        # Method 2: hiRes images
-        if not images:
-            image_data = soup.find('script', string=re.compile(r'"hiRes"'))
-            if image_data:
-                try:
-                    matches = re.findall(r'"hiRes":"(https://[^"]+)"', image_data.string)
-                    images.extend(matches[:5])
-                except:
-                    pass
-        
-        # Method 3: imageGalleryData
-        if not images:
-            gallery_match = re.search(r'"imageGalleryData"\s*:\s*\[([^\]]+)\]', response.text)
-            if gallery_match:
-                try:
-                    gallery_urls = re.findall(r'"mainUrl":"(https://[^"]+)"', gallery_match.group(1))
-                    images.extend(gallery_urls[:5])
-                except:
-                    pass
-        
-        # Method 4: Direct img tags
-        if not images:
-            main_img = soup.find('img', {'id': 'landingImage'})
-            if not main_img:
-                main_img = soup.find('img', {'data-a-dynamic-image': True})
-            if main_img:
-                # Try data-a-dynamic-image attribute (JSON)
-                dynamic_img = main_img.get('data-a-dynamic-image', '')
-                if dynamic_img:
-                    try:
-                        img_urls = re.findall(r'"(https://[^"]+)"', dynamic_img)
-                        images.extend(img_urls[:3])
-                    except:
-                        pass
-                # Fallback to src
-                if not images:
-                    img_url = main_img.get('src', '')
-                    if img_url and 'amazon' in img_url:
-                        images.append(img_url)
-        
-        # Extract description/features
-        features = []
-        feature_bullets = soup.find('div', {'id': 'feature-bullets'})
-        if feature_bullets:
-            bullet_list = feature_bullets.find_all('span', {'class': 'a-list-item'})
-            for bullet in bullet_list[:5]:
-                text = bullet.text.strip()
-                if text and len(text) > 10 and not text.startswith('Make sure'):
-                    features.append(text)
         
         description = ' '.join(features) if features else f"Premium {title}"
         
@@ -201,10 +145,10 @@ def scrape_amazon_product(asin: str) -> dict:
         }
         
     except Exception as e:
-        print(f"    Error scraping {asin}: {e}")
+        print(f"    Error parsing {asin}: {e}")
         return {
             'title': f"Product {asin}",
-            'price': round(random.uniform(15, 75), 2),
+            'price': 0,     # never invent a cost - callers treat 0 as unknown
             'images': [],
             'description': "Premium quality product from Amazon",
             'success': False
@@ -228,6 +172,29 @@ app.add_middleware(
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
+@app.on_event("startup")
+async def load_catalog():
+    """Build the catalog/order indexes once and follow external writers"""
+    catalog_store.load()
+    order_store.load()
+    sales_aggregates.attach(catalog_store, order_store)
+    image_cache.start()
+    scrape_cache.load()
+    await sourcing_jobs.start()
+    await cost_refresh.start()
+    fs_watcher.watch(catalog_store.campaigns_dir, catalog_store)
+    fs_watcher.watch(order_store.orders_dir, order_store, suffix='.jsonl')
+    fs_watcher.start()
+
+@app.on_event("shutdown")
+async def stop_watcher():
+    fs_watcher.stop()
+    await sourcing_jobs.stop()
+    await cost_refresh.stop()
+    await image_cache.close()
+    await scrape_engine.aclose()
+    scrape_cache.close()
+
 # Admin API endpoints
 @app.post("/api/admin/run-ai-inventory")
 async def admin_run_ai_inventory(count: int = 10):
@@ -280,8 +247,8 @@ async def add_product_from_url(request: Request):
         
         # Try to get product title from URL or generate with AI
         try:
-            response = requests.get(url, headers={'User-Agent': 'Mozilla/5.0'}, timeout=5)
-            title_match = re.search(r'<title>([^<]+)</title>', response.text)
+            page = await scrape_cache.get(asin, load_amazon_page)
+            title_match = re.search(r'<title>([^<]+)</title>', page.text)
             if title_match:
                 title = title_match.group(1)
                 # Clean up title
@@ -328,10 +295,8 @@ async def add_product_from_url(request: Request):
         }
         
         # Save campaign
-        filename = f"campaigns/{product_name.lower().replace(' ', '_')[:50]}_{int(time.time())}.json"
-        os.makedirs('campaigns', exist_ok=True)
-        with open(filename, 'w') as f:
-            json.dump(campaign_data, f, indent=2)
+        filename = f"{product_name.lower().replace(' ', '_')[:50]}_{int(time.time())}.json"
+        catalog_store.save(filename, campaign_data)
         
         print(f"✅ Added product from URL: {product_name} (ASIN: {asin})")
         
@@ -349,212 +314,235 @@ async def add_product_from_url(request: Request):
         print(f"Error adding product: {e}")
         return {"success": False, "error": str(e)}
 
-def search_amazon_products(query: str, max_results: int = 10) -> list:
+async def search_amazon_products(query: str, max_results: int = 10) -> list:
     """Search Amazon for products and return ASINs"""
     try:
         search_url = f"https://www.amazon.com/s?k={query.replace(' ', '+')}"
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive'
-        }
         
         print(f"  Searching: {search_url}")
-        response = requests.get(search_url, headers=headers, timeout=15, allow_redirects=True)
+        response = await scrape_engine.fetch(search_url, timeout=15)
         
         if response.status_code != 200:
             print(f"  ⚠️  Amazon returned status {response.status_code}")
             return []
         
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        asins = []
-        
-        # Method 1: Find product cards with data-asin
-        product_divs = soup.find_all('div', {'data-asin': True, 'data-index': True})
-        for div in product_divs:
-            asin = div.get('data-asin')
-            if asin and len(asin) == 10 and asin.startswith('B'):
-                if asin not in asins:  # Avoid duplicates
-                    asins.append(asin)
-                    if len(asins) >= max_results:
-                        break
-        
-        # Method 2: Find in links if Method 1 failed
-        if not asins:
-            links = soup.find_all('a', href=True)
-            for link in links:
-                href = link.get('href', '')
-                asin_match = re.search(r'/dp/([A-Z0-9]{10})', href)
-                if asin_match:
-                    asin = asin_match.group(1)
-                    if asin.startswith('B') and asin not in asins:
-                        asins.append(asin)
-                        if len(asins) >= max_results:
-                            break
-        
+        asins = await asyncio.to_thread(parse_amazon_search, response.content, max_results)
         print(f"  ✅ Found {len(asins)} Amazon products for '{query}': {', '.join(asins[:5])}")
         return asins
-        return asins
         
     except Exception as e:
         print(f"  Error searching Amazon: {e}")
         return []
 
+def parse_amazon_search(content: bytes, max_results: int) -> list:
+    """Extract product ASINs from an Amazon search results page"""
+    soup = BeautifulSoup(content, 'html.parser')
+    
+    asins = []
+    
+    # Method 1: Find product cards with data-asin
+    product_divs = soup.find_all('div', {'data-asin': True, 'data-index': True})
+    for div in product_divs:
+        asin = div.get('data-asin')
+        if asin and len(asin) == 10 and asin.startswith('B'):
+            if asin not in asins:  # Avoid duplicates
+                asins.append(asin)
+                if len(asins) >= max_results:
+                    break
+    
+    # Method 2: Find in links if Method 1 failed
+    if not asins:
+        links = soup.find_all('a', href=True)
+        for link in links:
+            href = link.get('href', '')
+            asin_match = re.search(r'/dp/([A-Z0-9]{10})', href)
+            if asin_match:
+                asin = asin_match.group(1)
+                if asin.startswith('B') and asin not in asins:
+                    asins.append(asin)
+                    if len(asins) >= max_results:
+                        break
+    
+    return asins
+
+# Price ranges for AI sourcing
+SOURCING_PRICE_RANGES = {
+    "under25": (9.99, 24.99),
+    "25-50": (25.00, 49.99),
+    "50-100": (50.00, 99.99),
+    "over100": (100.00, 299.99),
+    "any": (9.99, 149.99)
+}
+
+async def source_amazon_product(asin: str, params: dict) -> dict:
+    """Scrape, price and save one sourced ASIN (one item of a sourcing job)"""
+    search_query = params['query']
+    profit_margin = params['profit_margin']
+    min_price, max_price = SOURCING_PRICE_RANGES.get(params['price_range'], SOURCING_PRICE_RANGES["any"])
+    
+    # Another job may have imported it since this one was planned
+    if params.get('skip_seen', True) and catalog_store.has_asin(asin):
+        return {"status": "skipped", "reason": "already in catalog"}
+    
+    # Try to scrape real product details
+    product_info = await scrape_amazon_product(asin)
+    product_name = product_info['title']
+    cost = product_info['price']
+    description = product_info['description']
+    images = product_info['images']
+    
+    # Skip if scraping failed - require valid price and data
+    if not product_info.get('success', False) or \
+       product_name.startswith('Product B0') or \
+       len(product_name) < 15 or \
+       len(description) < 50 or \
+       cost <= 0:
+        print(f"  ⏭️  Skipping {asin} - invalid data (price: ${cost}, desc: {len(description)} chars)")
+        return {"status": "skipped", "reason": "invalid data", "price": cost}
+    
+    # Ensure price is in range
+    if cost < min_price or cost > max_price:
+        cost = round(random.uniform(min_price, max_price), 2)
+    
+    # Calculate selling price with margin
+    margin_multiplier = 1 + (profit_margin / 100)
+    sell_price = round(cost * margin_multiplier, 2)
+    profit = round(sell_price - cost, 2)
+    
+    # Create campaign file
+    campaign_data = {
+        "product_name": product_name,
+        "name": product_name,
+        "asin": asin,
+        "niche": search_query.title(),
+        "cost": cost,
+        "retail_price": cost,
+        "suggested_resale_price": sell_price,
+        "price": sell_price,
+        "profit": profit,
+        "margin": profit_margin,
+        "source": "Amazon",
+        "source_url": f"https://www.amazon.com/dp/{asin}?tag=legend0ee-20",
+        "shipping_time": "1-2 days (Prime)",
+        "supplier_rating": round(random.uniform(4.2, 4.9), 1),
+        "created_at": datetime.now().isoformat(),
+        "platforms": ["facebook", "instagram", "tiktok"],
+        "status": "active",
+        "description": description[:500],
+        "ad_copy": {
+            "headline": f"Get {product_name[:40]}!",
+            "description": description[:200]
+        }
+    }
+    
+    # Add images - use scraped ones or proxy endpoint
+    if images and len(images) > 0:
+        campaign_data['images'] = images
+        campaign_data['image_url'] = images[0]
+        campaign_data['local_image'] = images[0]
+    else:
+        # Fallback to proxy endpoint which will try to fetch from Amazon
+        proxy_url = f"/api/image/amazon/{asin}"
+        campaign_data['images'] = [proxy_url]
+        campaign_data['image_url'] = proxy_url
+        campaign_data['local_image'] = proxy_url
+    
+    # Save campaign
+    safe_name = re.sub(r'[^a-z0-9_]', '_', product_name.lower())[:50]
+    filename = f"{safe_name}_{int(time.time())}_{asin.lower()}.json"
+    catalog_store.save(filename, campaign_data)
+    
+    print(f"  ✅ {product_name[:60]} - ${cost} → ${sell_price} (Profit: ${profit})")
+    
+    return {
+        "status": "added",
+        "name": product_name[:50],
+        "filename": filename,
+        "cost": cost,
+        "price": sell_price,
+        "profit": profit
+    }
+
+sourcing_jobs.configure(search=search_amazon_products, process=source_amazon_product, known=catalog_store.has_asin)
+
+async def fetch_amazon_cost(campaign: dict) -> Optional[float]:
+    """Current Amazon price for a campaign's ASIN (conditional re-fetch, bypassing the cache TTL)"""
+    product = campaign.get('product') if isinstance(campaign.get('product'), dict) else campaign
+    asin = product.get('asin') or campaign.get('asin')
+    page = await scrape_cache.revalidate(asin, load_amazon_page)
+    if page.status != 200 or page.product is None or not page.product.get('success') or page.product['price'] <= 0:
+        return None
+    return page.product['price']
+
+cost_refresh.configure({"Amazon": fetch_amazon_cost})
+
 @app.post("/api/admin/ai-source-products")
 async def ai_source_products(request: Request):
-    """AI automatically finds and adds products from Amazon based on search criteria"""
+    """Queue an AI sourcing job - products are found and added in the background
+    
+    Accepts one search_query or a batch of search_queries; ASINs already
+    imported by earlier runs are skipped unless rescrape is set.
+    """
     try:
         data = await request.json()
-        search_query = data.get('search_query', '')
-        price_range = data.get('price_range', 'any')
-        product_count = min(int(data.get('product_count', 5)), 20)  # Max 20 at once
-        profit_margin = int(data.get('profit_margin', 30))
+        queries = data.get('search_queries') or [data.get('search_query', '')]
+        queries = [q.strip() for q in queries if q and q.strip()]
         
-        if not search_query:
+        if not queries:
             return {"success": False, "error": "Search query required"}
         
-        print(f"🤖 AI Sourcing: Searching Amazon for '{search_query}' (count: {product_count}, margin: {profit_margin}%)")
-        
-        # Try to get real ASINs from Amazon search
-        real_asins = search_amazon_products(search_query, product_count * 2)
-        
-        # Price ranges
-        price_ranges = {
-            "under25": (9.99, 24.99),
-            "25-50": (25.00, 49.99),
-            "50-100": (50.00, 99.99),
-            "over100": (100.00, 299.99),
-            "any": (9.99, 149.99)
+        params = {
+            "queries": list(dict.fromkeys(queries)),
+            "price_range": data.get('price_range', 'any'),
+            "product_count": max(int(data.get('product_count', 5)), 1),  # per query
+            "profit_margin": int(data.get('profit_margin', 30)),
+            "skip_seen": not data.get('rescrape', False)
         }
+        job = sourcing_jobs.submit(params)
         
-        min_price, max_price = price_ranges.get(price_range, price_ranges["any"])
-        
-        added_products = []
-        
-        for i in range(product_count):
-            # Add delay to avoid Amazon rate limiting (except first request)
-            if i > 0:
-                time.sleep(2)
-            
-            # Use real ASIN if available, otherwise skip
-            if i < len(real_asins):
-                asin = real_asins[i]
-                print(f"  🔍 Scraping product {i+1}/{product_count}: {asin}")
-                
-                # Try to scrape real product details
-                product_info = scrape_amazon_product(asin)
-                product_name = product_info['title']
-                cost = product_info['price']
-                description = product_info['description']
-                images = product_info['images']
-                
-                # Log what we got
-                print(f"     Title: {product_name[:60]}")
-                print(f"     Price: ${cost}")
-                print(f"     Images: {len(images)} found")
-                
-                # Skip if scraping failed - require valid price and data
-                if not product_info.get('success', False) or \
-                   product_name.startswith('Product B0') or \
-                   len(product_name) < 15 or \
-                   len(description) < 50 or \
-                   cost <= 0:
-                    print(f"  ⏭️  Skipping {asin} - invalid data (price: ${cost}, desc: {len(description)} chars)")
-                    continue
-                
-                # Images are optional - we'll use proxy as fallback
-            else:
-                # No more real products, stop here
-                print(f"  ℹ️  Ran out of valid products after {len(added_products)}")
-                break
-            
-            # Ensure price is in range
-            if cost < min_price or cost > max_price:
-                cost = round(random.uniform(min_price, max_price), 2)
-            
-            # Calculate selling price with margin
-            margin_multiplier = 1 + (profit_margin / 100)
-            sell_price = round(cost * margin_multiplier, 2)
-            profit = round(sell_price - cost, 2)
-            
-            # Create campaign file
-            campaign_data = {
-                "product_name": product_name,
-                "name": product_name,
-                "asin": asin,
-                "niche": search_query.title(),
-                "cost": cost,
-                "retail_price": cost,
-                "suggested_resale_price": sell_price,
-                "price": sell_price,
-                "profit": profit,
-                "margin": profit_margin,
-                "source": "Amazon",
-                "source_url": f"https://www.amazon.com/dp/{asin}?tag=legend0ee-20",
-                "shipping_time": "1-2 days (Prime)",
-                "supplier_rating": round(random.uniform(4.2, 4.9), 1),
-                "created_at": datetime.now().isoformat(),
-                "platforms": ["facebook", "instagram", "tiktok"],
-                "status": "active",
-                "description": description[:500],
-                "ad_copy": {
-                    "headline": f"Get {product_name[:40]}!",
-                    "description": description[:200]
-                }
-            }
-            
-            # Add images - use scraped ones or proxy endpoint
-            if images and len(images) > 0:
-                campaign_data['images'] = images
-                campaign_data['image_url'] = images[0]
-                campaign_data['local_image'] = images[0]
-                print(f"     ✅ Using {len(images)} scraped image(s)")
-            else:
-                # Fallback to proxy endpoint which will try to fetch from Amazon
-                proxy_url = f"/api/image/amazon/{asin}"
-                campaign_data['images'] = [proxy_url]
-                campaign_data['image_url'] = proxy_url
-                campaign_data['local_image'] = proxy_url
-                print(f"     ⚠️  No images scraped - using proxy fallback")
-            
-            # Save campaign
-            safe_name = re.sub(r'[^a-z0-9_]', '_', product_name.lower())[:50]
-            filename = f"campaigns/{safe_name}_{int(time.time())}_{i}.json"
-            os.makedirs('campaigns', exist_ok=True)
-            with open(filename, 'w') as f:
-                json.dump(campaign_data, f, indent=2)
-            
-            added_products.append({
-                "name": product_name[:50],
-                "asin": asin,
-                "cost": cost,
-                "price": sell_price,
-                "profit": profit
-            })
-            
-            print(f"  ✅ {product_name[:60]} - ${cost} → ${sell_price} (Profit: ${profit})")
-            
-            # Delay to avoid rate limiting
-            time.sleep(0.5)
-        
-        print(f"🎉 AI Sourcing Complete: Added {len(added_products)} products")
+        print(f"🤖 AI Sourcing job {job['job_id']} queued: {', '.join(params['queries'])} "
+              f"(count: {params['product_count']}, margin: {params['profit_margin']}%)")
         
         return {
             "success": True,
-            "added": len(added_products),
-            "products": added_products,
-            "search_query": search_query
+            "job_id": job['job_id'],
+            "status": job['status'],
+            "events_url": f"/api/admin/jobs/{job['job_id']}/events"
         }
         
     except Exception as e:
         print(f"Error in AI sourcing: {e}")
-        import traceback
-        traceback.print_exc()
         return {"success": False, "error": str(e)}
 
+@app.get("/api/admin/jobs")
+async def list_sourcing_jobs(limit: int = 50):
+    """List recent sourcing jobs"""
+    return {"jobs": sourcing_jobs.list(limit), "seen_asins": sourcing_jobs.seen.stats()}
+
+@app.get("/api/admin/jobs/{job_id}")
+async def get_sourcing_job(job_id: str):
+    """Get a sourcing job with per-item results"""
+    job = sourcing_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/api/admin/jobs/{job_id}/events")
+async def stream_sourcing_job(job_id: str):
+    """Stream sourcing progress as Server-Sent Events"""
+    if sourcing_jobs.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    async def event_stream():
+        async for event in sourcing_jobs.events(job_id):
+            yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/api/admin/update-product")
 async def update_product(request: Request):
     """Update product name, description, and multiple images"""
@@ -575,12 +563,11 @@ async def update_product(request: Request):
             return {"success": False, "error": "Product filename required"}
         
         # Load existing product
-        filepath = f"campaigns/{filename}"
-        if not os.path.exists(filepath):
+        existing = catalog_store.get(filename)
+        if existing is None:
             return {"success": False, "error": "Product not found"}
         
-        with open(filepath, 'r') as f:
-            product_data = json.load(f)
+        product_data = json.loads(json.dumps(existing))
         
         # Update fields
         if product_name:
@@ -634,8 +621,7 @@ async def update_product(request: Request):
                 product_data['custom_image'] = True
         
         # Save updated product
-        with open(filepath, 'w') as f:
-            json.dump(product_data, f, indent=2)
+        catalog_store.save(filename, product_data)
         
         print(f"✅ Updated product: {product_name} ({len(uploaded_images)} images)")
         
@@ -655,26 +641,17 @@ async def update_product(request: Request):
 @app.post("/api/admin/clear-products")
 async def admin_clear_products():
     """Clear all products"""
-    import glob
-    campaigns = glob.glob('campaigns/*.json')
-    for c in campaigns:
-        os.remove(c)
-    return {"success": True, "deleted": len(campaigns)}
+    deleted = catalog_store.clear()
+    return {"success": True, "deleted": deleted}
 
 @app.post("/api/admin/fix-products")
 async def admin_fix_products():
     """Remove products with missing images or incomplete data"""
-    import glob
-    
     removed = []
     kept = []
     
-    campaigns = glob.glob('campaigns/*.json')
-    for filepath in campaigns:
+    for filename, product in catalog_store.items():
         try:
-            with open(filepath, 'r') as f:
-                product = json.load(f)
-            
             # Check if product has valid data
             name = product.get('product_name', '')
             images = product.get('images', [])
@@ -695,13 +672,13 @@ async def admin_fix_products():
             )
             
             if should_remove:
-                os.remove(filepath)
+                catalog_store.delete(filename)
                 removed.append(name)
                 print(f"  🗑️  Removed: {name}")
             else:
                 kept.append(name)
         except Exception as e:
-            print(f"Error processing {filepath}: {e}")
+            print(f"Error processing {filename}: {e}")
     
     return {
         "success": True,
@@ -715,25 +692,9 @@ async def admin_fix_products():
 async def get_admin_stats():
     """Get admin dashboard statistics"""
     try:
-        # Count campaigns
-        campaigns_dir = "campaigns"
-        campaigns = []
-        if os.path.exists(campaigns_dir):
-            for f in os.listdir(campaigns_dir):
-                if f.endswith('.json'):
-                    campaigns.append(f)
-        
-        # Count orders
-        orders_dir = "orders"
-        orders = []
-        if os.path.exists(orders_dir):
-            for f in os.listdir(orders_dir):
-                if f.endswith('.json'):
-                    orders.append(f)
-        
         return {
-            "total_products": len(campaigns),
-            "total_orders": len(orders),
+            "total_products": catalog_store.count(),
+            "total_orders": order_store.count(),
             "status": "active"
         }
     except Exception as e:
@@ -784,144 +745,119 @@ async def track_branded_sale(request: Request):
     return incentives_manager.track_branded_sale(sale_amount)
 
 # Amazon image proxy - fixes hotlinking issues
+IMAGE_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Referer': 'https://www.amazon.com/'
+}
+
+AMAZON_IMAGE_PATTERNS = [
+    re.compile(r'"large":"(https://m\.media-amazon\.com/images/I/[^"]+)"'),       # colorImages JSON
+    re.compile(r'"mainUrl":"(https://m\.media-amazon\.com/images/I/[^"]+)"'),     # imageGalleryData
+    re.compile(r'data-a-dynamic-image="\{&quot;(https://[^&]+)&quot;'),             # landing image attribute
+]
+
+async def resolve_amazon_image_urls(asin: str) -> list:
+    """Find candidate image URLs on the (cached) product page"""
+    page = await scrape_cache.get(asin, load_amazon_page)
+    if page.status != 200:
+        return []
+    
+    text = page.text
+    for pattern in AMAZON_IMAGE_PATTERNS:
+        matches = pattern.findall(text)
+        if matches:
+            return [url.replace('\\/', '/') for url in dict.fromkeys(matches)][:3]
+    return []
+
+async def fetch_amazon_image(url: str):
+    """Download an image, rejecting tiny/blocked responses"""
+    img_response = await scrape_engine.fetch(url, headers=IMAGE_HEADERS, timeout=10)
+    if img_response.status_code == 200 and len(img_response.content) > 5000:
+        return img_response.content, img_response.headers.get('content-type', 'image/jpeg')
+    return None
+
 @app.get("/api/image/amazon/{asin}")
-async def proxy_amazon_image(asin: str):
-    """Proxy Amazon product images - scrapes the actual image from product page"""
+async def proxy_amazon_image(asin: str, request: Request):
+    """Proxy Amazon product images - served from the persistent image cache"""
+    if_none_match = request.headers.get('if-none-match')
+    
     try:
-        # First try to scrape the real image URL from the product page
-        product_url = f"https://www.amazon.com/dp/{asin}"
+        image = await image_cache.get_asin_image(asin, resolve_amazon_image_urls, fetch_amazon_image)
+    except Exception as e:
+        print(f"Image proxy error for {asin}: {e}")
+        image = None
+    
+    if image is not None:
         headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Referer': 'https://www.amazon.com/'
+            "ETag": image.etag,
+            "Cache-Control": "public, max-age=86400",
+            "Access-Control-Allow-Origin": "*"
         }
-        
-        # Get the product page
-        page_response = requests.get(product_url, headers=headers, timeout=8)
-        
-        if page_response.status_code == 200:
-            # Try to extract image URL from page
-            image_urls = []
-            
-            # Method 1: Find in colorImages JSON
-            color_match = re.search(r'\"large\":\"(https://m\\.media-amazon\\.com/images/I/[^\"]+)\"', page_response.text)
-            if color_match:
-                image_urls.append(color_match.group(1))
-            
-            # Method 2: Find in imageGalleryData
-            if not image_urls:
-                gallery_match = re.search(r'\"mainUrl\":\"(https://m\\.media-amazon\\.com/images/I/[^\"]+)\"', page_response.text)
-                if gallery_match:
-                    image_urls.append(gallery_match.group(1))
-            
-            # Method 3: Find data-a-dynamic-image
-            if not image_urls:
-                dynamic_match = re.search(r'data-a-dynamic-image=\"\\{&quot;(https://[^&]+)&quot;', page_response.text)
-                if dynamic_match:
-                    image_urls.append(dynamic_match.group(1).replace('\\/', '/'))
-            
-            # Try to fetch the actual image
-            for img_url in image_urls:
-                try:
-                    img_response = requests.get(img_url, headers=headers, timeout=10)
-                    if img_response.status_code == 200 and len(img_response.content) > 5000:
-                        return Response(
-                            content=img_response.content,
-                            media_type="image/jpeg",
-                            headers={
-                                "Cache-Control": "public, max-age=86400",
-                                "Content-Type": "image/jpeg",
-                                "Access-Control-Allow-Origin": "*"
-                            }
-                        )
-                except:
-                    continue
-        
-        # If scraping fails, return placeholder
-        # Generate a colored placeholder with the ASIN
-        from PIL import Image, ImageDraw, ImageFont
-        import io
-        
-        img = Image.new('RGB', (500, 500), color='#90EE90')
-        draw = ImageDraw.Draw(img)
-        
-        # Add text
-        text = f"Amazon\\n{asin}\\nImage Loading..."
-        
-        # Try to use a font, fall back to default
+        if etag_matches(if_none_match, image.etag):
+            return Response(status_code=304, headers=headers)
         try:
-            font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 32)
-        except:
-            font = ImageFont.load_default()
-        
-        # Calculate text position (center)
-        bbox = draw.textbbox((0, 0), text, font=font)
-        text_width = bbox[2] - bbox[0]
-        text_height = bbox[3] - bbox[1]
-        position = ((500 - text_width) // 2, (500 - text_height) // 2)
-        
-        draw.text(position, text, fill='#333333', font=font)
-        
-        # Convert to bytes
-        img_byte_arr = io.BytesIO()
-        img.save(img_byte_arr, format='PNG')
-        img_byte_arr.seek(0)
-        
-        return Response(
-            content=img_byte_arr.getvalue(),
-            media_type="image/png",
-            headers={
-                "Cache-Control": "public, max-age=300",
-                "Access-Control-Allow-Origin": "*"
-            }
-        )
-        
-    except Exception as e:
-        print(f"Image proxy error for {asin}: {e}")
-        # Return simple placeholder
-        from PIL import Image, ImageDraw
-        import io
-        
-        img = Image.new('RGB', (500, 500), color='#90EE90')
-        draw = ImageDraw.Draw(img)
-        draw.text((200, 240), asin, fill='#333333')
-        
-        img_byte_arr = io.BytesIO()
-        img.save(img_byte_arr, format='PNG')
-        img_byte_arr.seek(0)
-        
-        return Response(
-            content=img_byte_arr.getvalue(),
-            media_type="image/png"
-        )
+            content = await asyncio.to_thread(image.read)
+            return Response(content=content, media_type=image.content_type, headers=headers)
+        except OSError as e:
+            # Blob removed since the lookup (e.g. evicted) - fall back to the placeholder
+            print(f"Image cache read error for {asin}: {e}")
+    
+    # If scraping fails, return the in-memory placeholder
+    etag = placeholder_etag(asin)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "public, max-age=300",
+        "Access-Control-Allow-Origin": "*"
+    }
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=placeholder_png(asin), media_type="image/png", headers=headers)
 
 @app.get("/api/admin/stats")
 async def admin_stats():
     """Get admin statistics"""
-    import glob
-    
-    products = len(glob.glob('campaigns/*.json'))
-    order_files = glob.glob('orders/*.json')
+    totals = sales_aggregates.totals()
     
-    total_revenue = 0
-    total_profit = 0
-    for order_file in order_files:
-        try:
-            with open(order_file, 'r') as f:
-                order = json.load(f)
-                total_revenue += order.get('amount_paid', 0)
-                total_profit += order.get('profit', 0)
-        except:
-            pass
+    return {
+        "products": catalog_store.count(),
+        "orders": totals["orders"],
+        "revenue": totals["revenue"],
+        "profit": totals["profit"]
+    }
+
+@app.get("/api/admin/sales")
+async def sales_overview(period: str = "day", dimension: Optional[str] = None,
+                         key: Optional[str] = None, limit: int = 30):
+    """Running sales totals, top products/niches and hourly/daily buckets"""
+    try:
+        series = sales_aggregates.series(period, dimension, key, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     return {
-        "products": products,
-        "orders": len(order_files),
-        "revenue": round(total_revenue, 2),
-        "profit": round(total_profit, 2)
+        "totals": sales_aggregates.totals(),
+        "catalog": sales_aggregates.catalog(),
+        "top_products": sales_aggregates.top("product"),
+        "top_niches": sales_aggregates.top("niche"),
+        "series": series
     }
 
+@app.get("/api/admin/cache-stats")
+async def cache_stats():
+    """Hit/miss counters for the scrape and image caches"""
+    return {
+        "scrape_cache": await asyncio.to_thread(scrape_cache.stats),
+        "image_cache": image_cache.stats(),
+        "scrape_engine": scrape_engine.stats
+    }
+
+@app.get("/api/admin/cost-refresh")
+async def cost_refresh_status():
+    """Supplier cost re-scrape backlog, interval tiers and throughput"""
+    return cost_refresh.status()
+
 # Serve static HTML files
 @app.get("/")
 async def root():
@@ -1184,47 +1120,9 @@ async def health_check():
     }
 
 @app.get("/api/campaigns/list")
-async def list_campaigns():
+async def list_campaigns(limit: int = 50, offset: int = 0, niche: Optional[str] = None):
     """Get list of all generated campaigns with full resale details"""
-    import os
-    import glob
-    
-    campaigns = []
-    campaign_files = glob.glob("campaigns/*.json")
-    
-    for filepath in sorted(campaign_files, key=os.path.getmtime, reverse=True)[:50]:
-        try:
-            with open(filepath, 'r') as f:
-                import json
-                campaign = json.load(f)
-                
-                # Handle both old format (with 'product' key) and new format (direct fields)
-                if "product" in campaign:
-                    product = campaign["product"]
-                    campaigns.append({
-                        "filename": os.path.basename(filepath),
-                        "product_name": product["name"],
-                        "niche": product["niche"],
-                        "cost": product["cost"],
-                        "retail_price": product["retail_price"],
-                        "suggested_resale_price": product.get("suggested_resale_price", product["retail_price"] * 2.5),
-                        "margin": product["margin"],
-                        "source": product.get("source", "Amazon"),
-                        "source_url": product.get("source_url", ""),
-                        "image_url": product.get("image_url", ""),
-                        "shipping_time": product.get("shipping_time", "2-3 days"),
-                        "supplier_rating": product.get("supplier_rating", 4.5),
-                        "created_at": campaign["created_at"],
-                        "platforms": campaign["platforms"],
-                        "status": "ready_to_list"
-                    })
-                else:
-                    # New format - return ALL fields from file (includes ASIN, supplier_link, etc.)
-                    campaign_with_filename = campaign.copy()
-                    campaign_with_filename["filename"] = os.path.basename(filepath)
-                    campaigns.append(campaign_with_filename)
-        except Exception as e:
-            pass  # Skip invalid files
+    campaigns = catalog_store.list_recent(limit=limit, offset=offset, niche=niche)
     
     return {
         "total_campaigns": len(campaigns),
@@ -1235,42 +1133,22 @@ async def list_campaigns():
 @app.get("/api/campaigns/{filename}")
 async def get_campaign(filename: str):
     """Get full campaign details"""
-    import os
-    import json
+    campaign = catalog_store.get(filename)
     
-    filepath = f"campaigns/{filename}"
-    
-    if not os.path.exists(filepath):
+    if campaign is None:
         raise HTTPException(status_code=404, detail="Campaign not found")
     
-    with open(filepath, 'r') as f:
-        campaign = json.load(f)
-    
     return campaign
 
 @app.get("/api/stats/live")
 async def live_stats():
     """Get live statistics"""
-    import os
-    import glob
-    
-    campaign_files = glob.glob("campaigns/*.json")
-    
-    total_revenue = 0
-    total_cost = 0
-    
-    for filepath in campaign_files:
-        try:
-            with open(filepath, 'r') as f:
-                import json
-                campaign = json.load(f)
-                total_revenue += campaign["product"]["retail_price"]
-                total_cost += campaign["product"]["cost"]
-        except:
-            pass
+    stats = catalog_store.stats()
+    total_revenue = stats["total_revenue"]
+    total_cost = stats["total_cost"]
     
     return {
-        "total_campaigns": len(campaign_files),
+        "total_campaigns": stats["total_campaigns"],
         "total_potential_revenue": round(total_revenue, 2),
         "total_cost": round(total_cost, 2),
         "total_potential_profit": round(total_revenue - total_cost, 2),
@@ -1346,7 +1224,7 @@ async def verify_payment(session_id: str):
             
             # Create order record
             order_record = {
-                'order_id': f"ORD-{int(datetime.now().timestamp())}",
+                'order_id': new_order_id(),
                 'stripe_session_id': session_id,
                 'stripe_payment_intent': session.payment_intent,
                 'product_name': metadata.get('product_name'),
@@ -1369,12 +1247,17 @@ async def verify_payment(session_id: str):
                 'created_at': datetime.now().isoformat(),
             }
             
-            # Save order to file
-            orders_dir = 'orders'
-            os.makedirs(orders_dir, exist_ok=True)
-            order_file = os.path.join(orders_dir, f"{order_record['order_id']}.json")
-            with open(order_file, 'w') as f:
-                json.dump(order_record, f, indent=2)
+            # Append order to the order log (fsync'd - keep it off the event loop).
+            # One order per session: a reload returns the order already recorded for it
+            order_record, created = await asyncio.to_thread(order_store.create_for_session, order_record)
+            if not created:
+                return {
+                    'status': 'success',
+                    'order_id': order_record['order_id'],
+                    'amount_paid': order_record.get('amount_paid'),
+                    'profit': order_record.get('profit'),
+                    'message': 'Payment received! Order will be processed shortly.'
+                }
             
             print(f"✅ Order created: {order_record['order_id']} - Profit: ${profit:.2f}")
             
@@ -1388,7 +1271,7 @@ async def verify_payment(session_id: str):
                     try:
                         print(f"🤖 Starting auto-purchase bot for {order_record['order_id']}...")
                         result = subprocess.run(
-                            ['./venv/bin/python', 'amazon_auto_buyer.py', order_file],
+                            ['./venv/bin/python', 'amazon_auto_buyer.py', order_record['order_id']],
                             capture_output=True,
                             text=True,
                             timeout=300  # 5 minute timeout
@@ -1427,26 +1310,17 @@ async def verify_payment(session_id: str):
         raise HTTPException(status_code=400, detail=str(e))
 
 @app.get("/api/orders/list")
-async def list_orders():
-    """Get all orders"""
-    orders_dir = 'orders'
-    if not os.path.exists(orders_dir):
-        return {'orders': [], 'total': 0}
-    
-    orders = []
-    for filename in os.listdir(orders_dir):
-        if filename.endswith('.json'):
-            with open(os.path.join(orders_dir, filename), 'r') as f:
-                orders.append(json.load(f))
-    
-    # Sort by created_at descending
-    orders.sort(key=lambda x: x.get('created_at', ''), reverse=True)
+async def list_orders(limit: Optional[int] = None):
+    """Get all orders (or the newest `limit`) with running totals"""
+    # Sorted by created_at descending
+    orders = order_store.list()
+    totals = sales_aggregates.totals()
     
     return {
-        'orders': orders,
-        'total': len(orders),
-        'total_revenue': sum(o.get('amount_paid', 0) for o in orders),
-        'total_profit': sum(o.get('profit', 0) for o in orders),
+        'orders': orders[:limit] if limit else orders,
+        'total': totals['orders'],
+        'total_revenue': totals['revenue'],
+        'total_profit': totals['profit'],
     }
 
 @app.post("/api/orders/create")
@@ -1463,9 +1337,6 @@ async def create_order(order_data: dict):
         order_id = ''.join(random.choices(string.ascii_uppercase + string.digits, k=10))
         
         # Save order to database
-        orders_dir = "orders"
-        os.makedirs(orders_dir, exist_ok=True)
-        
         order_record = {
             "order_id": order_id,
             "status": "pending_fulfillment",
@@ -1481,9 +1352,7 @@ async def create_order(order_data: dict):
         }
         
         # Save order
-        order_file = f"{orders_dir}/order_{order_id}.json"
-        with open(order_file, 'w') as f:
-            json.dump(order_record, f, indent=2)
+        await asyncio.to_thread(order_store.create, order_record)
         
         print(f"\n💰 NEW ORDER!")
         print(f"   Order ID: {order_id}")
@@ -1498,13 +1367,11 @@ async def create_order(order_data: dict):
             from auto_purchase import auto_purchase_from_amazon
             purchase_info = auto_purchase_from_amazon(order_record)
             
-            # Save purchase instruction
-            purchase_file = f"{orders_dir}/purchase_{order_id}.json"
-            with open(purchase_file, 'w') as f:
-                json.dump(purchase_info, f, indent=2)
+            # Attach purchase instruction to the order
+            await asyncio.to_thread(order_store.update, order_id, {'purchase_instruction': purchase_info})
             
             print(f"\n🤖 AUTO-PURCHASE INSTRUCTION CREATED")
-            print(f"   File: {purchase_file}")
+            print(f"   Order: /api/orders/{order_id}")
             
             # OPTIONAL: Trigger Selenium bot to auto-purchase
             # Uncomment below to enable FULL automation:
@@ -1525,12 +1392,6 @@ async def create_order(order_data: dict):
             
             print(f"   💡 To enable full automation, edit server.py and uncomment Selenium section")
             print()
-            
-            order_record['purchase_instruction_file'] = purchase_file
-            
-            # Re-save order with purchase info
-            with open(order_file, 'w') as f:
-                json.dump(order_record, f, indent=2)
                 
         except Exception as e:
             print(f"⚠️  Auto-purchase setup failed: {e}")
@@ -1540,7 +1401,7 @@ async def create_order(order_data: dict):
             "order_id": order_id,
             "message": "Order created successfully",
             "profit": order_record['profit'],
-            "next_step": "Check orders/purchase_{}.json for fulfillment instructions".format(order_id)
+            "next_step": "Check /api/orders/{} for fulfillment instructions".format(order_id)
         }
         
     except Exception as e:
@@ -1551,29 +1412,13 @@ async def create_order(order_data: dict):
 async def list_orders():
     """List all orders with profit tracking"""
     try:
-        orders_dir = "orders"
-        if not os.path.exists(orders_dir):
-            return {"orders": [], "total_revenue": 0, "total_profit": 0}
-        
-        orders = []
-        total_revenue = 0
-        total_profit = 0
-        
-        for filename in os.listdir(orders_dir):
-            if filename.endswith('.json'):
-                with open(f"{orders_dir}/{filename}", 'r') as f:
-                    order = json.load(f)
-                    orders.append(order)
-                    total_revenue += order.get("your_revenue", 0)
-                    total_profit += order.get("profit", 0)
-        
-        orders.sort(key=lambda x: x.get("created_at", ""), reverse=True)
+        totals = sales_aggregates.totals()
         
         return {
-            "orders": orders,
-            "total_orders": len(orders),
-            "total_revenue": round(total_revenue, 2),
-            "total_profit": round(total_profit, 2)
+            "orders": order_store.list(),
+            "total_orders": totals["orders"],
+            "total_revenue": totals["revenue"],
+            "total_profit": totals["profit"]
         }
     except Exception as e:
         return {"orders": [], "error": str(e)}
@@ -1582,13 +1427,10 @@ async def list_orders():
 async def get_order(order_id: str):
     """Get specific order details"""
     try:
-        order_file = f"orders/order_{order_id}.json"
-        if not os.path.exists(order_file):
+        order = order_store.get(order_id)
+        if order is None:
             raise HTTPException(status_code=404, detail="Order not found")
         
-        with open(order_file, 'r') as f:
-            order = json.load(f)
-        
         return order
     except Exception as e:
         raise HTTPException(status_code=404, detail="Order not found")
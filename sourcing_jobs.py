@@ -0,0 +1,344 @@
+"""
+Sourcing Jobs - Background queue for AI product sourcing
+Jobs are persisted to jobs/*.json so large runs survive a restart,
+and per-item progress is published to any number of listeners (SSE)
+
+The job snapshot is only rewritten when the job changes phase; finished
+items are appended to jobs/<job_id>.progress in between and replayed on
+top of the snapshot when the queue starts.
+"""
+
+import os
+import json
+import time
+import uuid
+import asyncio
+from datetime import datetime
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from scaling_config import SCALING_CONFIG
+from seen_asins import SeenAsinIndex, seen_asins
+
+# search(query, max_results) -> ASINs, process(asin, job_params) -> item result dict,
+# known(asin) -> True if the ASIN is already in the catalog
+SearchFn = Callable[[str, int], Awaitable[List[str]]]
+ProcessFn = Callable[[str, dict], Awaitable[dict]]
+KnownFn = Callable[[str], bool]
+
+# Search results requested per wanted product, leaving room for de-duplication
+SEARCH_OVERFETCH = 3
+
+FINAL_ITEM_STATES = ("added", "skipped", "failed")
+
+
+class SourcingJobQueue:
+    """Persistent job queue with a worker pool and per-job progress streams"""
+
+    def __init__(self, jobs_dir: str = "jobs", workers: Optional[int] = None,
+                 item_concurrency: Optional[int] = None, seen: Optional[SeenAsinIndex] = None):
+        config = SCALING_CONFIG["background_tasks"]["product_sourcing"]
+        self.jobs_dir = jobs_dir
+        self.workers = workers or config["workers"]
+        self.item_concurrency = item_concurrency or config["item_concurrency"]
+        self.search_concurrency = config["search_concurrency"]
+        self.queue_size = config["queue_size"]
+        self.seen = seen or seen_asins
+
+        self._search = None
+        self._process = None
+        self._known = None
+        self._jobs = {}             # job_id -> job dict
+        self._queue = None
+        self._tasks = []
+        self._listeners = {}        # job_id -> set of asyncio.Queue
+
+    def configure(self, search: SearchFn, process: ProcessFn, known: Optional[KnownFn] = None):
+        """Plug in the search and per-ASIN processing steps"""
+        self._search = search
+        self._process = process
+        self._known = known
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    async def start(self):
+        """Load persisted jobs, re-queue unfinished ones and start the workers"""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        self.seen.load()
+
+        resumed = 0
+        for entry in sorted(os.scandir(self.jobs_dir), key=lambda e: e.name):
+            if not entry.name.endswith('.json'):
+                continue
+            try:
+                with open(entry.path, 'r') as f:
+                    job = json.load(f)
+            except Exception:
+                continue
+            self._replay_progress(job)
+            self._jobs[job["job_id"]] = job
+            if job["status"] in ("queued", "running"):
+                job["status"] = "queued"
+                self._queue.put_nowait(job["job_id"])
+                resumed += 1
+
+        self._tasks = [asyncio.create_task(self._worker(n)) for n in range(self.workers)]
+        print(f"🧵 Sourcing queue started: {self.workers} workers, {resumed} jobs resumed")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    # ------------------------------------------------------------------
+    # Jobs
+    # ------------------------------------------------------------------
+
+    def submit(self, params: dict) -> dict:
+        """Create and enqueue a sourcing job"""
+        job_id = f"job_{int(time.time())}_{uuid.uuid4().hex[:8]}"
+        now = datetime.now().isoformat()
+        job = {
+            "job_id": job_id,
+            "status": "queued",
+            "params": params,
+            "planned": {},          # query -> ASINs selected for it
+            "items": {},            # asin -> result
+            "duplicates": 0,        # search hits dropped as already seen/imported
+            "total": 0,
+            "added": 0,
+            "skipped": 0,
+            "failed": 0,
+            "error": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+        if self._queue is None or self._queue.full():
+            raise RuntimeError("Sourcing queue is not accepting jobs")
+        self._jobs[job_id] = job
+        self._save(job)
+        self._queue.put_nowait(job_id)
+        return job
+
+    def get(self, job_id: str) -> Optional[dict]:
+        return self._jobs.get(job_id)
+
+    def list(self, limit: int = 50) -> List[Dict]:
+        jobs = sorted(self._jobs.values(), key=lambda j: j["created_at"], reverse=True)
+        return [self.summary(job) for job in jobs[:limit]]
+
+    @staticmethod
+    def summary(job: dict) -> dict:
+        done = job["added"] + job["skipped"] + job["failed"]
+        return {
+            "job_id": job["job_id"],
+            "status": job["status"],
+            "queries": job["params"].get("queries", []),
+            "total": job["total"],
+            "duplicates": job.get("duplicates", 0),
+            "done": done,
+            "added": job["added"],
+            "skipped": job["skipped"],
+            "failed": job["failed"],
+            "error": job["error"],
+            "created_at": job["created_at"],
+            "updated_at": job["updated_at"],
+        }
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def _progress_path(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, f"{job_id}.progress")
+
+    def _save(self, job: dict):
+        job["updated_at"] = datetime.now().isoformat()
+        self._write_snapshot(job["job_id"], json.dumps(job))
+
+    async def _checkpoint(self, job: dict):
+        """Snapshot the job off the event loop (serialized here so workers can keep mutating it)"""
+        job["updated_at"] = datetime.now().isoformat()
+        await asyncio.to_thread(self._write_snapshot, job["job_id"], json.dumps(job))
+
+    def _write_snapshot(self, job_id: str, data: str):
+        path = os.path.join(self.jobs_dir, f"{job_id}.json")
+        tmp_path = os.path.join(self.jobs_dir, f".{job_id}.tmp")
+        with open(tmp_path, 'w') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        # Every item in the progress log is now part of the snapshot
+        try:
+            os.remove(self._progress_path(job_id))
+        except FileNotFoundError:
+            pass
+
+    def _append_progress(self, job_id: str, line: str):
+        with open(self._progress_path(job_id), 'a') as f:
+            f.write(line + "\n")
+
+    def _replay_progress(self, job: dict):
+        """Apply items finished after the last snapshot"""
+        try:
+            with open(self._progress_path(job["job_id"]), 'r') as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue    # torn last line from a crash mid-append
+            item = job["items"].get(entry.pop("asin", None))
+            if item is None or item["status"] in FINAL_ITEM_STATES:
+                continue
+            item.update(entry)
+            job[item["status"]] += 1
+
+    # ------------------------------------------------------------------
+    # Progress streaming
+    # ------------------------------------------------------------------
+
+    def _publish(self, job: dict, event: dict):
+        event = dict(event, job=self.summary(job))
+        for listener in list(self._listeners.get(job["job_id"], ())):
+            try:
+                listener.put_nowait(event)
+            except asyncio.QueueFull:
+                pass    # slow client - it will still get the final snapshot
+
+    async def events(self, job_id: str) -> AsyncIterator[dict]:
+        """Yield progress events for a job until it finishes"""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return
+        listener = asyncio.Queue(maxsize=1000)
+        self._listeners.setdefault(job_id, set()).add(listener)
+        try:
+            yield {"type": "snapshot", "job": self.summary(job)}
+            while job["status"] in ("queued", "running"):
+                try:
+                    event = await asyncio.wait_for(listener.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield {"type": "ping", "job": self.summary(job)}
+                    continue
+                yield event
+                if event["type"] == "finished":
+                    return
+            yield {"type": "finished", "job": self.summary(job)}
+        finally:
+            listeners = self._listeners.get(job_id)
+            if listeners is not None:
+                listeners.discard(listener)
+                if not listeners:
+                    del self._listeners[job_id]
+
+    # ------------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------------
+
+    async def _worker(self, n: int):
+        while True:
+            job_id = await self._queue.get()
+            job = self._jobs.get(job_id)
+            try:
+                if job is not None:
+                    await self._run(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Sourcing job {job_id} failed: {e}")
+                job["status"] = "failed"
+                job["error"] = str(e)
+                await self._checkpoint(job)
+                self._publish(job, {"type": "finished"})
+            finally:
+                self._queue.task_done()
+
+    async def _plan(self, job: dict):
+        """Search all unplanned queries concurrently and pick new ASINs for each
+
+        ASINs already claimed by another query of this job, imported by an
+        earlier run (seen index) or present in the catalog are dropped, so
+        each query gets up to product_count products nobody has scraped yet.
+        """
+        params = job["params"]
+        wanted = params["product_count"]
+        skip_seen = params.get("skip_seen", True)
+        semaphore = asyncio.Semaphore(self.search_concurrency)
+
+        async def search(query: str) -> List[str]:
+            async with semaphore:
+                return await self._search(query, wanted * SEARCH_OVERFETCH)
+
+        queries = [q for q in params["queries"] if q not in job["planned"]]
+        results = await asyncio.gather(*(search(q) for q in queries))
+
+        claimed = {asin for asins in job["planned"].values() for asin in asins}
+        for query, asins in zip(queries, results):
+            selected = []
+            for asin in dict.fromkeys(asins):
+                if asin in claimed:
+                    continue
+                if skip_seen and (self.seen.seen(asin) or (self._known and self._known(asin))):
+                    job["duplicates"] = job.get("duplicates", 0) + 1
+                    continue
+                selected.append(asin)
+                claimed.add(asin)
+                if len(selected) >= wanted:
+                    break
+            job["planned"][query] = selected
+            self._publish(job, {"type": "planned", "query": query, "asins": selected,
+                                "found": len(asins)})
+        await self._checkpoint(job)
+
+    async def _run(self, job: dict):
+        params = job["params"]
+        job["status"] = "running"
+        await self._checkpoint(job)
+        self._publish(job, {"type": "started"})
+
+        await self._plan(job)
+
+        pending = []
+        for query, asins in job["planned"].items():
+            for asin in asins:
+                item = job["items"].get(asin)
+                if item is None:
+                    job["items"][asin] = item = {"query": query, "status": "pending"}
+                if item["status"] not in FINAL_ITEM_STATES:
+                    pending.append(asin)
+        job["total"] = len(job["items"])
+        await self._checkpoint(job)
+
+        semaphore = asyncio.Semaphore(self.item_concurrency)
+
+        async def run_item(asin: str):
+            item = job["items"][asin]
+            async with semaphore:
+                try:
+                    result = await self._process(asin, dict(params, query=item["query"]))
+                except Exception as e:
+                    result = {"status": "failed", "reason": str(e)}
+            item.update(result)
+            job[item["status"]] += 1
+            self.seen.record(asin, item["status"], item["query"])
+            await asyncio.to_thread(self._append_progress, job["job_id"], json.dumps(dict(result, asin=asin)))
+            self._publish(job, {"type": "item", "asin": asin, "item": item})
+
+        await asyncio.gather(*(run_item(asin) for asin in pending))
+
+        job["status"] = "completed"
+        await self._checkpoint(job)
+        self._publish(job, {"type": "finished"})
+        print(f"🎉 Sourcing job {job['job_id']} complete: {job['added']} added, "
+              f"{job['skipped']} skipped, {job['failed']} failed, {job.get('duplicates', 0)} already imported")
+
+
+# Global queue shared by the API server
+sourcing_jobs = SourcingJobQueue()